@@ -2,14 +2,25 @@
 Base Agent class for the Elderly Care System.
 All specialized agents will inherit from this class.
 """
+import sys
 import uuid
+from collections import deque
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple, Union, TYPE_CHECKING
+
+from elderly_care_system.agents.message import Message, Priority
+
+if TYPE_CHECKING:
+    from elderly_care_system.agents.message_bus import MessageBus
+    from elderly_care_system.agents.message_router import MessageRouter
 
 
 class Agent(ABC):
     """Base Agent class that all other agents will inherit from."""
     
+    # Message types the agent receives from broadcasts on a router
+    SUBSCRIPTIONS: Tuple[str, ...] = ()
+    
     def __init__(self, agent_id: Optional[str] = None, name: str = "Generic Agent"):
         """
         Initialize the base agent with a unique ID and name.
@@ -18,10 +29,14 @@ class Agent(ABC):
             agent_id: Optional unique identifier for the agent. If not provided, a UUID will be generated.
             name: Name of the agent for display purposes.
         """
-        self.agent_id = agent_id or str(uuid.uuid4())
-        self.name = name
-        self.message_queue = []
+        # Interned, since every message envelope refers to them
+        self.agent_id = sys.intern(agent_id or str(uuid.uuid4()))
+        self.name = sys.intern(name)
+        self.message_queue = deque()
         self.connected_agents = {}
+        self.message_bus = None  # Delivers messages asynchronously when set
+        self.router = None  # Routes broadcasts to subscribers when set
+        self.subscriptions = set(self.SUBSCRIPTIONS)
         self.state: Dict[str, Any] = {}
         
         # Initialize callback function(s)
@@ -40,6 +55,64 @@ class Agent(ABC):
         if agent.agent_id not in self.connected_agents:
             self.connected_agents[agent.agent_id] = agent
     
+    def join_router(self, router: 'MessageRouter') -> None:
+        """
+        Join a message router, so broadcasts reach only the subscribers of
+        their type and direct messages can reach any agent on the router.
+        
+        Args:
+            router: The router to join.
+        """
+        self.router = router
+        router.join(self)
+    
+    def subscribe(self, topic: str) -> None:
+        """
+        Receive broadcasts of a message type.
+        
+        Args:
+            topic: Message type to receive, or "*" for all types.
+        """
+        self.subscriptions.add(topic)
+        if self.router:
+            self.router.subscribe(self, topic)
+    
+    def unsubscribe(self, topic: str) -> None:
+        """
+        Stop receiving broadcasts of a message type.
+        
+        Args:
+            topic: Message type to stop receiving.
+        """
+        self.subscriptions.discard(topic)
+        if self.router:
+            self.router.unsubscribe(self, topic)
+    
+    def attach_to_bus(self, bus: 'MessageBus') -> None:
+        """
+        Receive messages through a message bus instead of direct calls.
+        
+        Args:
+            bus: The message bus to attach to.
+        """
+        self.message_bus = bus
+        bus.register(self)
+    
+    def deliver(self, agent: 'Agent', message: Message) -> None:
+        """
+        Deliver a message to an agent, through its mailbox while its bus is running.
+        Emergencies go through the mailbox's emergency lane, which is handled
+        before any other queued message.
+        
+        Args:
+            agent: The recipient agent.
+            message: The message to deliver.
+        """
+        if agent.message_bus is not None and agent.message_bus.delivers_to(agent.agent_id):
+            agent.message_bus.post(agent.agent_id, message)
+        else:
+            agent.handle_delivery(message)
+    
     def disconnect_from_agent(self, agent_id: str) -> None:
         """
         Disconnect from a connected agent.
@@ -50,46 +123,55 @@ class Agent(ABC):
         if agent_id in self.connected_agents:
             del self.connected_agents[agent_id]
     
-    def send_message(self, recipient_id: str, message: Dict[str, Any]) -> bool:
+    def send_message(self, recipient_id: str, message: Union[Message, Dict[str, Any]],
+                     priority: Optional[Priority] = None) -> bool:
         """
-        Send a message to a connected agent.
+        Send a message to a connected agent or an agent on the same router.
         
         Args:
             recipient_id: The ID of the recipient agent.
-            message: The message to send.
+            message: The message to send, as a dictionary or envelope.
+            priority: Delivery lane. Defaults to the lane of the message type.
             
         Returns:
             bool: True if message was sent successfully, False otherwise.
         """
-        # Add sender ID and name to the message
-        if "sender_id" not in message:
-            message["sender_id"] = self.agent_id
-        if "sender_name" not in message:
-            message["sender_name"] = self.name
+        # The envelope carries the sender ID and name
+        message = Message.wrap(message, self, priority)
         
         # Send the message
-        if recipient_id in self.connected_agents:
-            self.connected_agents[recipient_id].handle_message(message)
+        recipient = self.connected_agents.get(recipient_id)
+        if recipient is None and self.router:
+            recipient = self.router.lookup(recipient_id)
+        if recipient is not None:
+            self.deliver(recipient, message)
             return True
         else:
             return False
     
-    def broadcast_message(self, message: Dict[str, Any]) -> None:
+    def broadcast_message(self, message: Union[Message, Dict[str, Any]],
+                          priority: Optional[Priority] = None) -> None:
         """
-        Broadcast a message to all connected agents.
+        Broadcast a message to the subscribers of its type on the router,
+        or to all connected agents if the agent has not joined a router.
         
         Args:
-            message: The message to broadcast.
+            message: The message to broadcast, as a dictionary or envelope.
+            priority: Delivery lane. Defaults to the lane of the message type.
         """
-        # Add sender ID and name to the message
-        if "sender_id" not in message:
-            message["sender_id"] = self.agent_id
-        if "sender_name" not in message:
-            message["sender_name"] = self.name
+        # The envelope carries the sender ID and name
+        message = Message.wrap(message, self, priority)
         
-        # Send the message to all connected agents
-        for agent_id, agent in self.connected_agents.items():
-            agent.handle_message(message)
+        if self.router:
+            recipients = [agent for agent in self.router.subscribers(message.type)
+                          if agent is not self]
+        else:
+            recipients = list(self.connected_agents.values())
+        
+        # Each recipient gets its own envelope, since handlers may run at the
+        # same time on the message bus; they share the message body
+        for agent in recipients:
+            self.deliver(agent, message.copy())
     
     def receive_message(self, message: Dict[str, Any]) -> None:
         """
@@ -104,9 +186,22 @@ class Agent(ABC):
     def process_messages(self) -> None:
         """Process all messages in the queue."""
         while self.message_queue:
-            message = self.message_queue.pop(0)
+            message = self.message_queue.popleft()
             self.handle_message(message)
     
+    def handle_delivery(self, message: Message) -> None:
+        """
+        Handle a delivered message, reacting to an emergency first. Runs on
+        the thread that handles the agent's messages, so handlers never run
+        on the sender's thread while the bus is running.
+        
+        Args:
+            message: The delivered message.
+        """
+        if message.priority is Priority.EMERGENCY:
+            self.handle_emergency(message)
+        self.handle_message(message)
+    
     @abstractmethod
     def handle_message(self, message: Dict[str, Any]) -> None:
         """
@@ -117,6 +212,16 @@ class Agent(ABC):
         """
         pass
     
+    def handle_emergency(self, message: Message) -> None:
+        """
+        React to an emergency message before it is handled. The message is
+        still passed to handle_message afterwards.
+        
+        Args:
+            message: The emergency message.
+        """
+        pass
+    
     @abstractmethod
     def process_data(self, data: Any) -> Any:
         """
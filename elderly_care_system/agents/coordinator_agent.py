@@ -8,9 +8,15 @@ import pandas as pd
 import datetime
 
 from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.agents.message import Message, Priority
 from elderly_care_system.agents.health_monitoring_agent import HealthMonitoringAgent
+from elderly_care_system.agents.message_router import MessageRouter, ALL_TOPICS
 from elderly_care_system.agents.safety_monitoring_agent import SafetyMonitoringAgent
 from elderly_care_system.agents.reminder_agent import ReminderAgent
+from elderly_care_system.utils.alert_store import AlertStore
+from elderly_care_system.utils.alert_suppression import AlertSuppressor
+from elderly_care_system.utils.event_log import EventLog
+from elderly_care_system.utils.ring_buffer import RingBuffer
 
 
 class CoordinatorAgent(Agent):
@@ -19,6 +25,9 @@ class CoordinatorAgent(Agent):
     Acts as a central hub for communication and decision-making.
     """
     
+    # Every message is logged, so the coordinator receives all types
+    SUBSCRIPTIONS = (ALL_TOPICS,)
+    
     def __init__(self, agent_id: Optional[str] = None, name: str = "Coordinator Agent"):
         """
         Initialize the coordinator agent.
@@ -29,11 +38,14 @@ class CoordinatorAgent(Agent):
         """
         super().__init__(agent_id, name)
         
+        # On-disk log of every message, see attach_event_log
+        self.event_log = None
+        
         # Initialize state
         self.state = {
             "agents": {},
-            "alerts": [],
-            "status_updates": [],
+            "alerts": RingBuffer(1000),  # Last 1000 alerts
+            "status_updates": RingBuffer(1000),  # Last 1000 logged messages
             "emergency_mode": False
         }
         
@@ -47,6 +59,14 @@ class CoordinatorAgent(Agent):
         self.safety_agent = SafetyMonitoringAgent()
         self.reminder_agent = ReminderAgent()
         
+        # Keep the alerts of all agents in one indexed store, and track their
+        # ongoing conditions in one place
+        self.alert_store = AlertStore()
+        self.alert_suppressor = AlertSuppressor()
+        for agent in (self.health_agent, self.safety_agent):
+            agent.alert_store = self.alert_store
+            agent.alert_suppressor = self.alert_suppressor
+        
         # Add agents to state
         self.state["agents"] = {
             "health": self.health_agent,
@@ -54,18 +74,11 @@ class CoordinatorAgent(Agent):
             "reminder": self.reminder_agent
         }
         
-        # Connect all agents to the coordinator (and vice versa)
+        # Put all agents on one router; broadcasts go to the subscribers of
+        # their type and direct messages can reach any agent on it
+        self.join_router(MessageRouter())
         for agent_type, agent in self.state["agents"].items():
-            self.connect_to_agent(agent)
-            agent.connect_to_agent(self)
-        
-        # Connect agents to each other for direct communication when needed
-        self.health_agent.connect_to_agent(self.safety_agent)
-        self.safety_agent.connect_to_agent(self.health_agent)
-        self.health_agent.connect_to_agent(self.reminder_agent)
-        self.reminder_agent.connect_to_agent(self.health_agent)
-        self.safety_agent.connect_to_agent(self.reminder_agent)
-        self.reminder_agent.connect_to_agent(self.safety_agent)
+            agent.join_router(self.router)
     
     def handle_message(self, message: Dict[str, Any]) -> None:
         """
@@ -104,16 +117,57 @@ class CoordinatorAgent(Agent):
         Args:
             message: The message to log.
         """
-        # Add timestamp if not present
-        if "timestamp" not in message:
-            message["timestamp"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Keep plain dictionaries in an envelope too, which records the time
+        # they were logged and is much smaller than a timestamped copy
+        if not isinstance(message, Message):
+            message = Message(message)
         
-        # Add to status updates
+        # Add to status updates (the buffer keeps only the last 1000)
         self.state["status_updates"].append(message)
         
-        # Keep only the last 1000 status updates
-        if len(self.state["status_updates"]) > 1000:
-            self.state["status_updates"] = self.state["status_updates"][-1000:]
+        # Keep the full history on disk
+        if self.event_log is not None:
+            self.event_log.append(message.type, message.to_dict(), message.wall_time.timestamp())
+    
+    def attach_event_log(self, event_log: EventLog) -> None:
+        """
+        Log every received message to an on-disk event log, so the message
+        history survives restarts and can be queried by time and type.
+        
+        Args:
+            event_log: The event log to append to.
+        """
+        self.event_log = event_log
+    
+    def query_events(self, start: Optional[float] = None, end: Optional[float] = None,
+                     types: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get logged messages in a time range.
+        
+        Args:
+            start: Earliest epoch time to include.
+            end: Latest epoch time to include.
+            types: Message types to include; defaults to all types.
+            limit: Maximum number of messages to return.
+            
+        Returns:
+            List of events with "time", "type" and "data", oldest first. Without
+            an event log, only the last 1000 messages in memory are searched.
+        """
+        if self.event_log is not None:
+            return list(self.event_log.query(start, end, types, limit))
+        
+        events = []
+        for message in self.state["status_updates"]:
+            event_time = message.wall_time.timestamp()
+            if (start is not None and event_time < start) or (end is not None and event_time > end):
+                continue
+            if types is not None and message.type not in types:
+                continue
+            events.append({"time": event_time, "type": message.type, "data": message.to_dict()})
+            if limit is not None and len(events) >= limit:
+                break
+        return events
     
     def handle_health_alert(self, alert: Dict[str, Any]) -> None:
         """
@@ -132,8 +186,10 @@ class CoordinatorAgent(Agent):
                 self.state["emergency_mode"] = True
                 break
         
-        # Notify external caregivers or healthcare providers (simulated)
-        self.notify_external_contacts("health", alert)
+        # Notify external caregivers or healthcare providers (simulated),
+        # unless handle_emergency already did
+        if not self.is_emergency(alert):
+            self.notify_external_contacts("health", alert)
     
     def handle_safety_alert(self, alert: Dict[str, Any]) -> None:
         """
@@ -152,8 +208,10 @@ class CoordinatorAgent(Agent):
                 self.state["emergency_mode"] = True
                 break
         
-        # Notify external caregivers or emergency services (simulated)
-        self.notify_external_contacts("safety", alert)
+        # Notify external caregivers or emergency services (simulated),
+        # unless handle_emergency already did
+        if not self.is_emergency(alert):
+            self.notify_external_contacts("safety", alert)
     
     def handle_reminder(self, reminder: Dict[str, Any]) -> None:
         """
@@ -181,6 +239,22 @@ class CoordinatorAgent(Agent):
         
         print(f"Coordinator received status update from {source}")
     
+    @staticmethod
+    def is_emergency(message: Dict[str, Any]) -> bool:
+        """Check whether a message was sent in the emergency lane."""
+        return isinstance(message, Message) and message.priority is Priority.EMERGENCY
+    
+    def handle_emergency(self, message: Message) -> None:
+        """
+        Handle an emergency ahead of any queued messages: enter emergency
+        mode and notify external contacts.
+        
+        Args:
+            message: The emergency message.
+        """
+        self.state["emergency_mode"] = True
+        self.notify_external_contacts(message.type.split("_")[0], message)
+    
     def notify_external_contacts(self, alert_type: str, alert: Dict[str, Any]) -> None:
         """
         Notify external contacts about alerts (simulated).
@@ -191,7 +265,8 @@ class CoordinatorAgent(Agent):
         """
         # In a real system, this would send SMS, make calls, etc.
         # For now, just print a message
-        alert_messages = ", ".join(alert.get("alert_messages", ["Unknown alert"]))
+        # Safety alerts carry a list of messages, health alerts a single one
+        alert_messages = ", ".join(alert.get("alert_messages") or [alert.get("message", "Unknown alert")])
         timestamp = alert.get("timestamp", datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
         
         print(f"[{timestamp}] EXTERNAL NOTIFICATION: {alert_type.upper()} ALERT - {alert_messages}")
@@ -207,7 +282,7 @@ class CoordinatorAgent(Agent):
             "type": "system_status",
             "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "emergency_mode": self.state["emergency_mode"],
-            "recent_alerts": self.state["alerts"][-5:] if self.state["alerts"] else [],
+            "recent_alerts": self.state["alerts"][-5:].to_list() if self.state["alerts"] else [],
             "connected_agents": list(self.state["agents"].keys())
         }
         self.send_message(recipient_id, message)
@@ -274,6 +349,27 @@ class CoordinatorAgent(Agent):
         sent_reminders = self.reminder_agent.run_scheduler()
         
         # Log any sent reminders
+        self.log_sent_reminders(sent_reminders)
+    
+    def dispatch_due_reminders(self) -> List[Dict[str, Any]]:
+        """
+        Trigger the reminders that are due. Called by the system's reminder
+        thread whenever the next reminder falls due.
+        
+        Returns:
+            List of reminders that were triggered.
+        """
+        sent_reminders = self.reminder_agent.run_periodic_check()
+        self.log_sent_reminders(sent_reminders)
+        return sent_reminders
+    
+    def log_sent_reminders(self, sent_reminders: List[Dict[str, Any]]) -> None:
+        """
+        Log the reminders that were sent.
+        
+        Args:
+            sent_reminders: The reminders.
+        """
         for reminder in sent_reminders:
             self.log_message({
                 "type": "reminder_sent",
@@ -2,13 +2,25 @@
 Health Monitoring Agent for Elderly Care System.
 Monitors vital signs, analyzes patterns, and raises health alerts.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import pandas as pd
+import numpy as np
 import datetime
-import statistics
+import os
+import threading
 import uuid
 
 from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.agents.message import Priority
+from elderly_care_system.utils.alert_store import AlertStore
+from elderly_care_system.utils.alert_suppression import AlertSuppressor
+from elderly_care_system.utils.health_analytics import HealthAnalytics
+from elderly_care_system.utils.residents import ResidentPartitions, resident_key, UNKNOWN_RESIDENT
+from elderly_care_system.utils.ring_buffer import NumericRingBuffer, RingBuffer
+from elderly_care_system.utils.rules import CompiledRule, RulePlan, compile_rules
+from elderly_care_system.utils.streaming_stats import WindowedStats
+from elderly_care_system.utils.timestamps import timestamp_or_now
+from elderly_care_system.utils.vitals_store import VitalsStore
 
 
 class HealthMonitoringAgent(Agent):
@@ -16,6 +28,72 @@ class HealthMonitoringAgent(Agent):
     Agent responsible for monitoring health metrics and raising alerts.
     """
     
+    # Windows over which streaming statistics are kept for each metric
+    STATUS_WINDOWS = {
+        "last_100": {"max_count": 100},
+        "last_hour": {"max_age": 3600},
+        "last_day": {"max_age": 86400}
+    }
+    
+    # Readings kept in memory once the full history is kept in a vitals store
+    RECENT_READINGS = 1000
+    
+    # Oxygen saturation (%) below which an alert is sent as an emergency
+    CRITICAL_OXYGEN_LEVEL = 88
+    
+    # Message types handled in handle_message
+    SUBSCRIPTIONS = ("health_data", "request_health_status", "update_threshold", "get_next_data_point")
+    
+    # Alert rules, in the order their alerts are raised. "recorded" rules report
+    # the threshold information recorded with a reading (generate_alerts_from_data),
+    # "thresholds" rules check readings against our own thresholds (check_health_alerts)
+    ALERT_RULES = (
+        {"source": "recorded", "column": "heartrate_threshold_exceeded",
+         "requires": ("heartrate", "heartrate_threshold_exceeded"),
+         "metric": "heartrate", "value_field": "heartrate", "threshold_key": "heartrate_threshold",
+         "message": "Heart rate threshold exceeded: {value} BPM", "severity": "medium", "condition": "high"},
+        {"source": "recorded", "column": "blood_pressure_threshold_exceeded",
+         "requires": ("systolic_bp", "diastolic_bp", "blood_pressure_threshold_exceeded"),
+         "metric": "blood_pressure", "value_template": "{systolic_bp}/{diastolic_bp}",
+         "threshold_key": "blood_pressure_threshold",
+         "message": "Blood pressure threshold exceeded: {value} mmHg", "severity": "high", "condition": "high"},
+        {"source": "recorded", "column": "glucose_threshold_exceeded",
+         "requires": ("blood_glucose", "glucose_threshold_exceeded"),
+         "metric": "blood_glucose", "value_field": "blood_glucose", "threshold_key": "blood_glucose_threshold",
+         "message": "Blood glucose threshold exceeded: {value} mg/dL", "severity": "medium", "condition": "high"},
+        {"source": "recorded", "column": "oxygen_threshold_exceeded",
+         "requires": ("oxygen_level", "oxygen_threshold_exceeded"),
+         "metric": "oxygen_level", "value_field": "oxygen_level", "threshold_key": "oxygen_level_threshold",
+         "message": "Oxygen level below threshold: {value}%", "severity": "high", "condition": "low"},
+        
+        {"source": "thresholds", "column": "heartrate", "op": ">", "threshold_key": "heartrate_threshold",
+         "message": "High heart rate detected: {value} BPM", "severity": "medium", "condition": "high"},
+        # Resting heart rate below 50 is generally concerning
+        {"source": "thresholds", "column": "heartrate", "op": "<", "threshold": 50,
+         "message": "Low heart rate detected: {value} BPM", "severity": "medium", "condition": "low"},
+        {"source": "thresholds", "column": "systolic_bp", "op": ">", "threshold_key": "blood_pressure_threshold",
+         "requires": ("systolic_bp", "diastolic_bp"), "metric": "blood_pressure",
+         "value_template": "{systolic_bp}/{diastolic_bp}",
+         "message": "High blood pressure detected: {value} mmHg", "severity": "high", "condition": "high"},
+        {"source": "thresholds", "column": "diastolic_bp", "op": ">", "threshold": 90,
+         "requires": ("systolic_bp", "diastolic_bp"),
+         "message": "High diastolic blood pressure: {value} mmHg", "severity": "medium", "condition": "high"},
+        {"source": "thresholds", "column": "systolic_bp", "op": "<", "threshold_key": "blood_pressure_lower_threshold",
+         "requires": ("systolic_bp", "diastolic_bp"), "metric": "blood_pressure",
+         "value_template": "{systolic_bp}/{diastolic_bp}",
+         "message": "Low blood pressure detected: {value} mmHg", "severity": "medium", "condition": "low"},
+        {"source": "thresholds", "column": "temperature", "op": ">", "threshold_key": "temperature_threshold",
+         "message": "Elevated temperature detected: {value}°C", "severity": "medium", "condition": "high"},
+        {"source": "thresholds", "column": "temperature", "op": "<", "threshold": 36.0,
+         "message": "Low body temperature detected: {value}°C", "severity": "medium", "condition": "low"},
+        {"source": "thresholds", "column": "blood_glucose", "op": ">", "threshold_key": "blood_glucose_threshold",
+         "message": "High blood glucose detected: {value} mg/dL", "severity": "medium", "condition": "high"},
+        {"source": "thresholds", "column": "blood_glucose", "op": "<", "threshold_key": "blood_glucose_lower_threshold",
+         "message": "Low blood glucose detected: {value} mg/dL", "severity": "high", "condition": "low"},
+        {"source": "thresholds", "column": "oxygen_level", "op": "<", "threshold_key": "oxygen_level_threshold",
+         "message": "Low oxygen level detected: {value}%", "severity": "high", "condition": "low"}
+    )
+    
     def __init__(self, agent_id: Optional[str] = None, name: str = "Health Monitoring Agent"):
         """
         Initialize the health monitoring agent.
@@ -26,10 +104,16 @@ class HealthMonitoringAgent(Agent):
         """
         super().__init__(agent_id, name)
         
+        # Indexed store of the raised alerts and the suppressor of repeated
+        # alerts; the coordinator shares them between its agents
+        self.alert_store = AlertStore()
+        self.alert_suppressor = AlertSuppressor()
+        
         # Initialize state
         self.state = {
             "health_data": [],
             "alerts": [],
+            "latest_readings": {},
             "heartrate_threshold": 100,
             "blood_pressure_threshold": 140,
             "blood_pressure_lower_threshold": 90,
@@ -39,20 +123,72 @@ class HealthMonitoringAgent(Agent):
             "oxygen_level_threshold": 92
         }
         
+        # Alert rules compiled against the thresholds; replaced as a whole
+        # whenever a threshold changes
+        self.rule_plan: RulePlan = compile_rules(self.ALERT_RULES, self.state)
+        
         # Store the full dataset
         self.data = None
         self.current_data_index = 0
         
-        # Store historical metrics
+        # Store historical metrics (last 100 data points of each)
         self.historical_metrics = {
-            "heartrate": [],
-            "systolic_bp": [],
-            "diastolic_bp": [],
-            "temperature": [],
-            "blood_glucose": [],
-            "oxygen_level": []
+            "heartrate": NumericRingBuffer(100),
+            "systolic_bp": NumericRingBuffer(100),
+            "diastolic_bp": NumericRingBuffer(100),
+            "temperature": NumericRingBuffer(100),
+            "blood_glucose": NumericRingBuffer(100),
+            "oxygen_level": NumericRingBuffer(100)
+        }
+        
+        # Streaming statistics per metric and window, updated on every reading
+        self.metric_windows = {
+            metric: {name: WindowedStats(**window) for name, window in self.STATUS_WINDOWS.items()}
+            for metric in self.historical_metrics
+        }
+        
+        # Per-resident state keyed by Device-ID/User-ID
+        self.residents = ResidentPartitions(self._new_resident_state)
+        
+        # Running analytics over every processed reading
+        self.analytics = HealthAnalytics()
+        
+        # Optional on-disk store of the full vitals history
+        self.history_store: Optional[VitalsStore] = None
+        
+        # Cache of side-effect-free CSV analyses, keyed by file path
+        self._analysis_cache: Dict[str, tuple] = {}
+        self._analysis_lock = threading.Lock()
+    
+    def _new_resident_state(self) -> Dict[str, Any]:
+        """
+        Create the state kept for each resident.
+        
+        Returns:
+            Initial state of a resident partition.
+        """
+        return {
+            "latest_readings": {},
+            "alerts": [],
+            "historical_metrics": {metric: NumericRingBuffer(100) for metric in self.historical_metrics},
+            "metric_windows": {
+                metric: {name: WindowedStats(**window) for name, window in self.STATUS_WINDOWS.items()}
+                for metric in self.historical_metrics
+            }
         }
     
+    def attach_history_store(self, store: VitalsStore) -> None:
+        """
+        Keep the vitals history of every reading in an on-disk store.
+        The full history then lives in the store, so only the most recent
+        readings are kept in memory.
+        
+        Args:
+            store: The store to append readings to.
+        """
+        self.history_store = store
+        self.state["health_data"] = RingBuffer(self.RECENT_READINGS, self.state["health_data"])
+    
     def initialize_with_data(self, data: pd.DataFrame) -> None:
         """
         Initialize the agent with data from a CSV file.
@@ -221,14 +357,24 @@ class HealthMonitoringAgent(Agent):
         # Add the data to our history
         self.state["health_data"].append(data)
         
-        # Update historical metrics
+        # Track the latest reading, overall and for the resident
+        resident = self.residents.partition(data.get("device_id"))
+        self.state["latest_readings"] = data
+        resident["latest_readings"] = data
+        
+        # Update historical metrics and their streaming statistics
+        reading_time = timestamp_or_now(data.get("timestamp"))
         for metric in ["heartrate", "systolic_bp", "diastolic_bp", "temperature", "blood_glucose", "oxygen_level"]:
             if metric in data:
-                self.historical_metrics[metric].append(data[metric])
-                
-                # Keep only the last 100 data points
-                if len(self.historical_metrics[metric]) > 100:
-                    self.historical_metrics[metric] = self.historical_metrics[metric][-100:]
+                for histories, windows in ((self.historical_metrics, self.metric_windows),
+                                           (resident["historical_metrics"], resident["metric_windows"])):
+                    histories[metric].append(data[metric])
+                    for stats in windows[metric].values():
+                        stats.add(data[metric], reading_time)
+        
+        # Keep the reading in the on-disk history
+        if self.history_store is not None:
+            self.history_store.append(data.get("device_id"), reading_time, data)
         
         # Use predefined alerts from CSV if available, otherwise check for alerts
         if "alert_triggered" in data and data["alert_triggered"]:
@@ -239,16 +385,70 @@ class HealthMonitoringAgent(Agent):
         
         # Add any alerts to our state
         for alert in alerts:
+            if "device_id" in data:
+                alert["device_id"] = data["device_id"]
             self.state["alerts"].append(alert)
+            resident["alerts"].append(alert)
+            self.alert_store.add(alert)
             
-            # Also broadcast the alert to other agents
-            self.broadcast_message(alert)
+            # Also broadcast the alert to other agents, unless it repeats
+            # an ongoing condition
+            if self.alert_suppressor.check(alert):
+                self.broadcast_message(alert, self.alert_priority(alert))
+        
+        # Update the running analytics
+        self.analytics.record(data, alerts)
         
         return {
             "processed_data": data,
             "alerts": alerts
         }
     
+    def alert_priority(self, alert: Dict[str, Any]) -> Optional[Priority]:
+        """
+        Get the delivery lane of a health alert.
+        
+        Args:
+            alert: The health alert.
+            
+        Returns:
+            Priority.EMERGENCY for critically low oxygen saturation, otherwise
+            None for the default alert lane.
+        """
+        if alert.get("metric") == "oxygen_level":
+            try:
+                if float(alert.get("value")) < self.CRITICAL_OXYGEN_LEVEL:
+                    return Priority.EMERGENCY
+            except (TypeError, ValueError):
+                pass
+        return None
+    
+    @staticmethod
+    def rule_alert(rule: CompiledRule, value: Any, message: str, timestamp: Any) -> Dict[str, Any]:
+        """
+        Create the health alert of a matching rule.
+        
+        Args:
+            rule: The matching alert rule.
+            value: The reported value.
+            message: The alert message.
+            timestamp: Timestamp of the reading.
+            
+        Returns:
+            The alert.
+        """
+        return {
+            "type": "health_alert",
+            "alert_id": str(uuid.uuid4()),
+            "metric": rule.metric,
+            "value": value,
+            "threshold": rule.reported_threshold,
+            "message": message,
+            "severity": rule.severity,
+            "condition": rule.condition,
+            "timestamp": timestamp
+        }
+    
     def generate_alerts_from_data(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Generate alerts based on the threshold information in the data.
@@ -259,60 +459,13 @@ class HealthMonitoringAgent(Agent):
         Returns:
             List of alerts generated from the data.
         """
-        alerts = []
         timestamp = data.get("timestamp", datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
         
         # Check each metric that has threshold information
-        if "heartrate" in data and "heartrate_threshold_exceeded" in data and data["heartrate_threshold_exceeded"]:
-            alerts.append({
-                "type": "health_alert",
-                "alert_id": str(uuid.uuid4()),
-                "metric": "heartrate",
-                "value": data["heartrate"],
-                "threshold": self.state["heartrate_threshold"],
-                "message": f"Heart rate threshold exceeded: {data['heartrate']} BPM",
-                "severity": "medium",
-                "timestamp": timestamp
-            })
-        
-        if ("systolic_bp" in data and "diastolic_bp" in data and 
-            "blood_pressure_threshold_exceeded" in data and data["blood_pressure_threshold_exceeded"]):
-            alerts.append({
-                "type": "health_alert",
-                "alert_id": str(uuid.uuid4()),
-                "metric": "blood_pressure",
-                "value": f"{data['systolic_bp']}/{data['diastolic_bp']}",
-                "threshold": self.state["blood_pressure_threshold"],
-                "message": f"Blood pressure threshold exceeded: {data['systolic_bp']}/{data['diastolic_bp']} mmHg",
-                "severity": "high",
-                "timestamp": timestamp
-            })
-        
-        if "blood_glucose" in data and "glucose_threshold_exceeded" in data and data["glucose_threshold_exceeded"]:
-            alerts.append({
-                "type": "health_alert",
-                "alert_id": str(uuid.uuid4()),
-                "metric": "blood_glucose",
-                "value": data["blood_glucose"],
-                "threshold": self.state["blood_glucose_threshold"],
-                "message": f"Blood glucose threshold exceeded: {data['blood_glucose']} mg/dL",
-                "severity": "medium",
-                "timestamp": timestamp
-            })
-        
-        if "oxygen_level" in data and "oxygen_threshold_exceeded" in data and data["oxygen_threshold_exceeded"]:
-            alerts.append({
-                "type": "health_alert",
-                "alert_id": str(uuid.uuid4()),
-                "metric": "oxygen_level",
-                "value": data["oxygen_level"],
-                "threshold": self.state["oxygen_level_threshold"],
-                "message": f"Oxygen level below threshold: {data['oxygen_level']}%",
-                "severity": "high",
-                "timestamp": timestamp
-            })
-        
-        return alerts
+        return [
+            self.rule_alert(rule, value, message, timestamp)
+            for rule, value, message in self.rule_plan.evaluate(data, ("recorded",))
+        ]
     
     def check_health_alerts(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -324,150 +477,19 @@ class HealthMonitoringAgent(Agent):
         Returns:
             List of alerts generated from the data.
         """
-        alerts = []
         timestamp = data.get("timestamp", datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
         
-        # Check heart rate
-        if "heartrate" in data:
-            hr = data["heartrate"]
-            if hr > self.state["heartrate_threshold"]:
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "heartrate",
-                    "value": hr,
-                    "threshold": self.state["heartrate_threshold"],
-                    "message": f"High heart rate detected: {hr} BPM",
-                    "severity": "medium",
-                    "timestamp": timestamp
-                })
-            
-            # Check for unusually low heart rate
-            if hr < 50:  # Resting heart rate below 50 is generally concerning
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "heartrate",
-                    "value": hr,
-                    "threshold": 50,
-                    "message": f"Low heart rate detected: {hr} BPM",
-                    "severity": "medium",
-                    "timestamp": timestamp
-                })
-        
-        # Check blood pressure
-        if "systolic_bp" in data and "diastolic_bp" in data:
-            sys_bp = data["systolic_bp"]
-            dia_bp = data["diastolic_bp"]
-            
-            if sys_bp > self.state["blood_pressure_threshold"]:
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "blood_pressure",
-                    "value": f"{sys_bp}/{dia_bp}",
-                    "threshold": self.state["blood_pressure_threshold"],
-                    "message": f"High blood pressure detected: {sys_bp}/{dia_bp} mmHg",
-                    "severity": "high",
-                    "timestamp": timestamp
-                })
-            
-            if dia_bp > 90:  # High diastolic pressure
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "diastolic_bp",
-                    "value": dia_bp,
-                    "threshold": 90,
-                    "message": f"High diastolic blood pressure: {dia_bp} mmHg",
-                    "severity": "medium",
-                    "timestamp": timestamp
-                })
-            
-            if sys_bp < self.state["blood_pressure_lower_threshold"]:
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "blood_pressure",
-                    "value": f"{sys_bp}/{dia_bp}",
-                    "threshold": self.state["blood_pressure_lower_threshold"],
-                    "message": f"Low blood pressure detected: {sys_bp}/{dia_bp} mmHg",
-                    "severity": "medium",
-                    "timestamp": timestamp
-                })
-        
-        # Check temperature
-        if "temperature" in data:
-            temp = data["temperature"]
-            if temp > self.state["temperature_threshold"]:
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "temperature",
-                    "value": temp,
-                    "threshold": self.state["temperature_threshold"],
-                    "message": f"Elevated temperature detected: {temp}°C",
-                    "severity": "medium",
-                    "timestamp": timestamp
-                })
-            
-            if temp < 36.0:  # Low body temperature
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "temperature",
-                    "value": temp,
-                    "threshold": 36.0,
-                    "message": f"Low body temperature detected: {temp}°C",
-                    "severity": "medium",
-                    "timestamp": timestamp
-                })
-        
-        # Check blood glucose
-        if "blood_glucose" in data:
-            glucose = data["blood_glucose"]
-            if glucose > self.state["blood_glucose_threshold"]:
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "blood_glucose",
-                    "value": glucose,
-                    "threshold": self.state["blood_glucose_threshold"],
-                    "message": f"High blood glucose detected: {glucose} mg/dL",
-                    "severity": "medium",
-                    "timestamp": timestamp
-                })
-            
-            if glucose < self.state["blood_glucose_lower_threshold"]:
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "blood_glucose",
-                    "value": glucose,
-                    "threshold": self.state["blood_glucose_lower_threshold"],
-                    "message": f"Low blood glucose detected: {glucose} mg/dL",
-                    "severity": "high",
-                    "timestamp": timestamp
-                })
-        
-        # Check oxygen level
-        if "oxygen_level" in data:
-            oxygen = data["oxygen_level"]
-            if oxygen < self.state["oxygen_level_threshold"]:
-                alerts.append({
-                    "type": "health_alert",
-                    "alert_id": str(uuid.uuid4()),
-                    "metric": "oxygen_level",
-                    "value": oxygen,
-                    "threshold": self.state["oxygen_level_threshold"],
-                    "message": f"Low oxygen level detected: {oxygen}%",
-                    "severity": "high",
-                    "timestamp": timestamp
-                })
+        # Check every metric against our thresholds
+        alerts = [
+            self.rule_alert(rule, value, message, timestamp)
+            for rule, value, message in self.rule_plan.evaluate(data, ("thresholds",))
+        ]
         
         # Check for potentially concerning pattern (rapid heart rate increase)
-        if "heartrate" in data and len(self.historical_metrics["heartrate"]) >= 5:
-            recent_rates = self.historical_metrics["heartrate"][-5:]
+        # against this resident's own heart rate history
+        heartrate_history = self.residents.partition(data.get("device_id"))["historical_metrics"]["heartrate"]
+        if "heartrate" in data and len(heartrate_history) >= 5:
+            recent_rates = heartrate_history[-5:]
             if data["heartrate"] > recent_rates[0] * 1.3:  # 30% increase
                 alerts.append({
                     "type": "health_alert",
@@ -477,6 +499,7 @@ class HealthMonitoringAgent(Agent):
                     "baseline": recent_rates[0],
                     "message": f"Rapid increase in heart rate: from {recent_rates[0]} to {data['heartrate']} BPM",
                     "severity": "medium",
+                    "condition": "rapid_increase",
                     "timestamp": timestamp
                 })
         
@@ -497,7 +520,13 @@ class HealthMonitoringAgent(Agent):
         
         if threshold_key in self.state:
             # Update the threshold
-            self.state[threshold_key] = value
+            try:
+                self.set_thresholds({threshold_key: value})
+            except ValueError:
+                return {
+                    "success": False,
+                    "message": f"Invalid {metric} threshold: {value}"
+                }
             return {
                 "success": True,
                 "message": f"Updated {metric} threshold to {value}."
@@ -508,6 +537,35 @@ class HealthMonitoringAgent(Agent):
                 "message": f"Unknown metric: {metric}"
             }
     
+    def set_thresholds(self, thresholds: Dict[str, Any]) -> None:
+        """
+        Change threshold settings and recompile the alert rules.
+        The new rules are compiled before anything changes, then replace the
+        old ones in a single assignment, so a reading is always checked
+        against one consistent set of thresholds.
+        
+        Args:
+            thresholds: New values by threshold setting, e.g. "heartrate_threshold".
+            
+        Raises:
+            ValueError: If a threshold compared with readings is not a number.
+        """
+        plan = compile_rules(self.ALERT_RULES, {**self.state, **thresholds})
+        self.state.update(thresholds)
+        self.rule_plan = plan
+    
+    def update_state(self, state_updates: Dict[str, Any]) -> None:
+        """
+        Update the agent's state, recompiling the alert rules if a threshold changes.
+        
+        Args:
+            state_updates: Dictionary of state variables to update.
+        """
+        thresholds = {key: value for key, value in state_updates.items() if key.endswith("_threshold")}
+        if thresholds:
+            self.set_thresholds(thresholds)
+        super().update_state(state_updates)
+    
     def send_health_status(self, recipient_id: str) -> None:
         """
         Send the current health status to a connected agent.
@@ -515,13 +573,14 @@ class HealthMonitoringAgent(Agent):
         Args:
             recipient_id: ID of the agent to send the status to.
         """
-        # Calculate average values for the last 24 hours
+        # Calculate statistics over the last 100 readings and each time window
         status = self.calculate_health_status()
         
         # Create the message
         message = {
             "type": "health_status",
             "status": status,
+            "windowed_status": self.calculate_windowed_status(),
             "recent_alerts": self.state["alerts"][-5:] if self.state["alerts"] else [],
             "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
@@ -529,27 +588,39 @@ class HealthMonitoringAgent(Agent):
         # Send to the recipient
         self.send_message(recipient_id, message)
     
-    def calculate_health_status(self) -> Dict[str, Any]:
+    def calculate_health_status(self, window: str = "last_100", resident_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Calculate the current health status based on historical data.
+        Reads the streaming statistics, so the cost does not depend on history length.
         
+        Args:
+            window: Name of the window to report, one of STATUS_WINDOWS.
+            resident_id: Optional resident to report on. Defaults to all residents.
+            
         Returns:
             Dictionary with health status metrics.
         """
         status = {}
         
-        # Calculate average values for each metric
-        for metric, values in self.historical_metrics.items():
-            if values:
-                status[f"avg_{metric}"] = sum(values) / len(values)
-                status[f"max_{metric}"] = max(values)
-                status[f"min_{metric}"] = min(values)
+        if resident_id is None:
+            metric_windows, alerts = self.metric_windows, self.state["alerts"]
+        else:
+            resident = self.residents.partition(resident_id)
+            metric_windows, alerts = resident["metric_windows"], resident["alerts"]
+        
+        # Report the statistics of each metric over the window
+        for metric, windows in metric_windows.items():
+            stats = windows[window]
+            if stats.count:
+                status[f"avg_{metric}"] = stats.mean
+                status[f"max_{metric}"] = stats.max
+                status[f"min_{metric}"] = stats.min
                 
-                if len(values) > 1:
-                    status[f"std_{metric}"] = statistics.stdev(values)
+                if stats.count > 1:
+                    status[f"std_{metric}"] = stats.stdev
         
         # Add overall status assessment
-        num_alerts = len(self.state["alerts"])
+        num_alerts = len(alerts)
         if num_alerts == 0:
             status["overall"] = "normal"
         elif num_alerts < 3:
@@ -559,12 +630,488 @@ class HealthMonitoringAgent(Agent):
         
         return status
     
-    def process_csv_data(self, csv_file: str) -> pd.DataFrame:
+    def calculate_windowed_status(self, resident_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate the health status over every window in STATUS_WINDOWS.
+        
+        Args:
+            resident_id: Optional resident to report on. Defaults to all residents.
+            
+        Returns:
+            Dictionary mapping each window name to its health status.
+        """
+        return {window: self.calculate_health_status(window, resident_id) for window in self.STATUS_WINDOWS}
+    
+    def get_resident_summary(self, resident_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest readings, recent alerts and status of one resident.
+        
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            
+        Returns:
+            Dictionary with the resident's health summary, or None if the
+            resident is unknown.
+        """
+        if resident_id not in self.residents:
+            return None
+        
+        resident = self.residents.partition(resident_id)
+        return {
+            "resident_id": resident_key(resident_id),
+            "latest_readings": resident["latest_readings"],
+            "alerts": resident["alerts"][-5:],
+            "health_status": self.calculate_health_status(resident_id=resident_id),
+            "windowed_status": self.calculate_windowed_status(resident_id)
+        }
+    
+    def get_metric_history(self, resident_id: str, metric: str, start: Optional[float] = None,
+                           end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get a resident's readings of one metric in a time range.
+        Reads the vitals store if one is attached, otherwise the readings kept
+        in memory.
+        
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            metric: The metric to get.
+            start: Earliest epoch time to include.
+            end: Latest epoch time to include.
+            
+        Returns:
+            Tuple of (times, values) arrays in time order, without missing values.
+        """
+        if metric not in self.historical_metrics:
+            raise KeyError(f"Unknown metric: {metric}")
+        
+        if self.history_store is not None:
+            series = self.history_store.query(resident_id, start, end, [metric])
+            times, values = series["timestamp"], series[metric]
+        else:
+            key = resident_key(resident_id)
+            readings = [
+                data for data in self.state["health_data"]
+                if metric in data and resident_key(data.get("device_id")) == key
+            ]
+            times = np.array([timestamp_or_now(data.get("timestamp")) for data in readings], dtype=float)
+            values = np.array([data[metric] for data in readings], dtype=float)
+            
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+            in_range = np.ones(len(times), dtype=bool)
+            if start is not None:
+                in_range &= times >= start
+            if end is not None:
+                in_range &= times <= end
+            times, values = times[in_range], values[in_range]
+        
+        present = ~np.isnan(values)
+        return times[present], values[present]
+    
+    def parse_health_frame(self, df: pd.DataFrame) -> Dict[str, tuple]:
+        """
+        Parse a health DataFrame column-wise.
+        This is the vectorized equivalent of calling row_to_dict on every row.
+        
+        Args:
+            df: DataFrame containing health data.
+            
+        Returns:
+            Dictionary mapping each row_to_dict key to a (values, present) tuple,
+            where values is a list with one entry per row and present is a boolean
+            array telling which rows would have that key in row_to_dict.
+        """
+        columns = {}
+        n = len(df)
+        everywhere = np.ones(n, dtype=bool)
+        
+        def to_float(column: str) -> tuple:
+            # float() accepts missing values (NaN) but rejects other unparseable entries
+            raw = df[column]
+            values = pd.to_numeric(raw, errors="coerce")
+            present = (values.notna() | raw.isna()).to_numpy(dtype=bool)
+            return values.to_numpy(dtype=float), present
+        
+        def is_yes(column: str) -> np.ndarray:
+            return df[column].eq("Yes").fillna(False).to_numpy(dtype=bool)
+        
+        if "Device-ID/User-ID" in df.columns:
+            columns["device_id"] = (df["Device-ID/User-ID"].tolist(), everywhere)
+        
+        if "Timestamp" in df.columns:
+            columns["timestamp"] = (df["Timestamp"].tolist(), everywhere)
+        
+        if "Heart Rate" in df.columns:
+            values, present = to_float("Heart Rate")
+            columns["heartrate"] = (values, present)
+            if "Heart Rate Below/Above Threshold (Yes/No)" in df.columns:
+                columns["heartrate_threshold_exceeded"] = (
+                    is_yes("Heart Rate Below/Above Threshold (Yes/No)"), present
+                )
+        
+        if "Blood Pressure" in df.columns:
+            # Parse values like "120/80 mmHg"; non-string entries are skipped
+            bp_str = df["Blood Pressure"].astype(object).str.replace("mmHg", "", regex=False).str.strip()
+            has_slash = bp_str.str.contains("/", regex=False).fillna(False).to_numpy(dtype=bool)
+            single_slash = bp_str.str.count("/").eq(1).fillna(False).to_numpy(dtype=bool)
+            parts = bp_str.str.partition("/")
+            sys_bp = pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype=float)
+            dia_bp = pd.to_numeric(parts[2], errors="coerce").to_numpy(dtype=float)
+            parsed = has_slash & single_slash & ~np.isnan(sys_bp) & ~np.isnan(dia_bp)
+            columns["systolic_bp"] = (sys_bp, parsed)
+            columns["diastolic_bp"] = (dia_bp, parsed)
+            
+            # A malformed "a/b" value aborts the row before the threshold flag is read
+            if "Blood Pressure Below/Above Threshold (Yes/No)" in df.columns:
+                columns["blood_pressure_threshold_exceeded"] = (
+                    is_yes("Blood Pressure Below/Above Threshold (Yes/No)"), ~(has_slash & ~parsed)
+                )
+        
+        if "Temperature (°C)" in df.columns:
+            columns["temperature"] = to_float("Temperature (°C)")
+        
+        if "Glucose Levels" in df.columns:
+            values, present = to_float("Glucose Levels")
+            columns["blood_glucose"] = (values, present)
+            if "Glucose Levels Below/Above Threshold (Yes/No)" in df.columns:
+                columns["glucose_threshold_exceeded"] = (
+                    is_yes("Glucose Levels Below/Above Threshold (Yes/No)"), present
+                )
+        
+        if "Oxygen Saturation (SpO₂%)" in df.columns or "SpO2 (%)" in df.columns:
+            # Handle different column names
+            o2_column = "Oxygen Saturation (SpO₂%)" if "Oxygen Saturation (SpO₂%)" in df.columns else "SpO2 (%)"
+            values, present = to_float(o2_column)
+            columns["oxygen_level"] = (values, present)
+            if "SpO₂ Below Threshold (Yes/No)" in df.columns:
+                columns["oxygen_threshold_exceeded"] = (is_yes("SpO₂ Below Threshold (Yes/No)"), present)
+        
+        if "Alert Triggered (Yes/No)" in df.columns:
+            columns["alert_triggered"] = (is_yes("Alert Triggered (Yes/No)"), everywhere)
+        
+        if "Caregiver Notified (Yes/No)" in df.columns:
+            columns["caregiver_notified"] = (is_yes("Caregiver Notified (Yes/No)"), everywhere)
+        
+        return columns
+    
+    def columns_to_records(self, columns: Dict[str, tuple], n: int) -> List[Dict[str, Any]]:
+        """
+        Build per-row data dictionaries from parsed health columns.
+        
+        Args:
+            columns: Parsed columns as returned by parse_health_frame.
+            n: Number of rows.
+            
+        Returns:
+            List of dictionaries identical to what row_to_dict would produce.
+        """
+        records = [{} for _ in range(n)]
+        
+        for key, (values, present) in columns.items():
+            values = values.tolist() if isinstance(values, np.ndarray) else values
+            for i in np.flatnonzero(present).tolist():
+                records[i][key] = values[i]
+        
+        return records
+    
+    def batch_resident_keys(self, columns: Dict[str, tuple], n: int) -> List[str]:
+        """
+        Get the resident partition key of every row in a parsed batch.
+        
+        Args:
+            columns: Parsed columns as returned by parse_health_frame.
+            n: Number of rows.
+            
+        Returns:
+            List with the resident key of each row.
+        """
+        if "device_id" not in columns:
+            return [UNKNOWN_RESIDENT] * n
+        return [resident_key(device_id) for device_id in columns["device_id"][0]]
+    
+    def evaluate_health_batch(self, columns: Dict[str, tuple], n: int,
+                              heartrate_histories: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Evaluate alert conditions for a whole batch of parsed readings at once.
+        Produces the same alerts, in the same order, as calling process_health_data
+        on each row in turn. Does not modify the agent's state.
+        
+        Args:
+            columns: Parsed columns as returned by parse_health_frame.
+            n: Number of rows.
+            heartrate_histories: Heart rates seen before this batch per resident key
+                (lists or ring buffers), used for the rapid-increase check.
+                Defaults to the residents' historical metrics.
+            
+        Returns:
+            List with one list of alerts per row.
+        """
+        if heartrate_histories is None:
+            heartrate_histories = {
+                key: resident["historical_metrics"]["heartrate"] for key, resident in self.residents.items()
+            }
+        
+        nowhere = np.zeros(n, dtype=bool)
+        nan_column = (np.full(n, np.nan), nowhere)
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamps = columns["timestamp"][0] if "timestamp" in columns else [now] * n
+        
+        def column(key: str) -> tuple:
+            return columns.get(key, nan_column)
+        
+        def flag(key: str) -> np.ndarray:
+            values, present = columns.get(key, (nowhere, nowhere))
+            return np.asarray(values, dtype=bool) & present
+        
+        hr, hr_present = column("heartrate")
+        
+        # Rows flagged in the CSV use the recorded threshold information,
+        # all other rows are checked against our own thresholds
+        triggered = flag("alert_triggered")
+        checked = ~triggered
+        
+        # Rapid heart rate increase: compare each reading with the same resident's
+        # heart rate four readings earlier, including history from before the batch
+        hr_rows = np.flatnonzero(hr_present)
+        keys = self.batch_resident_keys(columns, n)
+        hr_keys = [keys[i] for i in hr_rows.tolist()]
+        prior_keys, prior_rates = [], []
+        for key in dict.fromkeys(hr_keys):
+            tail = [float(rate) for rate in heartrate_histories.get(key, [])[-4:]]
+            prior_keys.extend([key] * len(tail))
+            prior_rates.extend(tail)
+        combined = pd.Series(np.concatenate([np.asarray(prior_rates, dtype=float), hr[hr_rows]]))
+        shifted = combined.groupby(prior_keys + hr_keys, sort=False).shift(4).to_numpy(dtype=float)
+        baseline = np.full(n, np.nan)
+        baseline[hr_rows] = shifted[len(prior_rates):]
+        with np.errstate(invalid="ignore"):
+            rapid = hr_present & checked & (hr > baseline * 1.3)
+        
+        hr_list, baseline_list = hr.tolist(), baseline.tolist()
+        
+        # Rules are applied in order, so each row keeps the per-row alert order
+        alerts = [[] for _ in range(n)]
+        matches = self.rule_plan.evaluate_batch(columns, n, {"recorded": triggered, "thresholds": checked})
+        for rule, rows, values, messages in matches:
+            for i, value, message in zip(rows, values, messages):
+                alerts[i].append(self.rule_alert(rule, value, message, timestamps[i]))
+        
+        for i in np.flatnonzero(rapid).tolist():
+            alerts[i].append({
+                "type": "health_alert",
+                "alert_id": str(uuid.uuid4()),
+                "metric": "heartrate_change",
+                "value": hr_list[i],
+                "baseline": baseline_list[i],
+                "message": f"Rapid increase in heart rate: from {baseline_list[i]} to {hr_list[i]} BPM",
+                "severity": "medium",
+                "condition": "rapid_increase",
+                "timestamp": timestamps[i]
+            })
+        
+        return alerts
+    
+    def batch_reading_times(self, columns: Dict[str, tuple], n: int) -> np.ndarray:
+        """
+        Get the epoch time of every row in a parsed batch.
+        
+        Args:
+            columns: Parsed columns as returned by parse_health_frame.
+            n: Number of rows.
+            
+        Returns:
+            Array with the reading time of each row, in epoch seconds.
+        """
+        if "timestamp" in columns:
+            return np.array([timestamp_or_now(value) for value in columns["timestamp"][0]], dtype=float)
+        return np.full(n, timestamp_or_now(None))
+    
+    def _update_metric_history(self, histories: Dict[str, Any], windows: Dict[str, Dict[str, WindowedStats]],
+                               columns: Dict[str, tuple], rows: np.ndarray, reading_times: np.ndarray) -> None:
+        """
+        Append the metric values of some rows of a batch to a set of historical
+        metrics and their streaming statistics. Only the values that still fit
+        in the buffers are appended.
+        
+        Args:
+            histories: Ring buffers per metric.
+            windows: Streaming statistics per metric and window.
+            columns: Parsed columns as returned by parse_health_frame.
+            rows: Positions of the rows to append, in reading order.
+            reading_times: Epoch time of every row in the batch.
+        """
+        for metric in self.historical_metrics:
+            if metric in columns:
+                values, present = columns[metric]
+                metric_rows = rows[present[rows]]
+                history = histories[metric]
+                history.extend(values[metric_rows[-history.capacity:]].tolist())
+                for stats in windows[metric].values():
+                    stats.extend(values[metric_rows], reading_times[metric_rows])
+    
+    def apply_resident_batch(self, columns: Dict[str, tuple], records: List[Dict[str, Any]],
+                             alerts: List[List[Dict[str, Any]]], reading_times: np.ndarray) -> List[str]:
+        """
+        Update the resident partitions with an evaluated batch.
+        
+        Args:
+            columns: Parsed columns as returned by parse_health_frame.
+            records: The readings as returned by columns_to_records.
+            alerts: The alerts of each reading as returned by evaluate_health_batch.
+            reading_times: Epoch time of every reading.
+            
+        Returns:
+            The resident key of every reading.
+        """
+        keys = self.batch_resident_keys(columns, len(records))
+        
+        # Group the rows by resident, keeping their order
+        resident_rows: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            resident_rows.setdefault(key, []).append(i)
+        
+        for key, rows in resident_rows.items():
+            resident = self.residents.partition(key)
+            resident["latest_readings"] = records[rows[-1]]
+            self._update_metric_history(resident["historical_metrics"], resident["metric_windows"],
+                                        columns, np.asarray(rows), reading_times)
+            
+            # Tag the alerts with the resident they belong to
+            for i in rows:
+                for alert in alerts[i]:
+                    if "device_id" in records[i]:
+                        alert["device_id"] = records[i]["device_id"]
+                    resident["alerts"].append(alert)
+        
+        return keys
+    
+    def apply_global_batch(self, columns: Dict[str, tuple], records: List[Dict[str, Any]],
+                           alerts: List[List[Dict[str, Any]]], reading_times: np.ndarray) -> None:
+        """
+        Update the overall history with an evaluated batch and broadcast its alerts.
+        
+        Args:
+            columns: Parsed columns as returned by parse_health_frame.
+            records: The readings as returned by columns_to_records.
+            alerts: The alerts of each reading as returned by evaluate_health_batch.
+            reading_times: Epoch time of every reading.
+        """
+        # Add the data to our history
+        self.state["health_data"].extend(records)
+        if records:
+            self.state["latest_readings"] = records[-1]
+        
+        self._update_metric_history(self.historical_metrics, self.metric_windows,
+                                    columns, np.arange(len(records)), reading_times)
+        
+        # Keep the readings in the on-disk history, one append per resident
+        if self.history_store is not None:
+            codes, keys = pd.factorize(pd.Series([resident_key(data.get("device_id")) for data in records]))
+            for code, key in enumerate(keys):
+                rows = np.flatnonzero(codes == code)
+                self.history_store.append_batch(key, reading_times[rows], {
+                    metric: np.where(columns[metric][1][rows], columns[metric][0][rows], np.nan)
+                    for metric in self.historical_metrics if metric in columns
+                })
+        
+        # Add alerts to our state and broadcast them in reading order,
+        # except for repeats of ongoing conditions
+        for row_alerts in alerts:
+            for alert in row_alerts:
+                self.state["alerts"].append(alert)
+                self.alert_store.add(alert)
+                if self.alert_suppressor.check(alert):
+                    self.broadcast_message(alert, self.alert_priority(alert))
+    
+    def batch_result_frame(self, records: List[Dict[str, Any]], alerts: List[List[Dict[str, Any]]]) -> pd.DataFrame:
+        """
+        Build the processed-data DataFrame returned for a batch.
+        
+        Args:
+            records: The readings of the batch.
+            alerts: The alerts of each reading.
+            
+        Returns:
+            DataFrame of processed health data.
+        """
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return pd.DataFrame({
+            "data": records,
+            "alerts": alerts,
+            "timestamp": [data.get("timestamp", now) for data in records]
+        })
+    
+    def process_health_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Process a DataFrame of health readings column-wise.
+        Leaves the agent in the same state as calling process_health_data on
+        each row, but parses and checks thresholds over whole columns at once.
+        
+        Args:
+            df: DataFrame containing health data.
+            
+        Returns:
+            DataFrame of processed health data.
+        """
+        n = len(df)
+        columns = self.parse_health_frame(df)
+        records = self.columns_to_records(columns, n)
+        alerts = self.evaluate_health_batch(columns, n)
+        reading_times = self.batch_reading_times(columns, n)
+        
+        self.apply_resident_batch(columns, records, alerts, reading_times)
+        self.apply_global_batch(columns, records, alerts, reading_times)
+        for data, row_alerts in zip(records, alerts):
+            self.analytics.record(data, row_alerts)
+        
+        return self.batch_result_frame(records, alerts)
+    
+    def merge_health_partitions(self, n: int, partitions: List[tuple]) -> pd.DataFrame:
+        """
+        Merge batches that were evaluated separately, for disjoint sets of
+        residents, back into the agent. Readings are merged in their original
+        order, so the result is the same as processing the whole batch at once.
+        
+        Args:
+            n: Number of rows in the whole batch.
+            partitions: (positions, result) tuples, where positions are the rows
+                of the whole batch that were evaluated and result is the
+                dictionary returned by ingestion.evaluate_health_partition.
+            
+        Returns:
+            DataFrame of processed health data.
+        """
+        records: List[Any] = [None] * n
+        alerts: List[Any] = [None] * n
+        reading_times = np.zeros(n)
+        columns: Dict[str, tuple] = {}
+        
+        for positions, result in partitions:
+            for i, data, row_alerts in zip(positions.tolist(), result["records"], result["alerts"]):
+                records[i] = data
+                alerts[i] = row_alerts
+            reading_times[positions] = result["reading_times"]
+            for metric, (values, present) in result["metrics"].items():
+                if metric not in columns:
+                    columns[metric] = (np.full(n, np.nan), np.zeros(n, dtype=bool))
+                columns[metric][0][positions] = values
+                columns[metric][1][positions] = present
+            
+            # Residents are disjoint between partitions, so their state is taken over as is
+            self.residents.update(result["residents"])
+            self.analytics.merge(result["analytics"])
+        
+        self.apply_global_batch(columns, records, alerts, reading_times)
+        return self.batch_result_frame(records, alerts)
+    
+    def process_csv_data(self, csv_file: str, batch: bool = True) -> pd.DataFrame:
         """
         Process health data from a CSV file.
         
         Args:
             csv_file: Path to the CSV file containing health data.
+            batch: If True, parse and evaluate the file column-wise with
+                process_health_batch. If False, process it row by row.
             
         Returns:
             DataFrame of processed health data.
@@ -575,6 +1122,10 @@ class HealthMonitoringAgent(Agent):
         # Initialize with data
         self.initialize_with_data(df)
         
+        # Use the columnar path unless the per-row path was requested
+        if batch:
+            return self.process_health_batch(df)
+        
         # Process each row
         processed_data = []
         for _, row in df.iterrows():
@@ -595,70 +1146,95 @@ class HealthMonitoringAgent(Agent):
         processed_df = pd.DataFrame(processed_data)
         return processed_df
     
-    def analyze_csv_data(self, csv_file: str) -> Dict[str, Any]:
+    def analyze_csv_data(self, csv_file: str, update_state: bool = False) -> Dict[str, Any]:
         """
         Analyze health data from a CSV file and provide summary statistics.
         
+        By default the analysis is side-effect free: readings are evaluated
+        against the current thresholds without being added to the agent's
+        history or broadcast, and the result is cached until the file changes.
+        
         Args:
             csv_file: Path to the CSV file containing health data.
+            update_state: If True, process the file through process_csv_data
+                instead, recording the readings and broadcasting their alerts.
             
         Returns:
             Dictionary with analysis results.
         """
-        # Process the CSV data
-        processed_df = self.process_csv_data(csv_file)
-        
-        # Count number of alerts by type
-        alert_counts = {"total": 0}
-        for row in processed_df["alerts"]:
-            alert_counts["total"] += len(row)
-            for alert in row:
-                metric = alert.get("metric", "unknown")
-                if metric not in alert_counts:
-                    alert_counts[metric] = 0
-                alert_counts[metric] += 1
-        
-        # Calculate percentage of readings that triggered alerts
-        alert_percentage = (
-            len(processed_df[processed_df["alerts"].apply(lambda x: len(x) > 0)]) / 
-            len(processed_df) * 100 if len(processed_df) > 0 else 0
-        )
-        
-        # Count number of readings with caregiver notifications
-        notified_count = len(
-            processed_df[processed_df["data"].apply(
-                lambda x: "caregiver_notified" in x and x["caregiver_notified"]
-            )]
-        )
-        
-        # Calculate alert statistics by metric
-        metric_stats = {}
-        for metric in ["heartrate", "blood_pressure", "blood_glucose", "oxygen_level"]:
-            threshold_key = f"{metric}_threshold_exceeded"
-            metric_stats[metric] = {
-                "total_readings": len(processed_df[processed_df["data"].apply(
-                    lambda x: any(m in x for m in ([metric, "systolic_bp"] if metric == "blood_pressure" else [metric]))
-                )]),
-                "threshold_exceeded": len(processed_df[processed_df["data"].apply(
-                    lambda x: threshold_key in x and x[threshold_key]
-                )])
-            }
-            if metric_stats[metric]["total_readings"] > 0:
-                metric_stats[metric]["percentage"] = (
-                    metric_stats[metric]["threshold_exceeded"] / 
-                    metric_stats[metric]["total_readings"] * 100
-                )
-            else:
-                metric_stats[metric]["percentage"] = 0
+        if update_state:
+            return self.summarize_processed_data(self.process_csv_data(csv_file))
+        
+        # Serve the cached analysis while the file and thresholds are unchanged
+        stat = os.stat(csv_file)
+        path = os.path.abspath(csv_file)
+        thresholds = tuple(sorted(
+            (key, value) for key, value in self.state.items() if key.endswith("_threshold")
+        ))
+        cache_key = (stat.st_size, stat.st_mtime_ns, thresholds)
+        
+        with self._analysis_lock:
+            cached = self._analysis_cache.get(path)
+            if cached is not None and cached[0] == cache_key:
+                return cached[1]
+            
+            analysis = self.summarize_processed_data(self.evaluate_csv_data(csv_file))
+            self._analysis_cache[path] = (cache_key, analysis)
         
-        return {
-            "total_readings": len(processed_df),
-            "alert_counts": alert_counts,
-            "alert_percentage": alert_percentage,
-            "notified_count": notified_count,
-            "metric_stats": metric_stats,
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        return analysis
+    
+    def evaluate_csv_data(self, csv_file: str) -> pd.DataFrame:
+        """
+        Evaluate health data from a CSV file without modifying the agent's state.
+        
+        Args:
+            csv_file: Path to the CSV file containing health data.
+            
+        Returns:
+            DataFrame of evaluated health data, in the same format as process_csv_data.
+        """
+        df = pd.read_csv(csv_file)
+        n = len(df)
+        columns = self.parse_health_frame(df)
+        records = self.columns_to_records(columns, n)
+        
+        # Start from an empty history so the result depends only on the file
+        alerts = self.evaluate_health_batch(columns, n, heartrate_histories={})
+        
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return pd.DataFrame({
+            "data": records,
+            "alerts": alerts,
+            "timestamp": [data.get("timestamp", now) for data in records]
+        })
+    
+    def summarize_processed_data(self, processed_df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Compute summary statistics over processed health data.
+        
+        Args:
+            processed_df: DataFrame as returned by process_csv_data.
+            
+        Returns:
+            Dictionary with analysis results.
+        """
+        analytics = HealthAnalytics()
+        if not processed_df.empty:
+            for data, alerts in zip(processed_df["data"], processed_df["alerts"]):
+                analytics.record(data, alerts)
+        
+        return analytics.snapshot()
+    
+    def get_health_analysis(self) -> Dict[str, Any]:
+        """
+        Get summary statistics over every reading processed by the agent.
+        The counters are updated as readings arrive, so this does not depend
+        on the length of the history.
+        
+        Returns:
+            Dictionary with analysis results.
+        """
+        return self.analytics.snapshot()
     
     def get_health_metrics(self) -> Dict[str, Any]:
         """
@@ -695,25 +1271,20 @@ class HealthMonitoringAgent(Agent):
         # Calculate health status
         health_status = self.calculate_health_status()
         
-        # Count alerts by severity
+        # Count alerts by severity, from the alert store's running counts
         severity_counts = {"high": 0, "medium": 0, "low": 0}
-        for alert in self.state["alerts"]:
-            severity = alert.get("severity", "medium")
+        for severity, count in self.alert_store.counts_by("severity", "health_alert").items():
             if severity in severity_counts:
-                severity_counts[severity] += 1
+                severity_counts[severity] = count
         
         # Count alerts by type
-        metric_counts = {}
-        for alert in self.state["alerts"]:
-            metric = alert.get("metric", "unknown")
-            if metric not in metric_counts:
-                metric_counts[metric] = 0
-            metric_counts[metric] += 1
+        metric_counts = self.alert_store.counts_by("metric", "health_alert")
         
         return {
             "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "current_metrics": current_metrics,
             "health_status": health_status,
+            "windowed_status": self.calculate_windowed_status(),
             "recent_alerts": recent_alerts,
             "total_alerts": len(self.state["alerts"]),
             "severity_counts": severity_counts,
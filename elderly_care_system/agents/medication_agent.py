@@ -2,12 +2,21 @@
 Medication Management Agent for Elderly Care System.
 Handles medication scheduling, reminders, and tracking compliance.
 """
+from bisect import bisect_left, bisect_right
 from typing import Dict, Any, List, Optional
+import numpy as np
 import pandas as pd
 import datetime
+import itertools
 import uuid
 
 from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.utils.dose_counts import COMPLIANCE_WINDOWS, DailyDoseCounts
+from elderly_care_system.utils.identifiers import uuid4_batch
+from elderly_care_system.utils.timestamps import parse_timestamp, time_of_day_key
+
+# Largest number of days returned in a compliance trend
+MAX_TREND_DAYS = 365
 
 
 class MedicationAgent(Agent):
@@ -15,6 +24,10 @@ class MedicationAgent(Agent):
     Agent responsible for managing medication schedules and compliance tracking.
     """
     
+    # Message types handled in handle_message
+    SUBSCRIPTIONS = ("medication_taken", "medication_missed", "request_medication_schedule",
+                     "update_medication_supply", "get_next_data_point", "request_compliance_trend")
+    
     def __init__(self, agent_id: Optional[str] = None, name: str = "Medication Agent"):
         """
         Initialize the medication management agent.
@@ -35,6 +48,28 @@ class MedicationAgent(Agent):
             "refill_alerts": []          # Alerts for medications that need refills
         }
         
+        # Taken and missed doses per medication and in total, counted as
+        # doses are recorded so compliance never rescans the dose history
+        self.dose_counts: Dict[str, Dict[str, int]] = {}
+        self.dose_totals = {"taken": 0, "missed": 0}
+        
+        # Doses per day overall, per medication and per patient, for
+        # compliance over rolling windows
+        self.daily_doses = DailyDoseCounts()
+        self.medication_daily_doses: Dict[str, DailyDoseCounts] = {}
+        self.patient_daily_doses: Dict[str, DailyDoseCounts] = {}
+        
+        # Time slots of the schedule as sorted minutes of the day, with their
+        # keys, and the daily schedules built so far by date
+        self.slot_minutes: List[int] = []
+        self.slot_keys: List[str] = []
+        self.daily_schedules: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        
+        # Scheduled doses per day of each medication, and the unresolved
+        # refill alert of each medication
+        self.doses_per_day: Dict[str, int] = {}
+        self.open_refill_alerts: Dict[str, Dict[str, Any]] = {}
+        
         # Store the full dataset
         self.data = None
         self.current_data_index = 0
@@ -105,6 +140,35 @@ class MedicationAgent(Agent):
         
         return data
     
+    @staticmethod
+    def integer_column(data: pd.DataFrame, column: str, default: int) -> List[int]:
+        """
+        Convert a column to integers like row_to_dict does, converting each
+        distinct value once.
+        
+        Args:
+            data: The medication data.
+            column: Name of the column.
+            default: Value for missing columns and values that are not integers.
+            
+        Returns:
+            List with one integer per row.
+        """
+        if column not in data.columns:
+            return [default] * len(data)
+        
+        codes, uniques = pd.factorize(data[column])
+        converted = []
+        for value in uniques.tolist():
+            try:
+                converted.append(int(value))
+            except (ValueError, TypeError):
+                converted.append(default)
+        
+        # Missing values have code -1, which picks the default at the end
+        lookup = np.array(converted + [default], dtype=object)
+        return lookup[codes].tolist()
+    
     def extract_medications_from_data(self) -> None:
         """
         Extract medication information from the dataset and store in the agent's state.
@@ -114,62 +178,82 @@ class MedicationAgent(Agent):
         
         medications = {}
         schedule = {}
+        doses_per_day = {}
         
-        for _, row in self.data.iterrows():
-            medication_data = self.row_to_dict(row)
+        data = self.data
+        if "Medication Name" in data.columns:
+            count = len(data)
             
-            if "medication_name" not in medication_data:
-                continue
+            def column(name: str) -> List[Any]:
+                return data[name].tolist() if name in data.columns else [""] * count
             
-            # Generate unique ID for this medication
-            med_id = str(uuid.uuid4())
+            # Generate unique ID for each medication
+            med_ids = uuid4_batch(count)
+            names = column("Medication Name")
+            dosages = column("Dosage")
+            instructions = column("Instructions")
+            supplies = self.integer_column(data, "Current Supply", 0)
+            thresholds = self.integer_column(data, "Refill Threshold", 5)
             
             # Add to medications dictionary
-            medications[med_id] = {
-                "id": med_id,
-                "name": medication_data.get("medication_name", ""),
-                "dosage": medication_data.get("dosage", ""),
-                "frequency": medication_data.get("frequency", ""),
-                "instructions": medication_data.get("instructions", ""),
-                "start_date": medication_data.get("start_date", ""),
-                "end_date": medication_data.get("end_date", ""),
-                "current_supply": medication_data.get("current_supply", 0),
-                "refill_threshold": medication_data.get("refill_threshold", 5),
-                "patient_id": medication_data.get("patient_id", ""),
-                "compliance_rate": 100.0  # Initial compliance rate
-            }
+            for med_id, name, dosage, frequency, instruction, start_date, end_date, supply, threshold, patient_id in zip(
+                    med_ids, names, dosages, column("Frequency"), instructions, column("Start Date"),
+                    column("End Date"), supplies, thresholds, column("Patient ID")):
+                medications[med_id] = {
+                    "id": med_id,
+                    "name": name,
+                    "dosage": dosage,
+                    "frequency": frequency,
+                    "instructions": instruction,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "current_supply": supply,
+                    "refill_threshold": threshold,
+                    "patient_id": patient_id,
+                    "compliance_rate": 100.0  # Initial compliance rate
+                }
             
             # Parse schedule information
-            if "time_of_day" in medication_data:
-                time_str = medication_data["time_of_day"]
+            if "Time of Day" in data.columns:
+                # Handle multiple times (e.g., "8:00 AM, 2:00 PM, 8:00 PM"); the
+                # column repeats a few combinations, so each distinct one is
+                # split and converted to keys (HH:MM format) once
+                codes, uniques = pd.factorize(data["Time of Day"])
+                keys_by_code = []
+                for time_str in uniques.tolist():
+                    keys = []
+                    if isinstance(time_str, str):
+                        keys = [time_of_day_key(time.strip()) for time in time_str.split(",")]
+                    # Skip invalid times
+                    keys_by_code.append([key for key in keys if key is not None])
+                keys_by_code.append([])  # Missing values have code -1
                 
-                # Handle multiple times (e.g., "8:00 AM, 2:00 PM, 8:00 PM")
-                times = [t.strip() for t in time_str.split(",")]
+                # One row per scheduled dose, in row and time order
+                row_keys = [keys_by_code[code] for code in codes.tolist()]
+                slots = pd.DataFrame({
+                    "time_key": list(itertools.chain.from_iterable(row_keys)),
+                    "row": np.repeat(np.arange(count), [len(keys) for keys in row_keys])
+                })
                 
-                for time in times:
-                    # Convert time string to datetime.time object
-                    try:
-                        time_obj = datetime.datetime.strptime(time, "%I:%M %p").time()
-                    except ValueError:
-                        # Skip invalid time
-                        continue
-                    
-                    # Create key for the schedule dictionary (HH:MM format)
-                    time_key = time_obj.strftime("%H:%M")
-                    
-                    if time_key not in schedule:
-                        schedule[time_key] = []
-                    
-                    schedule[time_key].append({
-                        "medication_id": med_id,
-                        "name": medication_data.get("medication_name", ""),
-                        "dosage": medication_data.get("dosage", ""),
-                        "instructions": medication_data.get("instructions", ""),
-                    })
+                # Group the doses by time, in the order the times first appear
+                for time_key, group in slots.groupby("time_key", sort=False):
+                    schedule[time_key] = [
+                        {
+                            "medication_id": med_ids[row],
+                            "name": names[row],
+                            "dosage": dosages[row],
+                            "instructions": instructions[row],
+                        }
+                        for row in group["row"].tolist()
+                    ]
+                
+                doses_per_day = {med_ids[row]: doses for row, doses in slots["row"].value_counts().items()}
         
         # Update state
         self.state["medications"] = medications
         self.state["schedule"] = schedule
+        self.doses_per_day = doses_per_day
+        self.index_schedule()
         
         # Check if any medications need refills
         self.check_refill_needs()
@@ -241,6 +325,20 @@ class MedicationAgent(Agent):
                     "data": data_point
                 }
                 self.send_message(message["sender_id"], response)
+        
+        elif message_type == "request_compliance_trend":
+            # Send the compliance windows and trend to the requesting agent
+            if "sender_id" in message:
+                response = {
+                    "type": "compliance_trend",
+                    "data": self.get_compliance_trend(
+                        medication_id=message.get("medication_id"),
+                        patient_id=message.get("patient_id"),
+                        days=message.get("days", 30),
+                        end_date=message.get("end_date")
+                    )
+                }
+                self.send_message(message["sender_id"], response)
     
     def record_medication_taken(self, medication_id: str, timestamp: str) -> Dict[str, Any]:
         """
@@ -271,6 +369,7 @@ class MedicationAgent(Agent):
             "status": "taken"
         }
         self.state["taken_doses"].append(taken_record)
+        self.count_dose(medication_id, "taken", timestamp)
         
         # Decrease supply
         if "current_supply" in medication:
@@ -321,6 +420,7 @@ class MedicationAgent(Agent):
             "status": "missed"
         }
         self.state["missed_doses"].append(missed_record)
+        self.count_dose(medication_id, "missed", timestamp)
         
         # Update compliance rate
         self.update_compliance_rate(medication_id)
@@ -344,6 +444,114 @@ class MedicationAgent(Agent):
             "message": f"Recorded {medication['name']} as missed at {timestamp}"
         }
     
+    def count_dose(self, medication_id: str, status: str, timestamp: Any = None) -> None:
+        """
+        Count a recorded dose of a medication.
+        
+        Args:
+            medication_id: ID of the medication.
+            status: "taken" or "missed".
+            timestamp: Time of the dose. Defaults to now.
+        """
+        counts = self.dose_counts.get(medication_id)
+        if counts is None:
+            counts = self.dose_counts[medication_id] = {"taken": 0, "missed": 0}
+        counts[status] += 1
+        self.dose_totals[status] += 1
+        
+        # Count it in the day of the dose
+        dose_time = parse_timestamp(timestamp)
+        day = datetime.date.fromtimestamp(dose_time) if dose_time is not None else datetime.date.today()
+        
+        self.daily_doses.add(day, status)
+        if medication_id not in self.medication_daily_doses:
+            self.medication_daily_doses[medication_id] = DailyDoseCounts()
+        self.medication_daily_doses[medication_id].add(day, status)
+        
+        patient_id = str(self.state["medications"].get(medication_id, {}).get("patient_id") or "")
+        if patient_id:
+            if patient_id not in self.patient_daily_doses:
+                self.patient_daily_doses[patient_id] = DailyDoseCounts()
+            self.patient_daily_doses[patient_id].add(day, status)
+    
+    def get_compliance_trend(self, medication_id: Optional[str] = None, patient_id: Optional[str] = None,
+                             days: int = 30, end_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the compliance over rolling windows and its daily trend.
+        
+        Args:
+            medication_id: Only count doses of this medication.
+            patient_id: Only count doses of this patient's medications.
+            days: Number of days in the trend, at most MAX_TREND_DAYS.
+            end_date: Last day, in YYYY-MM-DD format. Defaults to today.
+            
+        Returns:
+            Dictionary with the doses and compliance rate over the last 7, 30
+            and 90 days, and the daily trend, oldest first, or an error. Rates
+            are None when there were no doses.
+        """
+        try:
+            days = max(1, min(int(days), MAX_TREND_DAYS))
+        except (TypeError, ValueError):
+            return {"error": f"Invalid number of days: {days}"}
+        try:
+            end = datetime.date.fromisoformat(end_date) if end_date else datetime.date.today()
+        except (TypeError, ValueError):
+            return {"error": f"Invalid end date: {end_date}"}
+        
+        # Pick the counts to read
+        if medication_id is not None:
+            counts = self.medication_daily_doses.get(medication_id, DailyDoseCounts())
+        elif patient_id is not None:
+            counts = self.patient_daily_doses.get(str(patient_id), DailyDoseCounts())
+        else:
+            counts = self.daily_doses
+        
+        return {
+            "medication_id": medication_id,
+            "patient_id": patient_id,
+            "end_date": end.isoformat(),
+            "windows": {f"{window}_day": counts.window(end, window) for window in COMPLIANCE_WINDOWS},
+            "trend": counts.trend(end, days)
+        }
+    
+    def get_patient_compliance(self, days: int = 7, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Compare each patient's compliance in the last days with the days before.
+        
+        Args:
+            days: Number of days in each window.
+            end_date: Last day, in YYYY-MM-DD format. Defaults to today.
+            
+        Returns:
+            List of patients with doses in either window, largest decline in
+            compliance first.
+        """
+        end = datetime.date.fromisoformat(end_date) if end_date else datetime.date.today()
+        previous_end = end - datetime.timedelta(days=days)
+        
+        patients = []
+        for patient_id, counts in self.patient_daily_doses.items():
+            current = counts.window(end, days)
+            previous = counts.window(previous_end, days)
+            if current["compliance_rate"] is None and previous["compliance_rate"] is None:
+                continue
+            
+            change = None
+            if current["compliance_rate"] is not None and previous["compliance_rate"] is not None:
+                change = current["compliance_rate"] - previous["compliance_rate"]
+            
+            patients.append({
+                "patient_id": patient_id,
+                "current": current,
+                "previous": previous,
+                "change": change
+            })
+        
+        # Largest declines first, patients without a change last
+        patients.sort(key=lambda patient: (patient["change"] is None, patient["change"] or 0))
+        return patients
+    
     def update_compliance_rate(self, medication_id: str) -> None:
         """
         Update the compliance rate for a medication.
@@ -354,12 +562,10 @@ class MedicationAgent(Agent):
         if medication_id not in self.state["medications"]:
             return
         
-        # Count taken and missed doses for this medication
-        taken_count = sum(1 for dose in self.state["taken_doses"] 
-                         if dose["medication_id"] == medication_id)
-        
-        missed_count = sum(1 for dose in self.state["missed_doses"] 
-                          if dose["medication_id"] == medication_id)
+        # Get the taken and missed doses for this medication
+        counts = self.dose_counts.get(medication_id, {})
+        taken_count = counts.get("taken", 0)
+        missed_count = counts.get("missed", 0)
         
         total_doses = taken_count + missed_count
         
@@ -384,10 +590,8 @@ class MedicationAgent(Agent):
         medication = self.state["medications"][medication_id]
         
         # Check if we already have an active refill alert for this medication
-        for alert in self.state["refill_alerts"]:
-            if alert["medication_id"] == medication_id and not alert.get("resolved", False):
-                # Already have an active alert
-                return
+        if medication_id in self.open_refill_alerts:
+            return
         
         # Create a new refill alert
         refill_alert = {
@@ -404,6 +608,7 @@ class MedicationAgent(Agent):
         
         # Add to refill alerts
         self.state["refill_alerts"].append(refill_alert)
+        self.open_refill_alerts[medication_id] = refill_alert
         
         # Broadcast the alert
         self.broadcast_message(refill_alert)
@@ -428,13 +633,13 @@ class MedicationAgent(Agent):
         # Update supply
         self.state["medications"][medication_id]["current_supply"] = new_supply
         
-        # Check if any refill alerts can be resolved
-        for alert in self.state["refill_alerts"]:
-            if alert["medication_id"] == medication_id and not alert.get("resolved", False):
-                if new_supply > alert["refill_threshold"]:
-                    alert["resolved"] = True
-                    alert["resolution_timestamp"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    alert["resolution_message"] = f"Medication resupplied with {new_supply} doses"
+        # Check if the refill alert can be resolved
+        alert = self.open_refill_alerts.get(medication_id)
+        if alert is not None and new_supply > alert["refill_threshold"]:
+            alert["resolved"] = True
+            alert["resolution_timestamp"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            alert["resolution_message"] = f"Medication resupplied with {new_supply} doses"
+            del self.open_refill_alerts[medication_id]
         
         return {
             "success": True,
@@ -442,6 +647,81 @@ class MedicationAgent(Agent):
             "new_supply": new_supply
         }
     
+    def index_schedule(self) -> None:
+        """
+        Index the time slots of the schedule after it changes.
+        """
+        slots = []
+        for time_str in self.state["schedule"]:
+            # Convert time string to minutes of the day
+            try:
+                hours, minutes = map(int, time_str.split(":"))
+            except (ValueError, TypeError):
+                # Skip invalid time format
+                continue
+            slots.append((hours * 60 + minutes, time_str))
+        slots.sort()
+        
+        self.slot_minutes = [minute for minute, _ in slots]
+        self.slot_keys = [time_str for _, time_str in slots]
+        self.daily_schedules = {}
+    
+    def upcoming_slots(self, now: datetime.datetime, within: Optional[datetime.timedelta] = None,
+                       count: Optional[int] = None) -> List[tuple]:
+        """
+        Find the next time slots of the schedule, looking up to a day ahead.
+        
+        Args:
+            now: The current time.
+            within: Only return slots due within this time.
+            count: Return at most this many slots.
+            
+        Returns:
+            List of (scheduled datetime, time key) pairs, earliest first.
+        """
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        seconds = (now - midnight).total_seconds()
+        latest = seconds + within.total_seconds() if within is not None else seconds + 86400
+        
+        # Slots still to come today, then the ones tomorrow before the same time
+        start = bisect_left(self.slot_minutes, seconds / 60)
+        ranges = [(start, bisect_right(self.slot_minutes, latest / 60), midnight)]
+        if latest >= 86400:
+            tomorrow = midnight + datetime.timedelta(days=1)
+            ranges.append((0, min(start, bisect_right(self.slot_minutes, (latest - 86400) / 60)), tomorrow))
+        
+        slots = []
+        for first, last, day in ranges:
+            for index in range(first, last):
+                if count is not None and len(slots) >= count:
+                    return slots
+                slots.append((day + datetime.timedelta(minutes=self.slot_minutes[index]), self.slot_keys[index]))
+        return slots
+    
+    def get_next_doses(self, count: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get the next scheduled doses.
+        
+        Args:
+            count: Number of doses to return.
+            
+        Returns:
+            List of doses, earliest first.
+        """
+        doses = []
+        for med_time, time_str in self.upcoming_slots(datetime.datetime.now(), count=count):
+            for med in self.state["schedule"][time_str]:
+                if len(doses) >= count:
+                    return doses
+                doses.append({
+                    "medication_id": med["medication_id"],
+                    "name": med["name"],
+                    "dosage": med["dosage"],
+                    "instructions": med["instructions"],
+                    "scheduled_time": med_time.strftime("%Y-%m-%d %H:%M:%S")
+                })
+        return doses
+    
     def update_upcoming_medications(self) -> List[Dict[str, Any]]:
         """
         Update the list of medications due in the next hour.
@@ -451,33 +731,18 @@ class MedicationAgent(Agent):
         """
         upcoming = []
         now = datetime.datetime.now()
-        one_hour_later = now + datetime.timedelta(hours=1)
         
-        # Check each time slot in the schedule
-        for time_str, medications in self.state["schedule"].items():
-            # Convert time string to datetime
-            try:
-                hours, minutes = map(int, time_str.split(":"))
-                med_time = now.replace(hour=hours, minute=minutes, second=0, microsecond=0)
-                
-                # If the time has already passed for today, it's for tomorrow
-                if med_time < now:
-                    med_time = med_time + datetime.timedelta(days=1)
-                
-                # Check if it's within the next hour
-                if now <= med_time <= one_hour_later:
-                    for med in medications:
-                        # Add to upcoming list
-                        upcoming.append({
-                            "medication_id": med["medication_id"],
-                            "name": med["name"],
-                            "dosage": med["dosage"],
-                            "instructions": med["instructions"],
-                            "scheduled_time": med_time.strftime("%Y-%m-%d %H:%M:%S")
-                        })
-            except (ValueError, TypeError):
-                # Skip invalid time format
-                continue
+        # Check the time slots within the next hour
+        for med_time, time_str in self.upcoming_slots(now, within=datetime.timedelta(hours=1)):
+            for med in self.state["schedule"][time_str]:
+                # Add to upcoming list
+                upcoming.append({
+                    "medication_id": med["medication_id"],
+                    "name": med["name"],
+                    "dosage": med["dosage"],
+                    "instructions": med["instructions"],
+                    "scheduled_time": med_time.strftime("%Y-%m-%d %H:%M:%S")
+                })
         
         # Update state
         self.state["upcoming_medications"] = upcoming
@@ -524,6 +789,75 @@ class MedicationAgent(Agent):
         
         return needs_refill
     
+    def get_refill_worklist(self, patient_id: Optional[str] = None,
+                            within_days: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Forecast when each medication reaches its refill threshold and runs out.
+        
+        Args:
+            patient_id: Only include this patient's medications.
+            within_days: Only include medications reaching their refill
+                threshold within this many days.
+            
+        Returns:
+            List of medications, soonest refill first, each with its supply,
+            scheduled doses per day, days until refill and until empty (None
+            if it has no scheduled doses) and whether a refill alert is open.
+        """
+        medications = list(self.state["medications"].values())
+        if patient_id is not None:
+            medications = [med for med in medications if str(med.get("patient_id", "")) == str(patient_id)]
+        if not medications:
+            return []
+        
+        # Forecast all medications at once
+        supply = np.fromiter((med.get("current_supply", 0) for med in medications), dtype=float, count=len(medications))
+        threshold = np.fromiter((med.get("refill_threshold", 5) for med in medications), dtype=float, count=len(medications))
+        per_day = np.fromiter((self.doses_per_day.get(med["id"], 0) for med in medications), dtype=float, count=len(medications))
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            days_until_empty = np.where(per_day > 0, supply / per_day, np.inf)
+            days_until_refill = np.where(per_day > 0, np.maximum(supply - threshold, 0) / per_day, np.inf)
+        # Medications already at their threshold need a refill now
+        days_until_refill[supply <= threshold] = 0
+        
+        order = np.argsort(days_until_refill, kind="stable")
+        if within_days is not None:
+            order = order[days_until_refill[order] <= within_days]
+        
+        # Refill dates, from the whole days until refill
+        finite = np.isfinite(days_until_refill)
+        refill_offsets = np.where(finite, np.floor(np.where(finite, days_until_refill, 0)), -1).astype(int)
+        today = datetime.date.today().toordinal()
+        refill_dates = {
+            offset: datetime.date.fromordinal(today + offset).isoformat() for offset in np.unique(refill_offsets).tolist()
+        }
+        refill_dates[-1] = None
+        
+        # Infinite forecasts are reported as None
+        refill_days = np.where(finite, days_until_refill, np.nan)
+        empty_days = np.where(np.isfinite(days_until_empty), days_until_empty, np.nan)
+        
+        worklist = []
+        for index, refill, empty, doses, offset in zip(order.tolist(), refill_days[order].tolist(),
+                                                       empty_days[order].tolist(), per_day[order].tolist(),
+                                                       refill_offsets[order].tolist()):
+            med = medications[index]
+            worklist.append({
+                "medication_id": med["id"],
+                "name": med["name"],
+                "patient_id": med.get("patient_id", ""),
+                "current_supply": med.get("current_supply", 0),
+                "refill_threshold": med.get("refill_threshold", 5),
+                "doses_per_day": int(doses),
+                "days_until_refill": None if refill != refill else refill,
+                "days_until_empty": None if empty != empty else empty,
+                "refill_date": refill_dates[offset],
+                "refill_alert_open": med["id"] in self.open_refill_alerts
+            })
+        
+        return worklist
+    
     def get_daily_schedule(self, date_str: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
         """
         Get the medication schedule for a specific date.
@@ -532,28 +866,35 @@ class MedicationAgent(Agent):
             date_str: Date string in YYYY-MM-DD format. Defaults to today.
             
         Returns:
-            Medication schedule for the specified date.
+            Copy of the medication schedule for the specified date, which is
+            kept until the medications change.
         """
         if date_str is None:
             date_str = datetime.datetime.now().strftime("%Y-%m-%d")
         
-        # Create a structured schedule object
-        daily_schedule = {}
-        
-        for time_str, medications in self.state["schedule"].items():
-            # Add the time slot to the schedule
-            daily_schedule[time_str] = [
-                {
-                    "id": med["medication_id"],
-                    "name": med["name"],
-                    "dosage": med["dosage"],
-                    "instructions": med["instructions"],
-                    "scheduled_time": f"{date_str} {time_str}"
-                }
-                for med in medications
-            ]
+        if date_str not in self.daily_schedules:
+            # Create a structured schedule object, in time order
+            daily_schedule = {}
+            
+            for time_str in self.slot_keys:
+                medications = self.state["schedule"][time_str]
+                # Add the time slot to the schedule
+                daily_schedule[time_str] = [
+                    {
+                        "id": med["medication_id"],
+                        "name": med["name"],
+                        "dosage": med["dosage"],
+                        "instructions": med["instructions"],
+                        "scheduled_time": f"{date_str} {time_str}"
+                    }
+                    for med in medications
+                ]
+            
+            self.daily_schedules[date_str] = daily_schedule
         
-        return daily_schedule
+        # Copy the cached schedule so callers cannot change it
+        return {time_str: [dict(med) for med in medications]
+                for time_str, medications in self.daily_schedules[date_str].items()}
     
     def process_csv_data(self, csv_file: str) -> pd.DataFrame:
         """
@@ -600,8 +941,8 @@ class MedicationAgent(Agent):
         )
         
         # Count total taken vs. missed doses
-        total_taken = len(self.state["taken_doses"])
-        total_missed = len(self.state["missed_doses"])
+        total_taken = self.dose_totals["taken"]
+        total_missed = self.dose_totals["missed"]
         
         # Calculate overall compliance rate
         overall_compliance = (
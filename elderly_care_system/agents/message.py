@@ -0,0 +1,242 @@
+"""
+Message envelopes for the Elderly Care System.
+Wraps the body of an inter-agent message with its type code, sender and
+send time in a compact object, instead of copying the body and adding
+those fields to it for every recipient.
+"""
+from collections.abc import MutableMapping
+from enum import Enum, IntEnum
+from typing import Dict, Any, Iterator, Optional, Union, TYPE_CHECKING
+import datetime
+import time
+
+if TYPE_CHECKING:
+    from elderly_care_system.agents.base_agent import Agent
+
+
+class MessageType(Enum):
+    """Types of the messages exchanged between agents."""
+    HEALTH_DATA = "health_data"
+    HEALTH_DATA_POINT = "health_data_point"
+    HEALTH_ALERT = "health_alert"
+    HEALTH_STATUS = "health_status"
+    REQUEST_HEALTH_STATUS = "request_health_status"
+    UPDATE_THRESHOLD = "update_threshold"
+    GET_NEXT_DATA_POINT = "get_next_data_point"
+    SAFETY_DATA = "safety_data"
+    SAFETY_DATA_RESPONSE = "safety_data_response"
+    SAFETY_ALERT = "safety_alert"
+    SAFETY_STATUS = "safety_status"
+    SAFETY_UPDATE = "safety_update"
+    GET_NEXT_READING = "get_next_reading"
+    REMINDER = "reminder"
+    REMINDER_DATA = "reminder_data"
+    REMINDERS = "reminders"
+    REQUEST_REMINDERS = "request_reminders"
+    ACKNOWLEDGE_REMINDER = "acknowledge_reminder"
+    REMINDER_ACKNOWLEDGED = "reminder_acknowledged"
+    GET_NEXT_REMINDER = "get_next_reminder"
+    REMINDER_TRIGGERED = "reminder_triggered"
+    REMINDER_SENT = "reminder_sent"
+    MEDICATION_TAKEN = "medication_taken"
+    MEDICATION_MISSED = "medication_missed"
+    MEDICATION_ALERT = "medication_alert"
+    MEDICATION_SCHEDULE = "medication_schedule"
+    MEDICATION_DATA_POINT = "medication_data_point"
+    REQUEST_MEDICATION_SCHEDULE = "request_medication_schedule"
+    UPDATE_MEDICATION_SUPPLY = "update_medication_supply"
+    REQUEST_COMPLIANCE_TREND = "request_compliance_trend"
+    COMPLIANCE_TREND = "compliance_trend"
+    REFILL_ALERT = "refill_alert"
+    STATUS_UPDATE = "status_update"
+    REQUEST_STATUS = "request_status"
+    SYSTEM_STATUS = "system_status"
+    USER_MESSAGE = "user_message"
+
+
+class Priority(IntEnum):
+    """Delivery lanes of messages, most urgent first."""
+    EMERGENCY = 0
+    ALERT = 1
+    ROUTINE = 2
+    TELEMETRY = 3
+
+
+# Type codes by message type name
+_TYPES = {message_type.value: message_type for message_type in MessageType}
+
+# Lane of each message type unless the sender chooses one; others are routine
+DEFAULT_PRIORITIES = {
+    MessageType.HEALTH_ALERT: Priority.ALERT,
+    MessageType.SAFETY_ALERT: Priority.ALERT,
+    MessageType.MEDICATION_ALERT: Priority.ALERT,
+    MessageType.REFILL_ALERT: Priority.ALERT,
+    MessageType.HEALTH_DATA: Priority.TELEMETRY,
+    MessageType.HEALTH_DATA_POINT: Priority.TELEMETRY,
+    MessageType.SAFETY_DATA: Priority.TELEMETRY,
+    MessageType.SAFETY_DATA_RESPONSE: Priority.TELEMETRY,
+    MessageType.SAFETY_UPDATE: Priority.TELEMETRY,
+    MessageType.MEDICATION_DATA_POINT: Priority.TELEMETRY,
+    MessageType.REMINDER_DATA: Priority.TELEMETRY
+}
+
+# Converts monotonic send times to wall-clock time for display
+_WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+# Keys provided by the envelope when the body does not contain them
+_ENVELOPE_KEYS = ("sender_id", "sender_name", "timestamp")
+
+
+class Message(MutableMapping):
+    """
+    Envelope of an inter-agent message.
+
+    Reads like the message dictionary, with "sender_id", "sender_name" and
+    "timestamp" filled in from the envelope unless the body sets them, so
+    handlers written for plain dictionaries keep working. The body is shared
+    with the sender and with other envelopes of the same message, so it is
+    copied on the first write through an envelope.
+    """
+
+    __slots__ = ("kind", "priority", "body", "sender_id", "sender_name", "created", "_owned")
+
+    def __init__(self, body: Dict[str, Any], sender: Optional['Agent'] = None,
+                 priority: Optional[Priority] = None, created: Optional[float] = None):
+        """
+        Initialize the envelope.
+
+        Args:
+            body: The message dictionary; it is not copied.
+            sender: The sending agent.
+            priority: Delivery lane. Defaults to the lane of the message type.
+            created: Monotonic send time. Defaults to now.
+        """
+        self.kind: Optional[MessageType] = _TYPES.get(body.get("type"))
+        self.priority = DEFAULT_PRIORITIES.get(self.kind, Priority.ROUTINE) if priority is None else priority
+        self.body = body
+        self.sender_id = sender.agent_id if sender else None
+        self.sender_name = sender.name if sender else None
+        self.created = time.monotonic() if created is None else created
+        self._owned = False
+
+    @classmethod
+    def wrap(cls, message: Union['Message', Dict[str, Any]], sender: 'Agent',
+             priority: Optional[Priority] = None) -> 'Message':
+        """
+        Get the envelope of an outgoing message, creating it for a dictionary.
+
+        Args:
+            message: A message dictionary or envelope.
+            sender: The sending agent, recorded unless already set.
+            priority: Delivery lane, if the sender chooses one.
+
+        Returns:
+            The message envelope.
+        """
+        if not isinstance(message, Message):
+            return cls(message, sender, priority)
+        if message.sender_id is None:
+            message.sender_id = sender.agent_id
+            message.sender_name = sender.name
+        if priority is not None:
+            message.priority = priority
+        return message
+
+    @property
+    def type(self) -> str:
+        """Name of the message type."""
+        return self.kind.value if self.kind else self.body.get("type", "")
+
+    @property
+    def wall_time(self) -> datetime.datetime:
+        """Wall-clock time the message was sent."""
+        return datetime.datetime.fromtimestamp(_WALL_CLOCK_OFFSET + self.created)
+
+    def copy(self) -> 'Message':
+        """
+        Get another envelope for the same message, sharing its body.
+
+        Returns:
+            The new envelope.
+        """
+        other = Message.__new__(Message)
+        other.kind = self.kind
+        other.priority = self.priority
+        other.body = self.body
+        other.sender_id = self.sender_id
+        other.sender_name = self.sender_name
+        other.created = self.created
+        other._owned = False
+        return other
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the message as a plain dictionary.
+
+        Returns:
+            The body with the envelope fields added.
+        """
+        return dict(self)
+
+    def _envelope_value(self, key: str) -> Any:
+        """Get an envelope field by its dictionary key, or None."""
+        if key == "sender_id":
+            return self.sender_id
+        if key == "sender_name":
+            return self.sender_name
+        if key == "timestamp":
+            return self.wall_time.strftime("%Y-%m-%d %H:%M:%S")
+        return None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.body:
+            return self.body[key]
+        value = self._envelope_value(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.body:
+            return self.body[key]
+        value = self._envelope_value(key)
+        return default if value is None else value
+
+    def __contains__(self, key: object) -> bool:
+        if key in self.body or key == "timestamp":
+            return True
+        if key == "sender_id":
+            return self.sender_id is not None
+        if key == "sender_name":
+            return self.sender_name is not None
+        return False
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if not self._owned:
+            self.body = dict(self.body)
+            self._owned = True
+        self.body[key] = value
+        if key == "type":
+            self.kind = _TYPES.get(value)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self.body:
+            raise KeyError(key)
+        if not self._owned:
+            self.body = dict(self.body)
+            self._owned = True
+        del self.body[key]
+        if key == "type":
+            self.kind = None
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.body
+        for key in _ENVELOPE_KEYS:
+            if key not in self.body and key in self:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
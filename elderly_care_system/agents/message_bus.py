@@ -0,0 +1,332 @@
+"""
+Message bus for the Elderly Care System.
+Delivers messages between agents asynchronously: every agent on the bus has
+a bounded mailbox drained by its own worker thread, so senders return at
+once and a slow handler only delays its own agent.
+"""
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+import threading
+import time
+
+from elderly_care_system.agents.message import Message, Priority, DEFAULT_PRIORITIES
+
+if TYPE_CHECKING:
+    from elderly_care_system.agents.base_agent import Agent
+
+
+def is_alert(message: Message) -> bool:
+    """
+    Check whether a message must never be dropped: emergencies, alerts, and
+    alert types sent in a lower lane.
+
+    Args:
+        message: The message.
+
+    Returns:
+        True if the message is an emergency or an alert.
+    """
+    return message.priority <= Priority.ALERT or DEFAULT_PRIORITIES.get(message.kind) is Priority.ALERT
+
+
+class Mailbox:
+    """
+    Bounded queues of messages for one agent, one per priority lane, with the
+    thread that handles them. The worker always takes the oldest message of
+    the most urgent non-empty lane.
+    """
+
+    def __init__(self, agent: 'Agent', size: int):
+        """
+        Initialize the mailbox.
+
+        Args:
+            agent: The agent whose messages are delivered.
+            size: Maximum number of queued messages per lane. The emergency
+                lane is not limited, and alerts that find their lane full go
+                over the limit, so neither is ever dropped.
+        """
+        self.agent = agent
+        self.size = size
+        self.lanes: List[deque] = [deque() for _ in Priority]
+        self.thread: Optional[threading.Thread] = None
+        self.closed = False
+        self.unfinished = 0
+        self._condition = threading.Condition()
+
+        # Delivery statistics, overall and per lane
+        self.handled = 0
+        self.dropped = 0
+        self.overflowed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.max_handler_time = 0.0
+        self.lane_handled = [0] * len(Priority)
+        self.lane_delay = [0.0] * len(Priority)
+        self.lane_max_delay = [0.0] * len(Priority)
+
+    def put(self, message: Message, timeout: Optional[float]) -> bool:
+        """
+        Queue a message in the lane of its priority.
+
+        Args:
+            message: The message to queue.
+            timeout: Seconds to wait for room in a full lane.
+
+        Returns:
+            True if the message was queued, False if its lane stayed full.
+        """
+        lane = self.lanes[message.priority]
+        with self._condition:
+            if message.priority is not Priority.EMERGENCY:
+                if not self._condition.wait_for(lambda: len(lane) < self.size, timeout):
+                    if not is_alert(message):
+                        self.dropped += 1
+                        return False
+                    self.overflowed += 1
+            lane.append((time.perf_counter(), message))
+            self.unfinished += 1
+            self._condition.notify_all()
+            return True
+
+    def _next(self) -> Optional[Tuple[int, float, Message]]:
+        """Wait for the most urgent message, or None once the mailbox is closed and empty."""
+        with self._condition:
+            while True:
+                for priority, lane in enumerate(self.lanes):
+                    if lane:
+                        queued_at, message = lane.popleft()
+                        self._condition.notify_all()
+                        return priority, queued_at, message
+                if self.closed:
+                    # The worker is done; a restart needs a new one
+                    self.thread = None
+                    return None
+                self._condition.wait()
+
+    def run(self) -> None:
+        """Handle messages until the mailbox is closed and empty."""
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            priority, queued_at, message = item
+
+            started = time.perf_counter()
+            try:
+                self.agent.handle_delivery(message)
+            except Exception as e:
+                # A failing handler must not stop the agent's mailbox
+                self.errors += 1
+                print(f"Error handling message in {self.agent.name}: {str(e)}")
+
+            finished = time.perf_counter()
+            delay = started - queued_at
+            with self._condition:
+                self.handled += 1
+                self.busy_time += finished - started
+                self.max_handler_time = max(self.max_handler_time, finished - started)
+                self.lane_handled[priority] += 1
+                self.lane_delay[priority] += delay
+                self.lane_max_delay[priority] = max(self.lane_max_delay[priority], delay)
+                self.unfinished -= 1
+                self._condition.notify_all()
+
+    def open(self) -> bool:
+        """
+        Reopen the mailbox after close.
+
+        Returns:
+            True if the mailbox needs a new worker, False if the previous one
+            is still running and keeps handling its messages.
+        """
+        with self._condition:
+            self.closed = False
+            self._condition.notify_all()
+            return self.thread is None
+
+    def close(self) -> None:
+        """Let the worker finish once the queued messages are handled."""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def join(self) -> None:
+        """Wait until every queued message has been handled."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.unfinished == 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the delivery statistics of the mailbox.
+
+        Returns:
+            Dictionary with queue length, message counts and handler times,
+            plus the message count and queueing delay of each lane.
+        """
+        with self._condition:
+            lanes = {
+                priority.name.lower(): {
+                    "queued": len(self.lanes[priority]),
+                    "handled": self.lane_handled[priority],
+                    "avg_delay": self.lane_delay[priority] / self.lane_handled[priority]
+                    if self.lane_handled[priority] else 0.0,
+                    "max_delay": self.lane_max_delay[priority]
+                }
+                for priority in Priority
+            }
+            return {
+                "queued": sum(len(lane) for lane in self.lanes),
+                "handled": self.handled,
+                "dropped": self.dropped,
+                "overflowed": self.overflowed,
+                "errors": self.errors,
+                "avg_handler_time": self.busy_time / self.handled if self.handled else 0.0,
+                "max_handler_time": self.max_handler_time,
+                "lanes": lanes
+            }
+
+
+class MessageBus:
+    """
+    Asynchronous message delivery between agents.
+
+    When a lane of a mailbox is full the sender waits up to `put_timeout`
+    seconds for room, so a flooded agent slows its producers down instead of
+    growing without bound; after that the message is dropped and counted,
+    unless it is an alert, which is queued over the limit.
+    """
+
+    def __init__(self, mailbox_size: int = 1000, put_timeout: float = 1.0):
+        """
+        Initialize the message bus.
+
+        Args:
+            mailbox_size: Maximum number of queued messages per agent and lane.
+            put_timeout: Seconds a sender waits for room in a full mailbox.
+        """
+        self.mailbox_size = mailbox_size
+        self.put_timeout = put_timeout
+        self.mailboxes: Dict[str, Mailbox] = {}
+        self.running = False
+        self._lock = threading.Lock()
+
+    def register(self, agent: 'Agent') -> None:
+        """
+        Give an agent a mailbox on the bus.
+
+        Args:
+            agent: The agent to register.
+        """
+        with self._lock:
+            if agent.agent_id in self.mailboxes:
+                return
+            mailbox = self.mailboxes[agent.agent_id] = Mailbox(agent, self.mailbox_size)
+            if self.running:
+                self._start_mailbox(mailbox)
+
+    def unregister(self, agent_id: str) -> None:
+        """
+        Remove an agent's mailbox after handling the messages already queued.
+
+        Args:
+            agent_id: ID of the agent to remove.
+        """
+        with self._lock:
+            mailbox = self.mailboxes.pop(agent_id, None)
+        thread = mailbox.thread if mailbox else None
+        if thread:
+            mailbox.close()
+            thread.join()
+
+    def is_registered(self, agent_id: str) -> bool:
+        """Check whether an agent has a mailbox on the bus."""
+        return agent_id in self.mailboxes
+
+    def delivers_to(self, agent_id: str) -> bool:
+        """Check whether messages for an agent currently go through the bus."""
+        return self.running and agent_id in self.mailboxes
+
+    def _start_mailbox(self, mailbox: Mailbox) -> None:
+        """Start the worker thread of a mailbox, unless its worker is still running."""
+        if mailbox.open():
+            mailbox.thread = threading.Thread(
+                target=mailbox.run, name=f"mailbox-{mailbox.agent.name}", daemon=True)
+            mailbox.thread.start()
+
+    def start(self) -> None:
+        """Start delivering messages."""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            for mailbox in self.mailboxes.values():
+                self._start_mailbox(mailbox)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Stop delivering messages after handling the ones already queued.
+        A worker that is still busy after the timeout keeps running until its
+        mailbox is empty, or is reused if the bus starts again first.
+
+        Args:
+            timeout: Seconds to wait for each worker to finish.
+        """
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            mailboxes = list(self.mailboxes.values())
+
+        for mailbox in mailboxes:
+            mailbox.close()
+        for mailbox in mailboxes:
+            thread = mailbox.thread
+            if thread:
+                thread.join(timeout)
+                if thread.is_alive():
+                    print(f"Mailbox of {mailbox.agent.name} is still handling messages")
+
+    def post(self, recipient_id: str, message: Message) -> bool:
+        """
+        Queue a message for an agent.
+
+        Args:
+            recipient_id: ID of the recipient agent.
+            message: The message to deliver.
+
+        Returns:
+            True if the message was queued, False if the recipient is unknown
+            or the lane of a message other than an alert stayed full.
+        """
+        mailbox = self.mailboxes.get(recipient_id)
+        if mailbox is None:
+            return False
+
+        if mailbox.put(message, self.put_timeout):
+            return True
+        print(f"Mailbox of {mailbox.agent.name} is full, dropped a {message.type or 'message'}")
+        return False
+
+    def wait_idle(self) -> None:
+        """
+        Wait until every queued message has been handled, including messages
+        sent by handlers in the meantime.
+        """
+        while True:
+            busy = False
+            for mailbox in list(self.mailboxes.values()):
+                if mailbox.unfinished:
+                    busy = True
+                    mailbox.join()
+            if not busy:
+                return
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the delivery statistics of every mailbox.
+
+        Returns:
+            Dictionary mapping agent names to their mailbox statistics.
+        """
+        return {mailbox.agent.name: mailbox.stats() for mailbox in list(self.mailboxes.values())}
@@ -0,0 +1,132 @@
+"""
+Topic-based message routing for the Elderly Care System.
+Agents join a router and subscribe to the message types they handle; a
+broadcast then only reaches the subscribers of its type instead of every
+agent in a full mesh.
+"""
+from typing import Dict, List, Optional, TYPE_CHECKING
+import threading
+
+if TYPE_CHECKING:
+    from elderly_care_system.agents.base_agent import Agent
+
+
+# Topic of agents that receive every message type
+ALL_TOPICS = "*"
+
+
+class MessageRouter:
+    """
+    Directory of agents and their topic subscriptions.
+
+    Lookups run on every message, so they read immutable snapshots without
+    locking; changes to the subscriptions replace the snapshots under a lock.
+    """
+
+    def __init__(self):
+        """Initialize an empty router."""
+        self.agents: Dict[str, 'Agent'] = {}
+        self._topics: Dict[str, Dict[str, 'Agent']] = {}
+        self._recipients: Dict[str, List['Agent']] = {}
+        self._lock = threading.Lock()
+
+    def join(self, agent: 'Agent') -> None:
+        """
+        Add an agent to the router with its declared subscriptions.
+
+        Args:
+            agent: The agent to add.
+        """
+        with self._lock:
+            agents = dict(self.agents)
+            agents[agent.agent_id] = agent
+            self.agents = agents
+        for topic in agent.subscriptions:
+            self.subscribe(agent, topic)
+
+    def leave(self, agent_id: str) -> None:
+        """
+        Remove an agent and all of its subscriptions.
+
+        Args:
+            agent_id: ID of the agent to remove.
+        """
+        with self._lock:
+            agents = dict(self.agents)
+            agents.pop(agent_id, None)
+            self.agents = agents
+            topics = {}
+            for topic, subscribers in self._topics.items():
+                subscribers = {key: agent for key, agent in subscribers.items() if key != agent_id}
+                if subscribers:
+                    topics[topic] = subscribers
+            self._topics = topics
+            self._recipients = {}
+
+    def subscribe(self, agent: 'Agent', topic: str) -> None:
+        """
+        Subscribe an agent to a message type.
+
+        Args:
+            agent: The subscribing agent.
+            topic: Message type to receive, or "*" for all types.
+        """
+        with self._lock:
+            topics = dict(self._topics)
+            subscribers = dict(topics.get(topic, {}))
+            subscribers[agent.agent_id] = agent
+            topics[topic] = subscribers
+            self._topics = topics
+            self._recipients = {}
+
+    def unsubscribe(self, agent: 'Agent', topic: str) -> None:
+        """
+        Stop delivering a message type to an agent.
+
+        Args:
+            agent: The subscribed agent.
+            topic: Message type to stop receiving.
+        """
+        with self._lock:
+            if agent.agent_id not in self._topics.get(topic, {}):
+                return
+            topics = dict(self._topics)
+            subscribers = dict(topics[topic])
+            del subscribers[agent.agent_id]
+            if subscribers:
+                topics[topic] = subscribers
+            else:
+                del topics[topic]
+            self._topics = topics
+            self._recipients = {}
+
+    def lookup(self, agent_id: str) -> Optional['Agent']:
+        """
+        Find an agent on the router.
+
+        Args:
+            agent_id: ID of the agent.
+
+        Returns:
+            The agent, or None if it has not joined.
+        """
+        return self.agents.get(agent_id)
+
+    def subscribers(self, topic: str) -> List['Agent']:
+        """
+        Get the agents receiving a message type.
+
+        Args:
+            topic: The message type.
+
+        Returns:
+            Subscribers of the type followed by subscribers of all types.
+        """
+        recipients = self._recipients.get(topic)
+        if recipients is None:
+            topics = self._topics
+            merged = dict(topics.get(topic, {}))
+            merged.update(topics.get(ALL_TOPICS, {}))
+            recipients = list(merged.values())
+            self._recipients[topic] = recipients
+        return recipients
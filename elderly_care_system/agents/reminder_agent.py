@@ -9,6 +9,10 @@ import uuid
 import random
 
 from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.utils.reminder_registry import ReminderRegistry
+from elderly_care_system.utils.reminder_schedule import ReminderSchedule
+from elderly_care_system.utils.residents import ResidentPartitions, resident_key
+from elderly_care_system.utils.timestamps import parse_scheduled_time
 
 
 class ReminderAgent(Agent):
@@ -17,6 +21,9 @@ class ReminderAgent(Agent):
     appointments, exercise, and other activities.
     """
     
+    # Message types handled in handle_message
+    SUBSCRIPTIONS = ("reminder_data", "request_reminders", "acknowledge_reminder", "get_next_reminder")
+    
     def __init__(self, agent_id: Optional[str] = None, name: str = "Reminder Agent"):
         """
         Initialize the reminder agent.
@@ -27,14 +34,21 @@ class ReminderAgent(Agent):
         """
         super().__init__(agent_id, name)
         
+        # Upcoming reminders ordered by due time
+        self.schedule = ReminderSchedule()
+        
         # Initialize state
         self.state = {
-            "active_reminders": [],
-            "completed_reminders": [],
             "scheduled_reminders": [],
-            "upcoming_reminders": []
+            "upcoming_reminders": self.schedule
         }
         
+        # Reminders by ID and status
+        self.reset_registry()
+        
+        # Per-resident index of reminders keyed by Device-ID/User-ID
+        self.residents = ResidentPartitions(self._new_resident_state)
+        
         # Store the full dataset
         self.data = None
         self.current_data_index = 0
@@ -42,6 +56,59 @@ class ReminderAgent(Agent):
         # Initialize reminder callback
         self.reminder_callback = None
     
+    def reset_registry(self) -> None:
+        """
+        Start an empty registry of reminders, with the active and completed
+        reminders in the state as views of it.
+        """
+        self.reminders = ReminderRegistry()
+        self.state["active_reminders"] = self.reminders.view("active")
+        self.state["completed_reminders"] = self.reminders.view("completed")
+    
+    def _new_resident_state(self) -> Dict[str, Any]:
+        """
+        Create the state kept for each resident.
+        
+        Returns:
+            Initial state of a resident partition.
+        """
+        return {
+            "reminders": {}  # Reminder ID -> reminder
+        }
+    
+    def get_resident_reminders(self, resident_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the reminders of one resident, grouped like the agent's state.
+        
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            
+        Returns:
+            Dictionary with the resident's active, completed and upcoming
+            reminders, or None if the resident is unknown.
+        """
+        if resident_id not in self.residents:
+            return None
+        
+        grouped = {
+            "resident_id": resident_key(resident_id),
+            "active_reminders": [],
+            "completed_reminders": [],
+            "upcoming_reminders": []
+        }
+        
+        # Group the resident's reminders by their status
+        for reminder_id, reminder in self.residents.partition(resident_id)["reminders"].items():
+            key = f"{self.reminders.status(reminder_id)}_reminders"
+            if key in grouped:
+                grouped[key].append(reminder)
+        
+        # Order them like the agent's lists
+        for key in ["active_reminders", "completed_reminders"]:
+            grouped[key].sort(key=lambda reminder: self.reminders.position(reminder["id"]))
+        grouped["upcoming_reminders"].sort(key=lambda reminder: self.schedule.due_time(reminder["id"]))
+        return grouped
+    
     def initialize_with_data(self, data: pd.DataFrame) -> None:
         """
         Initialize the agent with data from a CSV file.
@@ -135,45 +202,95 @@ class ReminderAgent(Agent):
                     "priority": data.get("priority", "medium"),
                     "date": data.get("date", datetime.datetime.now().strftime("%Y-%m-%d"))
                 }
+                self.normalize_reminder(reminder)
                 scheduled_reminders.append(reminder)
         
         self.state["scheduled_reminders"] = scheduled_reminders
+        
+        # Rebuild the per-resident index and the registry of reminders
+        self.residents = ResidentPartitions(self._new_resident_state)
+        self.reset_registry()
+        for reminder in scheduled_reminders:
+            self.residents.partition(reminder["device_id"])["reminders"][reminder["id"]] = reminder
+            self.reminders.add(reminder)
+    
+    def normalize_reminder(self, reminder: Dict[str, Any]) -> Optional[float]:
+        """
+        Parse the date and time a reminder is scheduled at into its "due_time",
+        in epoch seconds, so it is only parsed when the reminder is created.
+        
+        Args:
+            reminder: The reminder.
+            
+        Returns:
+            The due time, or None if the scheduled time cannot be parsed.
+        """
+        # For simulation purposes, we'll pretend all reminders are for today if they don't have a date
+        reminder_date = reminder.get("date") or datetime.datetime.now().strftime("%Y-%m-%d")
+        reminder["due_time"] = parse_scheduled_time(str(reminder_date), str(reminder["scheduled_time"]))
+        return reminder["due_time"]
+    
+    def reminder_due_time(self, reminder: Dict[str, Any], now: datetime.datetime) -> float:
+        """
+        Get the time a reminder is due.
+        
+        Args:
+            reminder: The reminder.
+            now: The current time.
+            
+        Returns:
+            Epoch time at which the reminder is due.
+        """
+        due_time = reminder["due_time"] if "due_time" in reminder else self.normalize_reminder(reminder)
+        
+        # Default to current time + 1 hour if the time cannot be parsed
+        if due_time is None:
+            return (now + datetime.timedelta(hours=1)).timestamp()
+        return due_time
+    
+    def schedule_reminder(self, reminder: Dict[str, Any], now: Optional[datetime.datetime] = None) -> bool:
+        """
+        Add a reminder to the upcoming reminders if it is still to come.
+        
+        Args:
+            reminder: The reminder.
+            now: The current time. Defaults to now.
+            
+        Returns:
+            True if the reminder was scheduled.
+        """
+        now = now or datetime.datetime.now()
+        due_time = self.reminder_due_time(reminder, now)
+        
+        # If the reminder is in the future and hasn't been sent yet
+        if due_time > now.timestamp() and not reminder.get("sent", False):
+            self.schedule.push(reminder, due_time)
+            self.reminders.set_status(reminder, "upcoming")
+            return True
+        return False
     
     def update_upcoming_reminders(self) -> None:
         """
-        Update the list of upcoming reminders based on the current time.
+        Rebuild the upcoming reminders from all scheduled reminders.
         """
         now = datetime.datetime.now()
-        today = now.strftime("%Y-%m-%d")
+        
+        # Registered reminders that are no longer due go back to being
+        # scheduled only
+        for reminder in self.schedule.to_list():
+            if reminder["id"] in self.reminders:
+                self.reminders.set_status(reminder, "scheduled")
         
         upcoming = []
         for reminder in self.state["scheduled_reminders"]:
-            # For simulation purposes, we'll pretend all reminders are for today if they don't have a date
-            reminder_date = reminder.get("date", today)
-            scheduled_time = reminder["scheduled_time"]
-            
-            # Handle different time formats
-            if ":" in scheduled_time and len(scheduled_time) <= 8:
-                # It's just a time like "08:00" or "08:00:00"
-                scheduled_datetime = datetime.datetime.strptime(f"{reminder_date} {scheduled_time}", "%Y-%m-%d %H:%M:%S" if ":" in scheduled_time else "%Y-%m-%d %H:%M")
-            else:
-                # It's a full datetime
-                try:
-                    scheduled_datetime = datetime.datetime.strptime(scheduled_time, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    # Use current date with the time if parsing fails
-                    try:
-                        time_only = datetime.datetime.strptime(scheduled_time, "%H:%M:%S").time()
-                        scheduled_datetime = datetime.datetime.combine(datetime.datetime.strptime(reminder_date, "%Y-%m-%d").date(), time_only)
-                    except ValueError:
-                        # Default to current time + 1 hour if all parsing fails
-                        scheduled_datetime = now + datetime.timedelta(hours=1)
+            due_time = self.reminder_due_time(reminder, now)
             
             # If the reminder is in the future and hasn't been sent yet
-            if scheduled_datetime > now and not reminder.get("sent", False):
-                upcoming.append(reminder)
+            if due_time > now.timestamp() and not reminder.get("sent", False):
+                upcoming.append((reminder, due_time))
+                self.reminders.set_status(reminder, "upcoming")
         
-        self.state["upcoming_reminders"] = sorted(upcoming, key=lambda x: x.get("scheduled_time", "00:00"))
+        self.schedule.rebuild(upcoming)
     
     def generate_reminder_message(self, reminder_type: str) -> str:
         """
@@ -230,18 +347,12 @@ class ReminderAgent(Agent):
                     self.send_message(message["sender_id"], response)
         
         elif message_type == "get_next_reminder":
-            # Get the next reminder from the dataset
-            self.update_upcoming_reminders()
-            
-            # If there are upcoming reminders, trigger the next one
-            if self.state["upcoming_reminders"]:
-                next_reminder = self.state["upcoming_reminders"][0]
+            # If there are upcoming reminders, trigger the next one; this
+            # also moves it from upcoming to active
+            next_reminder = self.schedule.pop()
+            if next_reminder is not None:
                 self.trigger_reminder(next_reminder)
                 
-                # Remove from upcoming and add to active
-                self.state["upcoming_reminders"].remove(next_reminder)
-                self.state["active_reminders"].append(next_reminder)
-                
                 # Notify the sender
                 if "sender_id" in message:
                     response = {
@@ -259,8 +370,8 @@ class ReminderAgent(Agent):
         """
         message = {
             "type": "reminders",
-            "active_reminders": self.state["active_reminders"],
-            "upcoming_reminders": self.state["upcoming_reminders"]
+            "active_reminders": self.reminders.reminders("active"),
+            "upcoming_reminders": self.schedule.to_list()
         }
         self.send_message(recipient_id, message)
     
@@ -275,20 +386,20 @@ class ReminderAgent(Agent):
             Status of the acknowledgment.
         """
         # Find the reminder in active reminders
-        for i, reminder in enumerate(self.state["active_reminders"]):
-            if reminder["id"] == reminder_id:
-                # Mark as acknowledged
-                reminder["acknowledged"] = True
-                reminder["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Move from active to completed
-                self.state["completed_reminders"].append(reminder)
-                self.state["active_reminders"].pop(i)
-                
-                return {
-                    "status": "success",
-                    "message": f"Reminder {reminder_id} acknowledged."
-                }
+        if self.reminders.status(reminder_id) == "active":
+            reminder = self.reminders.get(reminder_id)
+            
+            # Mark as acknowledged
+            reminder["acknowledged"] = True
+            reminder["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            # Move from active to completed
+            self.reminders.set_status(reminder, "completed")
+            
+            return {
+                "status": "success",
+                "message": f"Reminder {reminder_id} acknowledged."
+            }
         
         return {
             "status": "error",
@@ -302,8 +413,9 @@ class ReminderAgent(Agent):
         Args:
             reminder: The reminder to trigger.
         """
-        # Set the reminder as sent
+        # Set the reminder as sent; it is no longer upcoming
         reminder["sent"] = True
+        self.schedule.remove(reminder["id"])
         reminder["sent_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Print to console
@@ -314,8 +426,7 @@ class ReminderAgent(Agent):
             self.reminder_callback(reminder)
         
         # Add to active reminders if not already there
-        if reminder not in self.state["active_reminders"]:
-            self.state["active_reminders"].append(reminder)
+        self.reminders.set_status(reminder, "active")
     
     def get_random_reminder(self) -> Dict[str, Any]:
         """
@@ -373,12 +484,15 @@ class ReminderAgent(Agent):
                 "priority": data.get("priority", "medium"),
                 "date": data.get("date", datetime.datetime.now().strftime("%Y-%m-%d"))
             }
+            self.normalize_reminder(reminder)
             
             # Add the reminder to scheduled reminders
             self.state["scheduled_reminders"].append(reminder)
+            self.residents.partition(reminder["device_id"])["reminders"][reminder["id"]] = reminder
+            self.reminders.set_status(reminder, "scheduled")
             
-            # Update upcoming reminders
-            self.update_upcoming_reminders()
+            # Add it to the upcoming reminders
+            self.schedule_reminder(reminder)
             
             return {
                 "status": "success",
@@ -429,46 +543,20 @@ class ReminderAgent(Agent):
             print(f"Error processing reminder CSV data: {str(e)}")
             return pd.DataFrame()
     
-    def run_periodic_check(self) -> None:
-        """
-        Run a periodic check to trigger due reminders.
+    def run_periodic_check(self) -> List[Dict[str, Any]]:
         """
-        self.update_upcoming_reminders()
+        Trigger the reminders that are due.
         
-        now = datetime.datetime.now()
+        Returns:
+            List of reminders that were triggered, earliest first.
+        """
         triggered_reminders = []
         
-        # Check for reminders that are due but haven't been sent yet
-        for reminder in self.state["upcoming_reminders"][:]:
-            scheduled_time = reminder["scheduled_time"]
-            reminder_date = reminder.get("date", now.strftime("%Y-%m-%d"))
-            
-            # Handle different time formats
-            try:
-                if ":" in scheduled_time and len(scheduled_time) <= 8:
-                    # It's just a time like "08:00" or "08:00:00"
-                    scheduled_datetime = datetime.datetime.strptime(f"{reminder_date} {scheduled_time}", "%Y-%m-%d %H:%M:%S" if ":" in scheduled_time else "%Y-%m-%d %H:%M")
-                else:
-                    # It's a full datetime
-                    scheduled_datetime = datetime.datetime.strptime(scheduled_time, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                # Default to current time + 1 hour if parsing fails
-                scheduled_datetime = now + datetime.timedelta(hours=1)
-            
-            # If the reminder is due
-            if scheduled_datetime <= now:
-                # Trigger the reminder
-                self.trigger_reminder(reminder)
-                
-                # Remove from upcoming
-                self.state["upcoming_reminders"].remove(reminder)
-                
-                # Add to triggered reminders
-                triggered_reminders.append(reminder)
-                
-                # Make sure it's in active reminders
-                if reminder not in self.state["active_reminders"]:
-                    self.state["active_reminders"].append(reminder)
+        # Take the due reminders off the schedule; triggering them also
+        # makes them active
+        for reminder in self.schedule.pop_due():
+            self.trigger_reminder(reminder)
+            triggered_reminders.append(reminder)
         
         return triggered_reminders
     
@@ -480,9 +568,6 @@ class ReminderAgent(Agent):
         Returns:
             List of reminders that were triggered.
         """
-        # Update upcoming reminders first
-        self.update_upcoming_reminders()
-        
         # Run the periodic check to trigger due reminders
         triggered_reminders = self.run_periodic_check()
         
@@ -511,13 +596,8 @@ class ReminderAgent(Agent):
         Returns:
             Status of the operation.
         """
-        # Process the data to create a reminder
-        result = self.process_data(reminder_data)
-        
-        # Update upcoming reminders
-        self.update_upcoming_reminders()
-        
-        return result
+        # Process the data to create and schedule a reminder
+        return self.process_data(reminder_data)
     
     def get_settings(self) -> Dict[str, Any]:
         """
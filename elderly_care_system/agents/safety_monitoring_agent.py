@@ -2,12 +2,21 @@
 Safety Monitoring Agent for Elderly Care System.
 Monitors movement, detects falls, and identifies unusual behavior.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import pandas as pd
+import numpy as np
 import datetime
 import random
 
 from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.agents.message import Priority
+from elderly_care_system.utils.alert_store import AlertStore
+from elderly_care_system.utils.alert_suppression import AlertSuppressor
+from elderly_care_system.utils.residents import ResidentPartitions, resident_key
+from elderly_care_system.utils.ring_buffer import RingBuffer
+from elderly_care_system.utils.rules import RulePlan, compile_rules
+from elderly_care_system.utils.timestamps import timestamp_or_now
+from elderly_care_system.utils.vitals_store import VitalsStore
 
 
 class SafetyMonitoringAgent(Agent):
@@ -16,6 +25,45 @@ class SafetyMonitoringAgent(Agent):
     movement activity, falls, and location.
     """
     
+    # Numeric safety metrics kept in the history, see safety_metric_values
+    HISTORY_METRICS = ("fall_detected", "impact_force_level", "post_fall_inactivity_duration", "no_movement")
+    
+    # Numeric codes of the impact force levels
+    IMPACT_LEVELS = {"Low": 1.0, "Medium": 2.0, "High": 3.0}
+    
+    # Message types handled in handle_message
+    SUBSCRIPTIONS = ("safety_data", "request_status", "get_next_reading")
+    
+    # Values assumed for safety fields missing from a reading
+    READING_DEFAULTS = {
+        "impact_force_level": "Unknown",
+        "post_fall_inactivity_duration": 0,
+        "movement_activity": "",
+        "location": "Unknown"
+    }
+    
+    # Alert rules, in the order their alerts are raised. Only the first
+    # matching rule of the "fall" group applies to a reading
+    CRITICAL_FALL = "CRITICAL FALL DETECTED: High impact force or prolonged inactivity ({post_fall_inactivity_duration} seconds)!"
+    FALL = "FALL DETECTED: Medium impact force with {post_fall_inactivity_duration} seconds of inactivity!"
+    ALERT_RULES = (
+        {"group": "fall", "when": ("fall_detected",), "column": "impact_force_level", "op": "==", "threshold": "High",
+         "defaults": READING_DEFAULTS, "message": CRITICAL_FALL},
+        # 5 minutes
+        {"group": "fall", "when": ("fall_detected",), "column": "post_fall_inactivity_duration", "op": ">",
+         "threshold": 300, "defaults": READING_DEFAULTS, "message": CRITICAL_FALL},
+        {"group": "fall", "when": ("fall_detected",), "column": "impact_force_level", "op": "==", "threshold": "Medium",
+         "defaults": READING_DEFAULTS, "message": FALL},
+        # 2 minutes
+        {"group": "fall", "when": ("fall_detected",), "column": "post_fall_inactivity_duration", "op": ">",
+         "threshold": 120, "defaults": READING_DEFAULTS, "message": FALL},
+        {"group": "fall", "column": "fall_detected", "defaults": READING_DEFAULTS,
+         "message": "Minor fall detected: Low impact with {post_fall_inactivity_duration} seconds of inactivity."},
+        # Concerning lack of movement
+        {"unless": ("fall_detected",), "column": "movement_activity", "op": "==", "threshold": "No Movement",
+         "defaults": READING_DEFAULTS, "message": "Extended period of no movement detected in the {location}."}
+    )
+    
     def __init__(self, agent_id: Optional[str] = None, name: str = "Safety Monitoring Agent"):
         """
         Initialize the safety monitoring agent.
@@ -26,17 +74,146 @@ class SafetyMonitoringAgent(Agent):
         """
         super().__init__(agent_id, name)
         
+        # Indexed store of the raised alerts and the suppressor of repeated
+        # alerts; the coordinator shares them between its agents
+        self.alert_store = AlertStore()
+        self.alert_suppressor = AlertSuppressor()
+        
+        # Compiled alert rules
+        self.rule_plan: RulePlan = compile_rules(self.ALERT_RULES)
+        
         # Initialize state
         self.state = {
             "latest_readings": {},
             "alerts": [],
-            "historical_data": [],
+            "historical_data": RingBuffer(100),  # Last 100 readings
             "fall_incidents": []
         }
         
+        # Per-resident state keyed by Device-ID/User-ID
+        self.residents = ResidentPartitions(self._new_resident_state)
+        
         # Store the full dataset
         self.data = None
         self.current_data_index = 0
+        
+        # Optional on-disk store of the safety history
+        self.history_store: Optional[VitalsStore] = None
+    
+    def _new_resident_state(self) -> Dict[str, Any]:
+        """
+        Create the state kept for each resident.
+        
+        Returns:
+            Initial state of a resident partition.
+        """
+        return {
+            "latest_readings": {},
+            "alerts": [],
+            "historical_data": RingBuffer(100),
+            "fall_incidents": []
+        }
+    
+    def get_resident_summary(self, resident_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest readings, recent alerts and fall incidents of one resident.
+        
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            
+        Returns:
+            Dictionary with the resident's safety summary, or None if the
+            resident is unknown.
+        """
+        if resident_id not in self.residents:
+            return None
+        
+        resident = self.residents.partition(resident_id)
+        return {
+            "resident_id": resident_key(resident_id),
+            "latest_readings": resident["latest_readings"],
+            "alerts": resident["alerts"][-5:],
+            "fall_incidents": resident["fall_incidents"][-5:]
+        }
+    
+    def attach_history_store(self, store: VitalsStore) -> None:
+        """
+        Keep the numeric safety metrics of every reading in an on-disk store.
+        
+        Args:
+            store: The store to append readings to; it must hold HISTORY_METRICS.
+        """
+        self.history_store = store
+    
+    def safety_metric_values(self, data: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Encode a processed safety reading as numbers for the history.
+        
+        Args:
+            data: Processed safety data.
+            
+        Returns:
+            Dictionary with the values of HISTORY_METRICS that the reading has.
+        """
+        values = {}
+        if "fall_detected" in data:
+            values["fall_detected"] = 1.0 if data["fall_detected"] else 0.0
+        if data.get("impact_force_level") in self.IMPACT_LEVELS:
+            values["impact_force_level"] = self.IMPACT_LEVELS[data["impact_force_level"]]
+        if "post_fall_inactivity_duration" in data:
+            try:
+                values["post_fall_inactivity_duration"] = float(data["post_fall_inactivity_duration"])
+            except (TypeError, ValueError):
+                pass
+        if "movement_activity" in data:
+            values["no_movement"] = 1.0 if data["movement_activity"] == "No Movement" else 0.0
+        return values
+    
+    def get_metric_history(self, resident_id: str, metric: str, start: Optional[float] = None,
+                           end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get a resident's values of one safety metric in a time range.
+        Reads the history store if one is attached, otherwise the resident's
+        recent readings kept in memory.
+        
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            metric: One of HISTORY_METRICS.
+            start: Earliest epoch time to include.
+            end: Latest epoch time to include.
+            
+        Returns:
+            Tuple of (times, values) arrays in time order, without missing values.
+        """
+        if metric not in self.HISTORY_METRICS:
+            raise KeyError(f"Unknown metric: {metric}")
+        
+        if self.history_store is not None:
+            series = self.history_store.query(resident_id, start, end, [metric])
+            times, values = series["timestamp"], series[metric]
+        else:
+            resident = self.residents.get(resident_id)
+            readings = resident["historical_data"] if resident else []
+            times, values = [], []
+            for data in readings:
+                encoded = self.safety_metric_values(data)
+                if metric in encoded:
+                    times.append(timestamp_or_now(data.get("timestamp")))
+                    values.append(encoded[metric])
+            times = np.array(times, dtype=float)
+            values = np.array(values, dtype=float)
+            
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+            in_range = np.ones(len(times), dtype=bool)
+            if start is not None:
+                in_range &= times >= start
+            if end is not None:
+                in_range &= times <= end
+            times, values = times[in_range], values[in_range]
+        
+        present = ~np.isnan(values)
+        return times[present], values[present]
     
     def initialize_with_data(self, data: pd.DataFrame) -> None:
         """
@@ -143,7 +320,7 @@ class SafetyMonitoringAgent(Agent):
                 if "sender_id" in message:
                     response = {
                         "type": "safety_data_response",
-                        "data": self.state["latest_readings"],
+                        "data": dict(self.state["latest_readings"]),
                         "alerts": []  # Will be filled if there are any alerts
                     }
                     self.send_message(message["sender_id"], response)
@@ -157,7 +334,7 @@ class SafetyMonitoringAgent(Agent):
         """
         message = {
             "type": "safety_status",
-            "data": self.state["latest_readings"],
+            "data": dict(self.state["latest_readings"]),
             "alerts": self.state["alerts"][-5:] if self.state["alerts"] else []
         }
         self.send_message(recipient_id, message)
@@ -172,26 +349,7 @@ class SafetyMonitoringAgent(Agent):
         Returns:
             List of alert messages for concerning conditions.
         """
-        alerts = []
-        
-        # Check if a fall is detected
-        if data.get("fall_detected", False):
-            impact_level = data.get("impact_force_level", "Unknown")
-            inactivity_duration = data.get("post_fall_inactivity_duration", 0)
-            
-            if impact_level == "High" or inactivity_duration > 300:  # 5 minutes
-                alerts.append(f"CRITICAL FALL DETECTED: High impact force or prolonged inactivity ({inactivity_duration} seconds)!")
-            elif impact_level == "Medium" or inactivity_duration > 120:  # 2 minutes
-                alerts.append(f"FALL DETECTED: Medium impact force with {inactivity_duration} seconds of inactivity!")
-            else:
-                alerts.append(f"Minor fall detected: Low impact with {inactivity_duration} seconds of inactivity.")
-        
-        # Check for concerning lack of movement
-        if data.get("movement_activity", "") == "No Movement" and not data.get("fall_detected", False):
-            location = data.get("location", "Unknown")
-            alerts.append(f"Extended period of no movement detected in the {location}.")
-        
-        return alerts
+        return [message for _, _, message in self.rule_plan.evaluate(data)]
     
     def trigger_alert(self, alerts: List[str], data: Dict[str, Any]) -> None:
         """
@@ -204,25 +362,43 @@ class SafetyMonitoringAgent(Agent):
         if not alerts:
             return
             
-        # Add timestamp to the alert
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Add the time of the reading to the alert
+        timestamp = data.get("timestamp", datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
         
         # Create alert message
+        critical = any(alert.startswith("CRITICAL") for alert in alerts)
+        fall = bool(data.get("fall_detected", False))
+        alert_time = timestamp_or_now(data.get("timestamp"))
         alert_message = {
             "type": "safety_alert",
             "timestamp": timestamp,
+            "device_id": data.get("device_id"),
+            "metric": "fall" if fall else "movement",
+            "severity": "high" if critical else "medium",
             "alert_messages": alerts,
             "data": data
         }
         
-        # Store the alert
+        # Each fall is a separate incident, never a repeat of an earlier one
+        if fall:
+            alert_message["incident"] = alert_time
+        
+        # Store the alert, overall and for the resident
         self.state["alerts"].append(alert_message)
+        self.residents.partition(data.get("device_id"))["alerts"].append(alert_message)
+        self.alert_store.add(alert_message)
+        
+        # Repeats of an ongoing condition are kept but not sent on; critical
+        # alerts always are
+        if not self.alert_suppressor.check(alert_message, alert_time, urgent=critical):
+            return
         
         # Send alert through callback if available
         self.send_alert(alert_message)
         
-        # Broadcast the alert to all connected agents
-        self.broadcast_message(alert_message)
+        # Broadcast the alert to all connected agents; critical falls go in
+        # the emergency lane
+        self.broadcast_message(alert_message, Priority.EMERGENCY if critical else None)
     
     def process_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -236,6 +412,10 @@ class SafetyMonitoringAgent(Agent):
         """
         processed_data = {}
         
+        # Keep track of which resident the reading belongs to
+        if "device_id" in data:
+            processed_data["device_id"] = data["device_id"]
+        
         # Extract relevant data points
         if "Movement Activity" in data:
             processed_data["movement_activity"] = data["Movement Activity"]
@@ -258,22 +438,32 @@ class SafetyMonitoringAgent(Agent):
         else:
             processed_data["timestamp"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Update latest readings, keeping only values that are actually present
+        # Update latest readings, keeping only values that are actually present,
+        # overall and for the resident
+        resident = self.residents.partition(processed_data.get("device_id"))
         self.state["latest_readings"].update(processed_data)
+        resident["latest_readings"].update(processed_data)
         
         # Add to historical data (limited to last 100 readings)
         self.state["historical_data"].append(processed_data)
-        if len(self.state["historical_data"]) > 100:
-            self.state["historical_data"] = self.state["historical_data"][-100:]
+        resident["historical_data"].append(processed_data)
+        
+        # Keep the reading in the on-disk history
+        if self.history_store is not None:
+            self.history_store.append(processed_data.get("device_id"),
+                                      timestamp_or_now(processed_data["timestamp"]),
+                                      self.safety_metric_values(processed_data))
         
         # Store fall incidents separately
         if processed_data.get("fall_detected", False):
-            self.state["fall_incidents"].append({
+            incident = {
                 "timestamp": processed_data.get("timestamp"),
                 "impact_level": processed_data.get("impact_force_level", "Unknown"),
                 "inactivity_duration": processed_data.get("post_fall_inactivity_duration", 0),
                 "location": processed_data.get("location", "Unknown")
-            })
+            }
+            self.state["fall_incidents"].append(incident)
+            resident["fall_incidents"].append(incident)
         
         # Check for safety concerns
         alerts = self.check_safety_conditions(processed_data)
@@ -319,9 +509,10 @@ class SafetyMonitoringAgent(Agent):
         if data:
             self.process_data(data)
             
-            # Notify connected agents
+            # Notify connected agents with a snapshot of the readings, which
+            # the bus may deliver after the next reading has updated them
             self.broadcast_message({
                 "type": "safety_update",
-                "data": self.state["latest_readings"],
+                "data": dict(self.state["latest_readings"]),
                 "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }) 
\ No newline at end of file
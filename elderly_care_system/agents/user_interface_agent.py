@@ -8,6 +8,7 @@ import datetime
 import time
 
 from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.utils.ring_buffer import RingBuffer
 
 
 class UserInterfaceAgent(Agent):
@@ -31,7 +32,7 @@ class UserInterfaceAgent(Agent):
             "display_queue": [],
             "user_inputs": [],
             "active_reminders": [],
-            "active_alerts": [],
+            "active_alerts": RingBuffer(10),  # Most recent 10 alerts
             "acknowledged_reminders": [],
             "screen_content": ""
         }
@@ -249,11 +250,8 @@ class UserInterfaceAgent(Agent):
         Args:
             alert: Alert message.
         """
+        # The buffer keeps only the most recent 10 alerts
         self.state["active_alerts"].append(alert)
-        
-        # Keep only the most recent 10 alerts
-        if len(self.state["active_alerts"]) > 10:
-            self.state["active_alerts"] = self.state["active_alerts"][-10:]
     
     def add_active_reminder(self, reminder: Dict[str, Any]) -> None:
         """
@@ -0,0 +1,128 @@
+"""
+Parallel data ingestion for the Elderly Care System.
+Health readings are split by resident across worker processes, which evaluate
+their share with the health agent's batch logic. The results are merged back
+in the original row order, so the outcome does not depend on the number of
+workers.
+"""
+from typing import Dict, Any, List, Optional
+from concurrent.futures import Executor
+import numpy as np
+import pandas as pd
+
+from elderly_care_system.agents.health_monitoring_agent import HealthMonitoringAgent
+from elderly_care_system.utils.residents import resident_key, UNKNOWN_RESIDENT
+
+
+# Column identifying the resident in the datasets
+RESIDENT_COLUMN = "Device-ID/User-ID"
+
+
+def split_by_resident(df: pd.DataFrame, parts: int) -> List[np.ndarray]:
+    """
+    Split the rows of a DataFrame into balanced groups of whole residents.
+    Residents are assigned largest first to the smallest group, with ties
+    broken by order of first appearance, so the split is deterministic.
+
+    Args:
+        df: DataFrame with one reading per row.
+        parts: Maximum number of groups.
+
+    Returns:
+        Row positions of each non-empty group, in ascending order.
+    """
+    if RESIDENT_COLUMN in df.columns:
+        keys = df[RESIDENT_COLUMN].map(resident_key).to_numpy()
+    else:
+        keys = np.full(len(df), UNKNOWN_RESIDENT, dtype=object)
+
+    codes, residents = pd.factorize(keys)
+    sizes = np.bincount(codes, minlength=len(residents))
+
+    # Largest residents first; a stable sort keeps first-appearance order on ties
+    loads = [0] * max(1, min(parts, len(residents)))
+    group_of = np.zeros(len(residents), dtype=int)
+    for resident in np.argsort(-sizes, kind="stable").tolist():
+        group = loads.index(min(loads))
+        group_of[resident] = group
+        loads[group] += sizes[resident]
+
+    row_groups = group_of[codes]
+    return [np.flatnonzero(row_groups == group) for group in range(len(loads)) if loads[group]]
+
+
+def evaluate_health_partition(df: pd.DataFrame, thresholds: Dict[str, Any],
+                              residents: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Evaluate the health readings of a group of residents in a worker process.
+
+    Args:
+        df: The residents' readings, in their original order.
+        thresholds: Threshold settings of the health agent.
+        residents: Current state of the residents that already have a partition,
+            so rapid-change checks and rolling statistics continue from it.
+
+    Returns:
+        Dictionary with the readings, alerts, reading times and metric columns
+        of the group, plus the residents' updated state and analytics.
+    """
+    agent = HealthMonitoringAgent(name="Health Ingestion Worker")
+    agent.set_thresholds(thresholds)
+    agent.residents.update(residents)
+
+    n = len(df)
+    columns = agent.parse_health_frame(df)
+    records = agent.columns_to_records(columns, n)
+    alerts = agent.evaluate_health_batch(columns, n)
+    reading_times = agent.batch_reading_times(columns, n)
+
+    keys = agent.apply_resident_batch(columns, records, alerts, reading_times)
+    for data, row_alerts in zip(records, alerts):
+        agent.analytics.record(data, row_alerts)
+
+    return {
+        "records": records,
+        "alerts": alerts,
+        "reading_times": reading_times,
+        "metrics": {metric: columns[metric] for metric in agent.historical_metrics if metric in columns},
+        "residents": {key: agent.residents.get(key) for key in dict.fromkeys(keys)},
+        "analytics": agent.analytics
+    }
+
+
+def process_health_parallel(agent: HealthMonitoringAgent, csv_file: str, executor: Executor,
+                            parts: int, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Process a health CSV file with its residents spread over a process pool.
+    Leaves the agent in the same state as agent.process_csv_data.
+
+    Args:
+        agent: The health monitoring agent to update.
+        csv_file: Path to the CSV file containing health data.
+        executor: Process pool to evaluate the residents in.
+        parts: Number of groups to split the residents into.
+        df: The file's contents, if already read.
+
+    Returns:
+        DataFrame of processed health data.
+    """
+    if df is None:
+        df = pd.read_csv(csv_file)
+    agent.initialize_with_data(df)
+
+    thresholds = {key: value for key, value in agent.state.items() if key.endswith("_threshold")}
+    futures = []
+    for positions in split_by_resident(df, parts):
+        group = df.iloc[positions]
+        known = {}
+        if RESIDENT_COLUMN in group.columns:
+            for device_id in group[RESIDENT_COLUMN].unique():
+                if device_id in agent.residents:
+                    known[resident_key(device_id)] = agent.residents.get(device_id)
+        elif UNKNOWN_RESIDENT in agent.residents:
+            known[UNKNOWN_RESIDENT] = agent.residents.get(UNKNOWN_RESIDENT)
+        futures.append((positions, executor.submit(evaluate_health_partition, group, thresholds, known)))
+
+    # Merge in submission order so the result does not depend on scheduling
+    partitions = [(positions, future.result()) for positions, future in futures]
+    return agent.merge_health_partitions(len(df), partitions)
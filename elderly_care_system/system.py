@@ -8,10 +8,29 @@ import datetime
 import pandas as pd
 import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, Optional, List, Tuple
 
 from elderly_care_system.agents.coordinator_agent import CoordinatorAgent
+from elderly_care_system.agents.message_bus import MessageBus
+from elderly_care_system.agents.safety_monitoring_agent import SafetyMonitoringAgent
 from elderly_care_system.agents.user_interface_agent import UserInterfaceAgent
+from elderly_care_system.ingestion import process_health_parallel
+from elderly_care_system.utils.downsampling import downsample, METHODS
+from elderly_care_system.utils.event_log import EventLog
+from elderly_care_system.utils.residents import resident_key
+from elderly_care_system.utils.timestamps import parse_timestamp
+from elderly_care_system.utils.vitals_store import VitalsStore
+
+
+# Largest number of points returned for a history chart
+MAX_HISTORY_POINTS = 5000
+
+# Largest number of logged messages returned by one query
+MAX_EVENTS = 10000
+
+# Largest page of alerts returned by one query
+MAX_ALERTS = 1000
 
 
 class ElderlyCareSystem:
@@ -36,6 +55,7 @@ class ElderlyCareSystem:
 
         # Initialize threads
         self.scheduler_thread = None
+        self.reminder_thread = None
         self.ui_thread = None
 
     def _initialize_agents(self) -> None:
@@ -62,16 +82,49 @@ class ElderlyCareSystem:
 
     def connect_agents(self) -> None:
         """Connect all agents to enable communication between them."""
-        # Connect coordinator to UI agent
-        self.coordinator.connect_to_agent(self.ui)
-        self.ui.connect_to_agent(self.coordinator)
+        # Put the UI agent on the coordinator's router
+        self.ui.join_router(self.coordinator.router)
 
         # Access the specialized agents through the coordinator
         self.health_agent = self.coordinator.health_agent
         self.safety_agent = self.coordinator.safety_agent
         self.reminder_agent = self.coordinator.reminder_agent
 
-    def load_data(self, health_csv: str = None, safety_csv: str = None, reminder_csv: str = None) -> Dict[str, pd.DataFrame]:
+        # Deliver messages between the agents through per-agent mailboxes
+        self.message_bus = MessageBus()
+        for agent in [self.coordinator, self.health_agent, self.safety_agent, self.reminder_agent, self.ui]:
+            agent.attach_to_bus(self.message_bus)
+
+    def enable_history_store(self, directory: Optional[str] = None) -> None:
+        """
+        Keep the vitals and safety history and the coordinator's message log
+        on disk, so they survive restarts.
+
+        Args:
+            directory: Directory of the stores. Defaults to the "history_dir" setting.
+        """
+        directory = directory or self.config["history_dir"]
+
+        health_dir = os.path.join(directory, "health")
+        store = self.health_agent.history_store
+        if store is None or store.directory != health_dir:
+            self.health_agent.attach_history_store(VitalsStore(health_dir))
+
+        safety_dir = os.path.join(directory, "safety")
+        store = self.safety_agent.history_store
+        if store is None or store.directory != safety_dir:
+            self.safety_agent.attach_history_store(
+                VitalsStore(safety_dir, SafetyMonitoringAgent.HISTORY_METRICS))
+
+        events_dir = os.path.join(directory, "events")
+        event_log = self.coordinator.event_log
+        if event_log is None or event_log.directory != events_dir:
+            if event_log is not None:
+                event_log.close()
+            self.coordinator.attach_event_log(EventLog(events_dir))
+
+    def load_data(self, health_csv: str = None, safety_csv: str = None, reminder_csv: str = None,
+                  parallel: Optional[bool] = None, max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
         """
         Load data from CSV files and process with the specialized agents.
 
@@ -79,6 +132,12 @@ class ElderlyCareSystem:
             health_csv: Path to the health monitoring CSV file.
             safety_csv: Path to the safety monitoring CSV file.
             reminder_csv: Path to the daily reminder CSV file.
+            parallel: If True, evaluate the health data of different residents
+                in worker processes. The safety and reminder files are only
+                read in the pool; their agents are initialized in this
+                process. Defaults to the "parallel_ingestion" setting.
+            max_workers: Number of worker processes. Defaults to the
+                "ingestion_workers" setting, or the number of CPUs.
 
         Returns:
             Dictionary of DataFrames with the processed data.
@@ -87,6 +146,11 @@ class ElderlyCareSystem:
         results = {}
         data_errors = []
 
+        if parallel is None:
+            parallel = self.config.get("parallel_ingestion", False)
+        if max_workers is None:
+            max_workers = self.config.get("ingestion_workers") or os.cpu_count() or 1
+
         # Find CSV files if not provided
         if not health_csv and not safety_csv and not reminder_csv:
             # Try to find the files in the Dataset directory
@@ -101,20 +165,25 @@ class ElderlyCareSystem:
                     elif "reminder" in filename.lower() or "daily" in filename.lower():
                         reminder_csv = os.path.join(dataset_dir, filename)
 
+        # Read the safety and reminder files in the pool while the health data is
+        # processed; only the health data is evaluated in the workers
+        executor = ProcessPoolExecutor(max_workers) if parallel else None
+        frames = {}
+        if executor:
+            for kind, csv_file in [("safety", safety_csv), ("reminder", reminder_csv)]:
+                if csv_file and os.path.exists(csv_file):
+                    frames[kind] = executor.submit(pd.read_csv, csv_file)
+
         # Process health data
         if health_csv and os.path.exists(health_csv):
             try:
                 print(f"Processing health data from {health_csv}...")
-                results["health"] = self.coordinator.process_health_data(
-                    health_csv)
-
-                # Store all health data in the database
-                if isinstance(results["health"], pd.DataFrame):
-                    for _, row in results["health"].iterrows():
-                        try:
-                            data = self.health_agent.row_to_dict(row)
-                        except Exception as e:
-                            print(f"Error storing health row: {str(e)}")
+                if executor:
+                    results["health"] = process_health_parallel(
+                        self.health_agent, health_csv, executor, max_workers)
+                else:
+                    results["health"] = self.coordinator.process_health_data(
+                        health_csv)
             except Exception as e:
                 error_msg = f"Error processing health data: {str(e)}"
                 print(error_msg)
@@ -127,16 +196,12 @@ class ElderlyCareSystem:
         if safety_csv and os.path.exists(safety_csv):
             try:
                 print(f"Processing safety data from {safety_csv}...")
-                results["safety"] = self.coordinator.process_safety_data(
-                    safety_csv)
-
-                # Store all safety data in the database
-                if isinstance(results["safety"], pd.DataFrame):
-                    for _, row in results["safety"].iterrows():
-                        try:
-                            data = self.safety_agent.row_to_dict(row)
-                        except Exception as e:
-                            print(f"Error storing safety row: {str(e)}")
+                if "safety" in frames:
+                    results["safety"] = frames["safety"].result()
+                    self.safety_agent.initialize_with_data(results["safety"])
+                else:
+                    results["safety"] = self.coordinator.process_safety_data(
+                        safety_csv)
             except Exception as e:
                 error_msg = f"Error processing safety data: {str(e)}"
                 print(error_msg)
@@ -149,16 +214,12 @@ class ElderlyCareSystem:
         if reminder_csv and os.path.exists(reminder_csv):
             try:
                 print(f"Processing reminder data from {reminder_csv}...")
-                results["reminder"] = self.coordinator.process_reminder_data(
-                    reminder_csv)
-
-                # Store all reminder data in the database
-                if isinstance(results["reminder"], pd.DataFrame):
-                    for _, row in results["reminder"].iterrows():
-                        try:
-                            data = self.reminder_agent.row_to_dict(row)
-                        except Exception as e:
-                            print(f"Error storing reminder row: {str(e)}")
+                if "reminder" in frames:
+                    results["reminder"] = frames["reminder"].result()
+                    self.reminder_agent.initialize_with_data(results["reminder"])
+                else:
+                    results["reminder"] = self.coordinator.process_reminder_data(
+                        reminder_csv)
             except Exception as e:
                 error_msg = f"Error processing reminder data: {str(e)}"
                 print(error_msg)
@@ -167,6 +228,9 @@ class ElderlyCareSystem:
             print("Reminder data file not found or specified.")
             self._create_dummy_reminder_data()
 
+        if executor:
+            executor.shutdown()
+
         # Report errors to UI if available
         if data_errors and hasattr(self, 'ui') and self.ui:
             for error in data_errors:
@@ -234,6 +298,11 @@ class ElderlyCareSystem:
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop)
         self.scheduler_thread.daemon = True
         self.scheduler_thread.start()
+
+        # Reminders are triggered by their own thread as they fall due
+        self.reminder_thread = threading.Thread(target=self._reminder_loop)
+        self.reminder_thread.daemon = True
+        self.reminder_thread.start()
         print("Scheduler started.")
 
     def _scheduler_loop(self) -> None:
@@ -255,6 +324,20 @@ class ElderlyCareSystem:
                 print(error_msg)
                 time.sleep(5)  # Sleep a bit on error to avoid tight loop
 
+    def _reminder_loop(self) -> None:
+        """Internal loop triggering reminders when they fall due."""
+        schedule = self.reminder_agent.schedule
+        while not self.stop_requested:
+            try:
+                # Sleep until the next reminder is due or an earlier one is added
+                schedule.wait_due()
+                if not self.stop_requested:
+                    self.coordinator.dispatch_due_reminders()
+            except Exception as e:
+                error_msg = f"Error in reminder loop: {str(e)}"
+                print(error_msg)
+                time.sleep(5)  # Sleep a bit on error to avoid tight loop
+
     def start_ui(self) -> None:
         """Start the user interface loop in a separate thread."""
         if self.ui_thread and self.ui_thread.is_alive():
@@ -294,6 +377,16 @@ class ElderlyCareSystem:
             return False, f"Cannot start system due to critical errors: {error_msg}"
 
         try:
+            # Keep the vitals history on disk if configured
+            if self.config.get("history_dir"):
+                self.enable_history_store()
+
+            # Apply the configured alert suppression windows
+            suppressor = self.coordinator.alert_suppressor
+            for key in ["suppress_seconds", "renotify_seconds"]:
+                if f"alert_{key}" in self.config:
+                    setattr(suppressor, key, self.config[f"alert_{key}"])
+
             # Load data
             try:
                 self.load_data()
@@ -302,6 +395,10 @@ class ElderlyCareSystem:
                 print(error_msg)
                 # Continue despite data errors
 
+            # Deliver agent messages asynchronously from now on, once the
+            # initial load has been handled
+            self.message_bus.start()
+
             # Start the system components
             try:
                 # Start the scheduler
@@ -353,9 +450,24 @@ class ElderlyCareSystem:
             if self.scheduler_thread and self.scheduler_thread.is_alive():
                 self.scheduler_thread.join(timeout=5)
 
+            if self.reminder_thread and self.reminder_thread.is_alive():
+                self.reminder_agent.schedule.wake()
+                self.reminder_thread.join(timeout=5)
+
             if self.ui_thread and self.ui_thread.is_alive():
                 self.ui_thread.join(timeout=5)
 
+            # Handle the messages still in the agents' mailboxes
+            self.message_bus.stop(timeout=5)
+
+            # Write any buffered history
+            for agent in [self.health_agent, self.safety_agent]:
+                if agent and agent.history_store:
+                    agent.history_store.close()
+            if self.coordinator.event_log:
+                self.coordinator.event_log.close()
+                self.coordinator.event_log = None
+
             self.running = False
 
             return True, "System stopped successfully."
@@ -420,6 +532,8 @@ class ElderlyCareSystem:
             "initialization_errors": self.initialization_errors,
             "start_time": None,
             "last_heartbeat": None,
+            "mailboxes": self.message_bus.stats(),
+            "alert_suppression": self.coordinator.alert_suppressor.stats()
         }
         return status
 
@@ -450,50 +564,278 @@ class ElderlyCareSystem:
 
         print("Simulation complete!")
 
-    def get_health_data(self) -> Dict[str, Any]:
+    def list_residents(self) -> List[str]:
+        """
+        Get the IDs of all residents known to the agents.
+
+        Returns:
+            Sorted list of Device-ID/User-ID values.
+        """
+        residents = set()
+        for agent in [self.health_agent, self.safety_agent, self.reminder_agent]:
+            if agent:
+                residents.update(agent.residents.ids())
+        return sorted(residents)
+
+    def get_health_data(self, resident_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get the latest health data.
 
+        Args:
+            resident_id: Optional resident to get the data of. Defaults to all residents.
+
         Returns:
             Dictionary with the latest health readings and alerts.
         """
         if not self.health_agent:
             return {"error": "Health agent not initialized"}
 
+        if resident_id is not None:
+            return self.health_agent.get_resident_summary(resident_id) or {
+                "error": f"Unknown resident: {resident_id}"
+            }
+
         return {
             "latest_readings": self.health_agent.state.get("latest_readings", {}),
             # Last 5 alerts
             "alerts": self.health_agent.state.get("alerts", [])[-5:]
         }
 
-    def get_safety_data(self) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_time_range(start: Any, end: Any) -> Any:
+        """
+        Convert the bounds of a time range to epoch seconds.
+
+        Args:
+            start: Start of the range, as epoch seconds, a timestamp string or None.
+            end: End of the range, as epoch seconds, a timestamp string or None.
+
+        Returns:
+            List of [start, end] with None for open bounds, or an error message.
+        """
+        bounds = []
+        for value in [start, end]:
+            if value is None or value == "":
+                bounds.append(None)
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                pass
+            parsed = parse_timestamp(value)
+            if parsed is None:
+                return f"Invalid time: {value}"
+            bounds.append(parsed)
+        return bounds
+
+    def get_alerts(self, resident_id: Optional[str] = None, severity: Optional[str] = None,
+                   metric: Optional[str] = None, alert_type: Optional[str] = None, since: Any = None,
+                   until: Any = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """
+        Get a page of alerts matching the given filters, newest first.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            severity: Severity, e.g. "high".
+            metric: Metric of the alert, e.g. "oxygen_level" or "fall".
+            alert_type: Message type, e.g. "health_alert" or "safety_alert".
+            since: Earliest time to include, as epoch seconds or a timestamp string.
+            until: Latest time to include, as epoch seconds or a timestamp string.
+            limit: Maximum number of alerts to return.
+            offset: Number of matching alerts to skip.
+
+        Returns:
+            Dictionary with the total number of matches, the page of alerts and
+            the alert counts per severity, or an error.
+        """
+        bounds = self._parse_time_range(since, until)
+        if isinstance(bounds, str):
+            return {"error": bounds}
+
+        store = self.coordinator.alert_store
+        limit = max(1, min(int(limit), MAX_ALERTS))
+        result = store.query(resident_id or None, severity or None, metric or None, alert_type or None,
+                             bounds[0], bounds[1], limit, max(0, int(offset)))
+        result["severity_counts"] = store.counts_by("severity", alert_type or None)
+        return result
+
+    def get_alert_conditions(self, resident_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the ongoing alert conditions, whose repeated alerts are suppressed.
+
+        Args:
+            resident_id: Optional resident to get the conditions of. Defaults to all residents.
+
+        Returns:
+            Dictionary with the ongoing conditions, most recently alerted first,
+            and the suppression statistics.
+        """
+        suppressor = self.coordinator.alert_suppressor
+        conditions = suppressor.ongoing(resident_id or None)
+        return {
+            "count": len(conditions),
+            "conditions": conditions,
+            "stats": suppressor.stats()
+        }
+
+    def get_events(self, start: Any = None, end: Any = None, types: Optional[List[str]] = None,
+                   limit: int = 1000) -> Dict[str, Any]:
+        """
+        Get messages logged by the coordinator in a time range.
+
+        Args:
+            start: Earliest time to include, as epoch seconds or a timestamp string.
+            end: Latest time to include, as epoch seconds or a timestamp string.
+            types: Message types to include; defaults to all types.
+            limit: Maximum number of messages to return.
+
+        Returns:
+            Dictionary with the events, oldest first, or an error.
+        """
+        bounds = self._parse_time_range(start, end)
+        if isinstance(bounds, str):
+            return {"error": bounds}
+
+        limit = max(1, min(int(limit), MAX_EVENTS))
+        events = self.coordinator.query_events(bounds[0], bounds[1], types or None, limit)
+        return {
+            "start": bounds[0],
+            "end": bounds[1],
+            "types": types or [],
+            "persistent": self.coordinator.event_log is not None,
+            "count": len(events),
+            "events": events
+        }
+
+    def _get_history(self, agent: Any, resident_id: Optional[str], metric: str, start: Any, end: Any,
+                     max_points: int, method: str) -> Dict[str, Any]:
+        """
+        Get a downsampled time series of one metric of a resident.
+
+        Args:
+            agent: The agent keeping the history.
+            resident_id: The resident's Device-ID/User-ID.
+            metric: The metric to get.
+            start: Earliest time to include, as epoch seconds or a timestamp string.
+            end: Latest time to include, as epoch seconds or a timestamp string.
+            max_points: Maximum number of points to return.
+            method: Downsampling method, "lttb" or "minmax".
+
+        Returns:
+            Dictionary with the series, or an error.
+        """
+        if not resident_id:
+            return {"error": "No resident given"}
+        if method not in METHODS:
+            return {"error": f"Unknown downsampling method: {method}"}
+
+        bounds = self._parse_time_range(start, end)
+        if isinstance(bounds, str):
+            return {"error": bounds}
+
+        try:
+            times, values = agent.get_metric_history(resident_id, metric, bounds[0], bounds[1])
+        except KeyError as e:
+            return {"error": e.args[0]}
+
+        total_points = len(times)
+        max_points = max(3, min(int(max_points), MAX_HISTORY_POINTS))
+        times, values = downsample(times, values, max_points, method)
+        return {
+            "resident_id": resident_key(resident_id),
+            "metric": metric,
+            "start": bounds[0],
+            "end": bounds[1],
+            "method": method,
+            "total_points": total_points,
+            "timestamps": times.tolist(),
+            "values": values.tolist()
+        }
+
+    def get_health_history(self, resident_id: Optional[str], metric: str, start: Any = None, end: Any = None,
+                           max_points: int = 500, method: str = "lttb") -> Dict[str, Any]:
+        """
+        Get a downsampled time series of one vital sign of a resident.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            metric: The vital sign, e.g. "heartrate".
+            start: Earliest time to include, as epoch seconds or a timestamp string.
+            end: Latest time to include, as epoch seconds or a timestamp string.
+            max_points: Maximum number of points to return.
+            method: Downsampling method, "lttb" or "minmax".
+
+        Returns:
+            Dictionary with the series, or an error.
+        """
+        if not self.health_agent:
+            return {"error": "Health agent not initialized"}
+        return self._get_history(self.health_agent, resident_id, metric, start, end, max_points, method)
+
+    def get_safety_history(self, resident_id: Optional[str], metric: str, start: Any = None, end: Any = None,
+                           max_points: int = 500, method: str = "minmax") -> Dict[str, Any]:
+        """
+        Get a downsampled time series of one safety metric of a resident.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            metric: One of SafetyMonitoringAgent.HISTORY_METRICS.
+            start: Earliest time to include, as epoch seconds or a timestamp string.
+            end: Latest time to include, as epoch seconds or a timestamp string.
+            max_points: Maximum number of points to return.
+            method: Downsampling method; defaults to "minmax" so no fall is hidden.
+
+        Returns:
+            Dictionary with the series, or an error.
+        """
+        if not self.safety_agent:
+            return {"error": "Safety agent not initialized"}
+        return self._get_history(self.safety_agent, resident_id, metric, start, end, max_points, method)
+
+    def get_safety_data(self, resident_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get the latest safety data.
 
+        Args:
+            resident_id: Optional resident to get the data of. Defaults to all residents.
+
         Returns:
             Dictionary with the latest safety readings and alerts.
         """
         if not self.safety_agent:
             return {"error": "Safety agent not initialized"}
 
+        if resident_id is not None:
+            return self.safety_agent.get_resident_summary(resident_id) or {
+                "error": f"Unknown resident: {resident_id}"
+            }
+
         return {
             "latest_readings": self.safety_agent.state.get("latest_readings", {}),
             # Last 5 alerts
             "alerts": self.safety_agent.state.get("alerts", [])[-5:]
         }
 
-    def get_reminders(self) -> Dict[str, Any]:
+    def get_reminders(self, resident_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get active reminders.
 
+        Args:
+            resident_id: Optional resident to get the reminders of. Defaults to all residents.
+
         Returns:
             Dictionary with active and completed reminders.
         """
         if not self.reminder_agent:
             return {"error": "Reminder agent not initialized"}
 
+        if resident_id is not None:
+            return self.reminder_agent.get_resident_reminders(resident_id) or {
+                "error": f"Unknown resident: {resident_id}"
+            }
+
         return {
-            "active_reminders": self.reminder_agent.state.get("active_reminders", []),
+            "active_reminders": list(self.reminder_agent.state.get("active_reminders", [])),
             # Last 10 completed
             "completed_reminders": self.reminder_agent.state.get("completed_reminders", [])[-10:]
         }
@@ -0,0 +1,42 @@
+"""
+Tests for the indexed alert store and the alerts the agents put in it.
+"""
+from elderly_care_system.agents.safety_monitoring_agent import SafetyMonitoringAgent
+from elderly_care_system.utils.alert_store import AlertStore
+from elderly_care_system.utils.timestamps import parse_timestamp
+
+
+def alert(resident, severity, timestamp, metric="heartrate"):
+    return {"type": "health_alert", "device_id": resident, "severity": severity, "metric": metric,
+            "timestamp": timestamp}
+
+
+def test_filters_match_a_full_scan():
+    store = AlertStore()
+    alerts = [
+        alert(f"D{i % 3}", ("low", "medium", "high")[i % 4 % 3], f"2026-10-01 {i % 24:02d}:{i % 60:02d}:00")
+        for i in range(200)
+    ]
+    store.extend(alerts)
+
+    since = parse_timestamp("2026-10-01 05:00:00")
+    until = parse_timestamp("2026-10-01 12:30:00")
+    expected = [
+        a for a in alerts
+        if a["device_id"] == "D1" and a["severity"] == "high" and since <= parse_timestamp(a["timestamp"]) <= until
+    ]
+    assert store.count(resident="D1", severity="high", since=since, until=until) == len(expected)
+    page = store.query(resident="D1", severity="high", since=since, until=until, limit=len(alerts))
+    assert page["total"] == len(expected)
+    assert sorted(map(id, page["alerts"])) == sorted(map(id, expected))
+
+
+def test_safety_alerts_are_stored_at_the_reading_time():
+    agent = SafetyMonitoringAgent()
+    agent.alert_store = AlertStore()
+    agent.process_data({"device_id": "D1", "Fall Detected": True, "Impact Force Level": "High",
+                        "Post-Fall Inactivity Duration": 30, "timestamp": "2026-01-15 08:30:00"})
+
+    morning = parse_timestamp("2026-01-15 08:00:00")
+    assert agent.alert_store.count(since=morning, until=morning + 3600) == 1
+    assert agent.alert_store.query(since=morning)["alerts"][0]["timestamp"] == "2026-01-15 08:30:00"
@@ -0,0 +1,90 @@
+"""
+Tests for alert deduplication and its use by the safety agent.
+"""
+from elderly_care_system.agents.coordinator_agent import CoordinatorAgent
+from elderly_care_system.utils.alert_suppression import AlertSuppressor
+
+
+def alert(severity="medium", **fields):
+    return {"device_id": "D1", "metric": "heartrate", "condition": "high", "severity": severity, **fields}
+
+
+def test_repeats_are_suppressed_within_window_and_renotified():
+    suppressor = AlertSuppressor(suppress_seconds=900, renotify_seconds=3600)
+    times = [0, 60, 120, 1100, 1200, 2000, 2800, 3600, 4400, 4700, 4800]
+    published = [suppressor.check(alert(), t) for t in times]
+    # A gap over 900 s starts a new condition at 1100 s, which is published
+    # again 3600 s later, at 4700 s
+    assert published == [True, False, False, True, False, False, False, False, False, True, False]
+    assert suppressor.stats()["suppressed"] == 8
+
+
+def test_renotify_interval_and_escalation():
+    suppressor = AlertSuppressor(suppress_seconds=900, renotify_seconds=600)
+    assert suppressor.check(alert(), 0)
+    assert not suppressor.check(alert(), 300)
+    assert suppressor.check(alert(), 600)
+    assert suppressor.check(alert("high"), 700)
+    assert not suppressor.check(alert("high"), 800)
+
+
+def test_critical_and_urgent_alerts_are_never_suppressed():
+    suppressor = AlertSuppressor()
+    assert all(suppressor.check(alert("critical"), t) for t in (0, 10, 20))
+    assert suppressor.check(alert(condition="low"), 30)
+    assert suppressor.check(alert(condition="low"), 40, urgent=True)
+    assert not suppressor.check(alert(condition="low"), 50)
+
+
+def test_incidents_are_separate_conditions():
+    suppressor = AlertSuppressor()
+    assert suppressor.check(alert(metric="fall", incident=0), 0)
+    assert suppressor.check(alert(metric="fall", incident=60), 60)
+    assert not suppressor.check(alert(metric="fall", incident=60), 61)
+    assert len(suppressor.ongoing("D1")) == 2
+
+
+def fall_reading(timestamp, impact="High"):
+    return {"device_id": "D1", "Fall Detected": True, "Impact Force Level": impact,
+            "Post-Fall Inactivity Duration": 30, "Location": "Kitchen", "timestamp": timestamp}
+
+
+def received_safety_alerts(coordinator):
+    received = []
+    handle = coordinator.handle_safety_alert
+    coordinator.handle_safety_alert = lambda message: (received.append(message), handle(message))
+    return received
+
+
+def test_two_falls_a_minute_apart_both_reach_the_coordinator():
+    coordinator = CoordinatorAgent()
+    received = received_safety_alerts(coordinator)
+
+    coordinator.safety_agent.process_data(fall_reading("2026-10-01 10:00:00"))
+    coordinator.safety_agent.process_data(fall_reading("2026-10-01 10:01:00"))
+
+    assert len(received) == 2
+    assert coordinator.state["emergency_mode"]
+
+
+def test_minor_falls_a_minute_apart_both_reach_the_coordinator():
+    coordinator = CoordinatorAgent()
+    received = received_safety_alerts(coordinator)
+
+    coordinator.safety_agent.process_data(fall_reading("2026-10-01 10:00:00", "Low"))
+    coordinator.safety_agent.process_data(fall_reading("2026-10-01 10:01:00", "Low"))
+
+    assert len(received) == 2
+
+
+def test_ongoing_lack_of_movement_is_published_once():
+    coordinator = CoordinatorAgent()
+    received = received_safety_alerts(coordinator)
+
+    for minute in range(10):
+        coordinator.safety_agent.process_data({
+            "device_id": "D1", "Fall Detected": False, "Movement Activity": "No Movement",
+            "Location": "Bedroom", "timestamp": f"2026-10-01 10:{minute:02d}:00"
+        })
+
+    assert len(received) == 1
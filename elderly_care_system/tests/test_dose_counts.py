@@ -0,0 +1,31 @@
+"""
+Tests for the daily dose counts.
+"""
+import datetime
+
+from elderly_care_system.utils.dose_counts import DailyDoseCounts, compliance_rate
+
+
+def test_windows_and_trend_count_doses_per_day():
+    counts = DailyDoseCounts()
+    end = datetime.date(2025, 3, 31)
+    doses = [(0, "taken"), (0, "missed"), (1, "taken"), (6, "taken"), (7, "missed"), (40, "taken")]
+    for days_ago, status in doses:
+        counts.add(end - datetime.timedelta(days=days_ago), status)
+
+    assert len(counts) == 5
+    assert counts.totals(end, 1) == (1, 1)
+    assert counts.totals(end, 7) == (3, 1)
+    assert counts.window(end, 8) == {"taken": 3, "missed": 2, "compliance_rate": 60.0}
+    assert counts.window(end, 90)["taken"] == 4
+    assert counts.window(end - datetime.timedelta(days=50), 7)["compliance_rate"] is None
+
+    trend = counts.trend(end, 3)
+    assert [day["date"] for day in trend] == ["2025-03-29", "2025-03-30", "2025-03-31"]
+    assert [(day["taken"], day["missed"]) for day in trend] == [(0, 0), (1, 0), (1, 1)]
+    assert [day["compliance_rate"] for day in trend] == [None, 100.0, 50.0]
+
+
+def test_compliance_rate():
+    assert compliance_rate(3, 1) == 75.0
+    assert compliance_rate(0, 0) is None
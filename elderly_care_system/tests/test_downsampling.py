@@ -0,0 +1,55 @@
+"""
+Tests for the downsampling of time series.
+"""
+import numpy as np
+import pytest
+
+from elderly_care_system.utils.downsampling import downsample, lttb, min_max
+
+
+def series(n):
+    times = np.arange(n, dtype=float) * 60
+    values = np.sin(times / 3000) * 20 + 80
+    return times, values
+
+
+@pytest.mark.parametrize("n, max_points", [(1000, 100), (1000, 3), (101, 100), (5000, 777)])
+def test_lttb_keeps_the_point_count_and_endpoints(n, max_points):
+    times, values = series(n)
+    kept_times, kept_values = lttb(times, values, max_points)
+
+    assert len(kept_times) == len(kept_values) == max_points
+    assert kept_times[0] == times[0] and kept_times[-1] == times[-1]
+    assert np.all(np.diff(kept_times) > 0)
+    assert set(kept_times.tolist()) <= set(times.tolist())
+
+
+def test_short_series_are_returned_unchanged():
+    times, values = series(50)
+    for method in ("lttb", "minmax"):
+        kept_times, kept_values = downsample(times, values, 50, method)
+        assert np.array_equal(kept_times, times) and np.array_equal(kept_values, values)
+
+    kept_times, _ = lttb(times, values, 2)
+    assert kept_times.tolist() == [times[0], times[-1]]
+
+
+@pytest.mark.parametrize("n, max_points", [(1000, 100), (1001, 99), (10, 4)])
+def test_min_max_keeps_every_spike(n, max_points):
+    times, values = series(n)
+    values = values.copy()
+    # At most one spike per bucket, since a bucket keeps one maximum
+    spikes = np.linspace(0, n - 1, min(5, max_points // 2)).astype(int)
+    values[spikes] = 500.0
+
+    kept_times, kept_values = min_max(times, values, max_points)
+    assert len(kept_times) <= max_points
+    assert np.all(np.diff(kept_times) > 0)
+    assert set(times[spikes].tolist()) <= set(kept_times.tolist())
+    assert kept_values.max() == values.max() and kept_values.min() == values.min()
+
+
+def test_unknown_method_is_rejected():
+    times, values = series(10)
+    with pytest.raises(ValueError):
+        downsample(times, values, 5, "average")
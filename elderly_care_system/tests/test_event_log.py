@@ -0,0 +1,60 @@
+"""
+Tests for the segmented event log.
+"""
+import os
+
+from elderly_care_system.utils.event_log import EventLog
+
+
+def fill(log, count, start=1000.0):
+    for index in range(count):
+        log.append("alert" if index % 3 == 0 else "status", {"index": index}, start + index)
+
+
+def test_queries_across_segments_match_a_full_scan(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=2000, index_interval=4)
+    fill(log, 300)
+    assert log.stats()["segments"] > 5 and log.stats()["events"] == 300
+
+    events = list(log.query())
+    assert [event["data"]["index"] for event in events] == list(range(300))
+    for start, end in ((1000, 1000), (1010.5, 1100), (1150, None), (None, 1003), (2000, 3000)):
+        expected = [event for event in events if (start is None or event["time"] >= start)
+                    and (end is None or event["time"] <= end)]
+        assert list(log.query(start, end)) == expected
+    assert [event["data"]["index"] for event in log.query(1000, 1010, types=["alert"])] == [0, 3, 6, 9]
+    assert len(list(log.query(limit=7))) == 7
+    log.close()
+
+
+def test_times_never_go_backwards(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.append("status", {}, 100.0)
+    assert log.append("status", {}, 50.0) == 100.0
+    log.close()
+
+
+def test_reopening_drops_an_event_cut_off_by_a_crash(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=2000, index_interval=4)
+    fill(log, 100)
+    log.close()
+
+    last = sorted(name for name in os.listdir(tmp_path) if name.endswith(".log"))[-1]
+    path = os.path.join(tmp_path, last)
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b'{"time":2000.0,"type":"status","da')
+
+    reopened = EventLog(str(tmp_path), segment_bytes=2000, index_interval=4)
+    assert os.path.getsize(path) == size
+    assert reopened.stats()["events"] == 100
+    assert [event["data"]["index"] for event in reopened.query(1095)] == [95, 96, 97, 98, 99]
+
+    # Appends continue after the last complete event
+    reopened.append("status", {"index": 100}, 1100.0, durable=True)
+    assert [event["data"]["index"] for event in reopened.query(1098)] == [98, 99, 100]
+    reopened.close()
+
+    again = EventLog(str(tmp_path), segment_bytes=2000, index_interval=4)
+    assert again.stats()["events"] == 101
+    again.close()
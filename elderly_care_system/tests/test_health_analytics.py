@@ -0,0 +1,47 @@
+"""
+Tests for the running health analytics.
+"""
+import pandas as pd
+
+from elderly_care_system.agents.health_monitoring_agent import HealthMonitoringAgent
+from elderly_care_system.utils.health_analytics import HealthAnalytics
+
+
+def test_threshold_counts_follow_the_flags_of_each_metric(tmp_path):
+    flags = {
+        "Heart Rate Below/Above Threshold (Yes/No)": ["Yes", "No", "No", "No"],
+        "Blood Pressure Below/Above Threshold (Yes/No)": ["Yes", "Yes", "No", "No"],
+        "Glucose Levels Below/Above Threshold (Yes/No)": ["Yes", "Yes", "Yes", "No"],
+        "SpO₂ Below Threshold (Yes/No)": ["No", "No", "No", "Yes"],
+    }
+    csv_file = tmp_path / "health.csv"
+    pd.DataFrame({
+        "Device-ID/User-ID": ["D1", "D1", "D2", "D2"],
+        "Timestamp": ["2025-01-01 08:00:00", "2025-01-01 08:01:00", "2025-01-01 08:00:00", "2025-01-01 08:01:00"],
+        "Heart Rate": [72, 75, 80, 70],
+        "Blood Pressure": ["120/80 mmHg"] * 4,
+        "Glucose Levels": [100, 110, 120, 90],
+        "Oxygen Saturation (SpO₂%)": [97, 96, 98, 88],
+        "Alert Triggered (Yes/No)": ["No"] * 4,
+        "Caregiver Notified (Yes/No)": ["No"] * 4,
+        **flags
+    }).to_csv(csv_file, index=False)
+
+    agent = HealthMonitoringAgent()
+    summary = agent.summarize_processed_data(agent.process_csv_data(str(csv_file)))
+    exceeded = {metric: stats["threshold_exceeded"] for metric, stats in summary["metric_stats"].items()}
+    assert exceeded == {"heartrate": 1, "blood_pressure": 2, "blood_glucose": 3, "oxygen_level": 1}
+    assert summary["metric_stats"]["blood_glucose"]["percentage"] == 75.0
+    assert all(stats["total_readings"] == 4 for stats in summary["metric_stats"].values())
+
+
+def test_every_metric_has_a_flag_set_by_the_agent():
+    row = pd.Series({
+        "Heart Rate": 72, "Heart Rate Below/Above Threshold (Yes/No)": "Yes",
+        "Blood Pressure": "120/80 mmHg", "Blood Pressure Below/Above Threshold (Yes/No)": "Yes",
+        "Glucose Levels": 100, "Glucose Levels Below/Above Threshold (Yes/No)": "Yes",
+        "Oxygen Saturation (SpO₂%)": 97, "SpO₂ Below Threshold (Yes/No)": "Yes",
+    })
+    data = HealthMonitoringAgent().row_to_dict(row)
+    assert all(data[flag] is True for flag in HealthAnalytics.THRESHOLD_FLAGS.values())
+    assert HealthAnalytics.METRICS == list(HealthAnalytics.THRESHOLD_FLAGS)
@@ -0,0 +1,21 @@
+"""
+Tests for the identifier helpers.
+"""
+import re
+import uuid
+
+from elderly_care_system.utils.identifiers import uuid4_batch
+
+
+def test_uuid4_batch_generates_version_4_uuid_strings():
+    ids = uuid4_batch(1000)
+    assert len(ids) == len(set(ids)) == 1000
+    for text in ids:
+        assert re.fullmatch(r"[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}", text)
+        parsed = uuid.UUID(text)
+        assert parsed.version == 4
+        assert parsed.variant == uuid.RFC_4122
+        assert str(parsed) == text
+
+    assert uuid4_batch(0) == []
+    assert len(uuid4_batch(1)) == 1
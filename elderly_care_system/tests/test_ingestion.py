@@ -0,0 +1,74 @@
+"""
+Tests for the parallel ingestion of health data.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from elderly_care_system.agents.health_monitoring_agent import HealthMonitoringAgent
+from elderly_care_system.ingestion import split_by_resident, process_health_parallel, RESIDENT_COLUMN
+
+
+def health_frame(rows=400):
+    rng = np.random.default_rng(11)
+    yes_no = lambda: rng.choice(["Yes", "No"], rows)
+    return pd.DataFrame({
+        RESIDENT_COLUMN: [f"D{100 + int(device)}" for device in rng.integers(0, 9, rows)],
+        "Timestamp": pd.date_range("2025-01-01", periods=rows, freq="min").strftime("%Y-%m-%d %H:%M:%S"),
+        "Heart Rate": rng.integers(45, 130, rows),
+        "Heart Rate Below/Above Threshold (Yes/No)": yes_no(),
+        "Blood Pressure": [f"{s}/{d} mmHg" for s, d in zip(rng.integers(85, 165, rows), rng.integers(55, 100, rows))],
+        "Blood Pressure Below/Above Threshold (Yes/No)": yes_no(),
+        "Glucose Levels": rng.integers(60, 190, rows),
+        "Glucose Levels Below/Above Threshold (Yes/No)": yes_no(),
+        "Oxygen Saturation (SpO₂%)": rng.integers(86, 100, rows),
+        "SpO₂ Below Threshold (Yes/No)": yes_no(),
+        "Alert Triggered (Yes/No)": yes_no(),
+        "Caregiver Notified (Yes/No)": "No"
+    })
+
+
+def without_ids(alerts):
+    return [{key: value for key, value in alert.items() if key not in ("alert_id", "sender_id")}
+            for alert in alerts]
+
+
+def test_split_keeps_residents_whole_and_balanced():
+    df = health_frame()
+    groups = split_by_resident(df, 3)
+
+    assert len(groups) == 3
+    assert sorted(np.concatenate(groups).tolist()) == list(range(len(df)))
+    owners = [set(df[RESIDENT_COLUMN].iloc[group]) for group in groups]
+    assert all(not owners[i] & owners[j] for i in range(3) for j in range(i + 1, 3))
+    assert all(np.all(np.diff(group) > 0) for group in groups)
+    assert max(map(len, groups)) - min(map(len, groups)) <= df[RESIDENT_COLUMN].value_counts().max()
+
+    assert len(split_by_resident(df, 50)) == df[RESIDENT_COLUMN].nunique()
+    assert [group.tolist() for group in split_by_resident(df, 3)] == [group.tolist() for group in groups]
+
+
+def test_parallel_ingestion_matches_the_serial_path(tmp_path):
+    csv_file = tmp_path / "health.csv"
+    health_frame().to_csv(csv_file, index=False)
+
+    serial = HealthMonitoringAgent()
+    serial.update_threshold("heartrate", 95)
+    parallel = HealthMonitoringAgent()
+    parallel.update_threshold("heartrate", 95)
+
+    with ProcessPoolExecutor(2) as executor:
+        # Twice, so the second pass continues from the residents' state
+        for _ in range(2):
+            expected = serial.process_csv_data(str(csv_file))
+            result = process_health_parallel(parallel, str(csv_file), executor, 3)
+
+    assert [without_ids(alerts) for alerts in result["alerts"]] == \
+        [without_ids(alerts) for alerts in expected["alerts"]]
+    assert len(serial.state["alerts"]) > 100
+    assert without_ids(parallel.state["alerts"]) == without_ids(serial.state["alerts"])
+    assert sorted(parallel.residents.ids()) == sorted(serial.residents.ids())
+    for key in serial.residents.ids():
+        assert without_ids(parallel.residents.get(key)["alerts"]) == without_ids(serial.residents.get(key)["alerts"])
+        assert parallel.get_resident_summary(key)["health_status"] == serial.get_resident_summary(key)["health_status"]
@@ -0,0 +1,349 @@
+"""
+Tests for the medication agent.
+"""
+import datetime
+import random
+
+import pandas as pd
+
+from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.agents.medication_agent import MAX_TREND_DAYS, MedicationAgent
+
+
+class Medications(MedicationAgent):
+    """Medication agent that can be created on its own."""
+
+    def process_data(self, data):
+        return data
+
+
+class RecordingAgent(Agent):
+    """Agent that records the messages it receives."""
+
+    def __init__(self):
+        super().__init__(name="Recording Agent")
+        self.messages = []
+
+    def handle_message(self, message):
+        self.messages.append(message)
+
+    def process_data(self, data):
+        return data
+
+
+def test_dose_counts_match_a_rescan_of_the_doses():
+    agent = Medications()
+    for index in range(4):
+        agent.state["medications"][f"m{index}"] = {
+            "id": f"m{index}", "name": f"Med {index}", "current_supply": 1000, "refill_threshold": 5,
+            "patient_id": f"P{index % 2}", "compliance_rate": 100.0
+        }
+
+    generator = random.Random(7)
+    for _ in range(500):
+        medication_id = generator.choice(["m0", "m1", "m2", "m3", "unknown"])
+        timestamp = f"2025-03-{generator.randint(1, 31):02d} 08:00:00"
+        if generator.random() < 0.7:
+            agent.record_medication_taken(medication_id, timestamp)
+        else:
+            agent.record_medication_missed(medication_id, timestamp)
+
+    # Count the doses again from the dose history
+    doses = agent.state["taken_doses"] + agent.state["missed_doses"]
+    rescan = {}
+    for dose in doses:
+        counts = rescan.setdefault(dose["medication_id"], {"taken": 0, "missed": 0})
+        counts[dose["status"]] += 1
+
+    assert agent.dose_counts == rescan
+    assert agent.dose_totals == {"taken": len(agent.state["taken_doses"]),
+                                 "missed": len(agent.state["missed_doses"])}
+    for medication_id, medication in agent.state["medications"].items():
+        counts = rescan.get(medication_id, {"taken": 0, "missed": 0})
+        total = counts["taken"] + counts["missed"]
+        assert medication["compliance_rate"] == (counts["taken"] / total * 100 if total else 100.0)
+
+    statistics = agent.get_medication_statistics()
+    assert statistics["total_doses_taken"] + statistics["total_doses_missed"] == len(doses)
+    assert statistics["overall_compliance_rate"] == len(agent.state["taken_doses"]) / len(doses) * 100
+
+    # The daily counts add up to the same doses
+    window = agent.get_compliance_trend(end_date="2025-03-31")["windows"]["90_day"]
+    assert (window["taken"], window["missed"]) == (agent.dose_totals["taken"], agent.dose_totals["missed"])
+    for patient_id in ["P0", "P1"]:
+        patient_doses = [dose for dose in doses
+                         if agent.state["medications"][dose["medication_id"]]["patient_id"] == patient_id]
+        window = agent.get_compliance_trend(patient_id=patient_id, end_date="2025-03-31")["windows"]["90_day"]
+        assert window["taken"] + window["missed"] == len(patient_doses)
+
+
+def request_trend(**fields):
+    """Send a compliance trend request and get the data of the reply."""
+    agent = Medications()
+    requester = RecordingAgent()
+    agent.connect_to_agent(requester)
+    agent.handle_message({"type": "request_compliance_trend", "sender_id": requester.agent_id, **fields})
+    assert [message["type"] for message in requester.messages] == ["compliance_trend"]
+    return requester.messages[0]["data"]
+
+
+def test_compliance_trend_request_is_validated_and_clamped():
+    assert len(request_trend(days="7", end_date="2025-03-31")["trend"]) == 7
+    assert len(request_trend(days=10 ** 9, end_date="2025-03-31")["trend"]) == MAX_TREND_DAYS
+    assert len(request_trend(days=-5, end_date="2025-03-31")["trend"]) == 1
+
+    assert request_trend(days="week") == {"error": "Invalid number of days: week"}
+    assert request_trend(days=None) == {"error": "Invalid number of days: None"}
+    assert request_trend(end_date="31/03/2025") == {"error": "Invalid end date: 31/03/2025"}
+    assert request_trend(end_date=20250331) == {"error": "Invalid end date: 20250331"}
+
+
+def scheduled(*time_keys):
+    """Get an agent with one medication at each of the given times."""
+    agent = Medications()
+    agent.state["schedule"] = {
+        time_key: [{"medication_id": f"m{index}", "name": f"Med {index}", "dosage": "1 tablet", "instructions": ""}]
+        for index, time_key in enumerate(time_keys)
+    }
+    agent.index_schedule()
+    return agent
+
+
+def due_within_an_hour(agent, now):
+    """Find the slots due in the next hour with the old rule, now <= med_time <= now + 1 hour."""
+    slots = []
+    for day in [now.date(), now.date() + datetime.timedelta(days=1)]:
+        for time_key in agent.state["schedule"]:
+            hours, minutes = map(int, time_key.split(":"))
+            med_time = datetime.datetime.combine(day, datetime.time(hours, minutes))
+            if now <= med_time <= now + datetime.timedelta(hours=1):
+                slots.append((med_time, time_key))
+    return sorted(slots)
+
+
+def test_upcoming_slots_match_the_hourly_rule():
+    agent = scheduled("08:00", "09:00", "09:01", "23:45", "00:00", "00:30", "12:00")
+    day = datetime.datetime(2025, 3, 31)
+    times = [
+        day.replace(hour=8),                             # slot due right now
+        day.replace(hour=8, second=1),                   # a second after a slot
+        day.replace(hour=8, minute=1),                   # next slot exactly an hour ahead
+        day.replace(hour=7, minute=59, second=59),
+        day.replace(hour=23, minute=30),                 # wraps past midnight
+        day.replace(hour=23, minute=59, second=59, microsecond=999999),
+        day,
+    ]
+    for now in times:
+        assert agent.upcoming_slots(now, within=datetime.timedelta(hours=1)) == due_within_an_hour(agent, now)
+
+    assert agent.upcoming_slots(day.replace(hour=23, minute=30), within=datetime.timedelta(hours=1)) == [
+        (day.replace(hour=23, minute=45), "23:45"),
+        (day.replace(day=1, month=4), "00:00"),
+        (day.replace(day=1, month=4, minute=30), "00:30"),
+    ]
+
+
+def test_upcoming_slots_look_a_day_ahead_once():
+    agent = scheduled("08:00", "20:00", "00:00")
+    now = datetime.datetime(2025, 3, 31, 12, 0)
+    assert agent.upcoming_slots(now) == [
+        (datetime.datetime(2025, 3, 31, 20, 0), "20:00"),
+        (datetime.datetime(2025, 4, 1, 0, 0), "00:00"),
+        (datetime.datetime(2025, 4, 1, 8, 0), "08:00"),
+    ]
+    assert agent.upcoming_slots(now, count=2) == agent.upcoming_slots(now)[:2]
+
+    # A slot at the current minute is due today, not again tomorrow
+    now = datetime.datetime(2025, 3, 31, 8, 0)
+    assert [key for _, key in agent.upcoming_slots(now)] == ["08:00", "20:00", "00:00"]
+
+
+class LateEvening(datetime.datetime):
+    """Datetime whose current time is 23:30 on 31 March 2025."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 3, 31, 23, 30)
+
+
+def test_next_doses_wrap_to_tomorrow(monkeypatch):
+    monkeypatch.setattr(datetime, "datetime", LateEvening)
+    agent = scheduled("00:00", "23:30", "08:00", "23:29")
+    doses = agent.get_next_doses(count=3)
+    assert [(dose["name"], dose["scheduled_time"]) for dose in doses] == [
+        ("Med 1", "2025-03-31 23:30:00"),
+        ("Med 0", "2025-04-01 00:00:00"),
+        ("Med 2", "2025-04-01 08:00:00"),
+    ]
+    assert len(agent.get_next_doses(count=10)) == 4
+    assert agent.get_next_doses(count=10)[-1]["scheduled_time"] == "2025-04-01 23:29:00"
+
+
+def test_daily_schedule_returns_a_copy():
+    agent = scheduled("20:00", "08:00")
+    schedule = agent.get_daily_schedule("2025-03-31")
+    assert list(schedule) == ["08:00", "20:00"]
+    assert schedule["08:00"][0]["scheduled_time"] == "2025-03-31 08:00"
+
+    schedule["08:00"][0]["name"] = "Changed"
+    schedule["20:00"].clear()
+    del schedule["08:00"]
+    assert agent.get_daily_schedule("2025-03-31") == {
+        "08:00": [{"id": "m1", "name": "Med 1", "dosage": "1 tablet", "instructions": "",
+                   "scheduled_time": "2025-03-31 08:00"}],
+        "20:00": [{"id": "m0", "name": "Med 0", "dosage": "1 tablet", "instructions": "",
+                   "scheduled_time": "2025-03-31 20:00"}],
+    }
+
+
+def medication_catalog():
+    """Get an agent with medications of different supplies and schedules."""
+    agent = Medications()
+    agent.initialize_with_data(pd.DataFrame({
+        "Medication Name": ["Twice", "Low", "Unscheduled", "Thrice"],
+        "Time of Day": ["8:00 AM, 8:00 PM", "9:00 AM", None, "8:00 AM, 2:00 PM, 8:00 PM"],
+        "Current Supply": [30, 4, 2, 20],
+        "Refill Threshold": [10, 5, 5, 5],
+        "Patient ID": ["P1", "P2", "P1", "P1"],
+    }))
+    ids = {med["name"]: med_id for med_id, med in agent.state["medications"].items()}
+    return agent, ids
+
+
+def test_refill_worklist_is_ordered_by_days_until_refill():
+    agent, _ = medication_catalog()
+    worklist = agent.get_refill_worklist()
+    assert [med["name"] for med in worklist] == ["Low", "Unscheduled", "Thrice", "Twice"]
+
+    low, unscheduled, thrice, twice = worklist
+    assert (low["days_until_refill"], low["days_until_empty"]) == (0, 4)
+    assert low["refill_date"] == datetime.date.today().isoformat()
+    assert (thrice["doses_per_day"], thrice["days_until_refill"]) == (3, 5)
+    assert thrice["days_until_empty"] == 20 / 3
+    assert (twice["days_until_refill"], twice["days_until_empty"]) == (10, 15)
+    assert twice["refill_date"] == (datetime.date.today() + datetime.timedelta(days=10)).isoformat()
+
+    # Without scheduled doses a medication below its threshold needs a refill
+    # now but never runs out
+    assert unscheduled["doses_per_day"] == 0
+    assert (unscheduled["days_until_refill"], unscheduled["days_until_empty"]) == (0, None)
+
+
+def test_refill_worklist_reports_infinite_forecasts_as_none():
+    agent, ids = medication_catalog()
+    agent.update_medication_supply(ids["Unscheduled"], 50)
+    worklist = agent.get_refill_worklist()
+    assert [med["name"] for med in worklist] == ["Low", "Thrice", "Twice", "Unscheduled"]
+    assert worklist[-1]["days_until_refill"] is None
+    assert worklist[-1]["days_until_empty"] is None
+    assert worklist[-1]["refill_date"] is None
+
+    # A medication that never reaches its threshold is never within a window
+    assert [med["name"] for med in agent.get_refill_worklist(within_days=10 ** 6)] == ["Low", "Thrice", "Twice"]
+
+
+def test_refill_worklist_filters_by_window_and_patient():
+    agent, _ = medication_catalog()
+    assert [med["name"] for med in agent.get_refill_worklist(within_days=5)] == ["Low", "Unscheduled", "Thrice"]
+    assert [med["name"] for med in agent.get_refill_worklist(within_days=4.9)] == ["Low", "Unscheduled"]
+    assert [med["name"] for med in agent.get_refill_worklist(within_days=0)] == ["Low", "Unscheduled"]
+    assert [med["name"] for med in agent.get_refill_worklist(patient_id="P1")] == ["Unscheduled", "Thrice", "Twice"]
+    assert agent.get_refill_worklist(patient_id="P9") == []
+
+
+def test_refill_alerts_are_opened_once_and_resolved_by_resupply():
+    agent, ids = medication_catalog()
+    assert set(agent.open_refill_alerts) == {ids["Low"], ids["Unscheduled"]}
+    assert len(agent.state["refill_alerts"]) == 2
+
+    # Taking doses down to the threshold opens one alert, however many follow
+    for _ in range(25):
+        agent.record_medication_taken(ids["Twice"], "2025-03-31 08:00:00")
+    alert = agent.open_refill_alerts[ids["Twice"]]
+    assert alert["current_supply"] == 10 and not alert["resolved"]
+    assert len(agent.state["refill_alerts"]) == 3
+    due = {med["name"]: med for med in agent.get_refill_worklist(within_days=0)}
+    assert list(due) == ["Twice", "Low", "Unscheduled"]
+    assert due["Twice"]["refill_alert_open"]
+
+    # A supply still at the threshold keeps the alert open
+    agent.update_medication_supply(ids["Low"], 5)
+    assert ids["Low"] in agent.open_refill_alerts
+
+    agent.update_medication_supply(ids["Low"], 60)
+    assert ids["Low"] not in agent.open_refill_alerts
+    resolved = [alert for alert in agent.state["refill_alerts"] if alert["medication_id"] == ids["Low"]]
+    assert len(resolved) == 1 and resolved[0]["resolved"]
+    assert resolved[0]["resolution_message"] == "Medication resupplied with 60 doses"
+    low = [med for med in agent.get_refill_worklist() if med["name"] == "Low"][0]
+    assert not low["refill_alert_open"]
+
+    # Running low again opens a new alert
+    for _ in range(55):
+        agent.record_medication_taken(ids["Low"], "2025-03-31 09:00:00")
+    assert agent.open_refill_alerts[ids["Low"]] is not resolved[0]
+    assert len(agent.state["refill_alerts"]) == 4
+
+
+def catalog_row_by_row(agent):
+    """Build the medications, schedule and doses per day row by row, reusing the agent's IDs."""
+    medications, schedule, doses_per_day = {}, {}, {}
+    for med_id, (_, row) in zip(agent.state["medications"], agent.data.iterrows()):
+        medication_data = agent.row_to_dict(row)
+        medications[med_id] = {
+            "id": med_id,
+            "name": medication_data.get("medication_name", ""),
+            "dosage": medication_data.get("dosage", ""),
+            "frequency": medication_data.get("frequency", ""),
+            "instructions": medication_data.get("instructions", ""),
+            "start_date": medication_data.get("start_date", ""),
+            "end_date": medication_data.get("end_date", ""),
+            "current_supply": medication_data.get("current_supply", 0),
+            "refill_threshold": medication_data.get("refill_threshold", 5),
+            "patient_id": medication_data.get("patient_id", ""),
+            "compliance_rate": 100.0
+        }
+        for time in [t.strip() for t in medication_data["time_of_day"].split(",")]:
+            try:
+                time_key = datetime.datetime.strptime(time, "%I:%M %p").strftime("%H:%M")
+            except ValueError:
+                continue
+            schedule.setdefault(time_key, []).append({
+                "medication_id": med_id,
+                "name": medication_data.get("medication_name", ""),
+                "dosage": medication_data.get("dosage", ""),
+                "instructions": medication_data.get("instructions", ""),
+            })
+            doses_per_day[med_id] = doses_per_day.get(med_id, 0) + 1
+    return medications, schedule, doses_per_day
+
+
+def test_column_wise_catalog_matches_the_row_wise_build():
+    generator = random.Random(3)
+    times = ["8:00 AM", "8:00 AM, 8:00 PM", "8:00 AM, 2:00 PM, 8:00 PM", "9:30 PM", "bedtime",
+             "7:00 AM, 25:00 PM", "8:00 PM, 8:00 AM", "12:00 AM, 12:00 PM", "8:00 AM, 8:00 AM"]
+    count = 300
+    data = pd.DataFrame({
+        "Medication Name": [f"Med {generator.randint(1, 40)}" for _ in range(count)],
+        "Dosage": [generator.choice(["5 mg", "10 mg", "1 tablet"]) for _ in range(count)],
+        "Frequency": [generator.choice(["Daily", "Twice daily"]) for _ in range(count)],
+        "Time of Day": [generator.choice(times) for _ in range(count)],
+        "Instructions": [generator.choice(["With food", ""]) for _ in range(count)],
+        "Start Date": ["2025-01-01"] * count,
+        "End Date": ["2025-12-31"] * count,
+        "Current Supply": [generator.choice([0, 3, 12, 40, "n/a", None, 7.0]) for _ in range(count)],
+        "Refill Threshold": [generator.choice([5, 10, "soon", None]) for _ in range(count)],
+        "Patient ID": [f"P{generator.randint(1, 9)}" for _ in range(count)],
+    })
+    agent = Medications()
+    agent.initialize_with_data(data)
+
+    medications, schedule, doses_per_day = catalog_row_by_row(agent)
+    assert len(agent.state["medications"]) == count
+    assert agent.state["medications"] == medications
+    assert agent.state["schedule"] == schedule
+    assert list(agent.state["schedule"]) == list(schedule)
+    assert agent.doses_per_day == doses_per_day
+    assert set(agent.open_refill_alerts) == {
+        med_id for med_id, med in medications.items() if med["current_supply"] <= med["refill_threshold"]
+    }
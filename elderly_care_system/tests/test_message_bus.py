@@ -0,0 +1,141 @@
+"""
+Tests for the asynchronous message bus.
+"""
+import threading
+
+from elderly_care_system.agents.base_agent import Agent
+from elderly_care_system.agents.message import Message, Priority
+from elderly_care_system.agents.message_bus import MessageBus
+from elderly_care_system.agents.safety_monitoring_agent import SafetyMonitoringAgent
+
+
+class RecordingAgent(Agent):
+    """Agent that records the types of its messages, optionally waiting on a gate first."""
+
+    def __init__(self, gate=None):
+        super().__init__(name="Recording Agent")
+        self.gate = gate
+        self.started = threading.Event()
+        self.received = []
+        self.messages = []
+        self.emergency_threads = []
+
+    def handle_message(self, message):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait()
+        self.received.append(message.get("type"))
+        self.messages.append(message)
+
+    def handle_emergency(self, message):
+        self.received.append("emergency")
+        self.emergency_threads.append(threading.current_thread())
+
+    def process_data(self, data):
+        return data
+
+
+def blocked_bus(mailbox_size=1):
+    """Get a running bus whose agent is stuck handling its first message."""
+    gate = threading.Event()
+    agent = RecordingAgent(gate)
+    bus = MessageBus(mailbox_size=mailbox_size, put_timeout=0.01)
+    bus.register(agent)
+    bus.start()
+    bus.post(agent.agent_id, Message({"type": "first"}))
+    assert agent.started.wait(5)
+    return bus, agent, gate
+
+
+def test_messages_are_handled_most_urgent_lane_first():
+    bus, agent, gate = blocked_bus(mailbox_size=10)
+    bus.post(agent.agent_id, Message({"type": "health_data"}))
+    bus.post(agent.agent_id, Message({"type": "routine"}))
+    bus.post(agent.agent_id, Message({"type": "health_alert"}))
+    bus.post(agent.agent_id, Message({"type": "routine"}, priority=Priority.EMERGENCY))
+    gate.set()
+    bus.wait_idle()
+    bus.stop()
+
+    assert agent.received == ["first", "emergency", "routine", "health_alert", "routine", "health_data"]
+
+
+def test_full_lane_drops_routine_messages_but_never_alerts():
+    bus, agent, gate = blocked_bus()
+    routine = [bus.post(agent.agent_id, Message({"type": "routine"})) for _ in range(3)]
+    alerts = [bus.post(agent.agent_id, Message({"type": "health_alert"})) for _ in range(3)]
+    demoted = bus.post(agent.agent_id, Message({"type": "safety_alert"}, priority=Priority.ROUTINE))
+    gate.set()
+    bus.wait_idle()
+    bus.stop()
+
+    assert routine == [True, False, False]
+    assert alerts == [True, True, True] and demoted
+    assert agent.received.count("health_alert") == 3 and "safety_alert" in agent.received
+    stats = bus.stats()["Recording Agent"]
+    assert stats["dropped"] == 2 and stats["overflowed"] == 3
+
+
+def test_stop_keeps_a_busy_worker_until_it_exits():
+    bus, agent, gate = blocked_bus(mailbox_size=10)
+    mailbox = bus.mailboxes[agent.agent_id]
+    worker = mailbox.thread
+    bus.post(agent.agent_id, Message({"type": "second"}))
+
+    bus.stop(timeout=0.05)
+    assert worker.is_alive() and mailbox.thread is worker and mailbox.closed
+
+    # Starting again reuses the worker that is still running
+    bus.start()
+    assert mailbox.thread is worker and not mailbox.closed
+    gate.set()
+    bus.wait_idle()
+    assert agent.received == ["first", "second"]
+
+    bus.stop()
+    assert not worker.is_alive() and mailbox.thread is None
+
+    # After a clean stop the bus starts a new worker
+    bus.start()
+    bus.post(agent.agent_id, Message({"type": "third"}))
+    bus.wait_idle()
+    bus.stop()
+    assert agent.received == ["first", "second", "third"]
+
+
+def test_emergencies_are_handled_on_the_recipients_worker():
+    sender, recipient = RecordingAgent(), RecordingAgent()
+    sender.connect_to_agent(recipient)
+
+    # Without a running bus, delivery is synchronous
+    sender.send_message(recipient.agent_id, {"type": "alert"}, Priority.EMERGENCY)
+    assert recipient.received == ["emergency", "alert"]
+    assert recipient.emergency_threads == [threading.current_thread()]
+
+    bus = MessageBus()
+    recipient.attach_to_bus(bus)
+    bus.start()
+    sender.send_message(recipient.agent_id, {"type": "alert"}, Priority.EMERGENCY)
+    bus.wait_idle()
+    worker = bus.mailboxes[recipient.agent_id].thread
+    bus.stop()
+
+    assert recipient.received == ["emergency", "alert", "emergency", "alert"]
+    assert recipient.emergency_threads[1] is worker
+
+
+def test_safety_updates_carry_a_snapshot_of_the_readings():
+    safety, recipient = SafetyMonitoringAgent(), RecordingAgent()
+    safety.connect_to_agent(recipient)
+    readings = iter([
+        {"device_id": "D1", "timestamp": "2025-01-01 08:00:00", "Location": "Kitchen"},
+        {"device_id": "D1", "timestamp": "2025-01-01 08:01:00", "Location": "Bedroom"}
+    ])
+    safety.get_next_data_point = lambda: next(readings)
+
+    safety.run_periodic_check()
+    safety.run_periodic_check()
+    updates = [message["data"] for message in recipient.messages if message.get("type") == "safety_update"]
+
+    assert [update["location"] for update in updates] == ["Kitchen", "Bedroom"]
+    assert all(update is not safety.state["latest_readings"] for update in updates)
@@ -0,0 +1,118 @@
+"""
+Tests for reminder scheduling, the reminder registry and the reminder agent.
+"""
+import datetime
+import threading
+import time
+
+import pandas as pd
+
+from elderly_care_system.agents.reminder_agent import ReminderAgent
+from elderly_care_system.utils.reminder_registry import ReminderRegistry
+from elderly_care_system.utils.reminder_schedule import ReminderSchedule
+
+
+def test_schedule_orders_by_due_time_and_pops_due():
+    schedule = ReminderSchedule()
+    for index, due in enumerate([5, 1, 3, 2, 4]):
+        schedule.push({"id": str(index)}, 100 + due)
+    assert [reminder["id"] for reminder in schedule] == ["1", "3", "2", "4", "0"]
+
+    assert [reminder["id"] for reminder in schedule.pop_due(102.5)] == ["1", "3"]
+    assert schedule.remove("2")["id"] == "2"
+    assert len(schedule) == 2 and schedule[0]["id"] == "4"
+
+    # Pushing a reminder again moves it
+    schedule.push({"id": "0"}, 50)
+    assert schedule.next_due() == 50 and len(schedule) == 2
+
+
+def test_schedule_wakes_for_an_earlier_reminder():
+    schedule = ReminderSchedule()
+    schedule.push({"id": "later"}, time.time() + 30)
+    threading.Timer(0.1, lambda: schedule.push({"id": "now"}, time.time())).start()
+
+    start = time.time()
+    schedule.wait_due()
+    assert time.time() - start < 5
+    assert [reminder["id"] for reminder in schedule.pop_due()] == ["now"]
+
+
+def test_registry_moves_reminders_between_statuses():
+    registry = ReminderRegistry()
+    reminders = [{"id": str(index)} for index in range(4)]
+    for reminder in reminders:
+        registry.add(reminder)
+    registry.set_status(reminders[2], "active")
+    registry.set_status(reminders[0], "active")
+    registry.set_status(reminders[2], "completed")
+
+    assert [reminder["id"] for reminder in registry.view("active")] == ["0"]
+    assert registry.view("completed")[-1:] == [reminders[2]]
+    assert reminders[0] in registry.view("active")
+    assert registry.counts() == {"scheduled": 2, "upcoming": 0, "active": 1, "completed": 1}
+
+    # Setting the same status again keeps the reminder's place
+    assert not registry.set_status(reminders[0], "active")
+
+
+def write_reminders(path, times, date):
+    pd.DataFrame({
+        "Device-ID/User-ID": [f"D{index % 2}" for index in range(len(times))],
+        "Timestamp": "2026-01-01 00:00:00",
+        "Reminder Type": "Medication",
+        "Scheduled Time": times,
+        "Reminder Sent (Yes/No)": "No",
+        "Acknowledged (Yes/No)": "No",
+        "Date": date
+    }).to_csv(path, index=False)
+
+
+def test_reload_replaces_the_registered_reminders(tmp_path):
+    agent = ReminderAgent()
+    tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    csv_file = tmp_path / "daily_reminder.csv"
+    write_reminders(csv_file, ["08:00:00", "12:00:00", "18:00:00"], tomorrow)
+
+    agent.process_csv_data(str(csv_file))
+    first = agent.schedule.pop()
+    agent.trigger_reminder(first)
+    assert len(agent.state["active_reminders"]) == 1
+
+    agent.process_csv_data(str(csv_file))
+
+    assert len(agent.reminders) == 3
+    assert agent.reminders.counts() == {"scheduled": 0, "upcoming": 3, "active": 0, "completed": 0}
+    assert len(agent.state["upcoming_reminders"]) == 3
+    assert list(agent.state["active_reminders"]) == []
+    assert first["id"] not in agent.reminders
+    assert sum(len(agent.get_resident_reminders(resident)["upcoming_reminders"]) for resident in ("D0", "D1")) == 3
+
+
+def test_reload_does_not_dispatch_old_reminders(tmp_path):
+    agent = ReminderAgent()
+    agent.reminder_callback = lambda reminder: None
+    csv_file = tmp_path / "daily_reminder.csv"
+    soon = (datetime.datetime.now() + datetime.timedelta(seconds=1)).strftime("%H:%M:%S")
+    write_reminders(csv_file, [soon], datetime.date.today().isoformat())
+
+    agent.process_csv_data(str(csv_file))
+    agent.process_csv_data(str(csv_file))
+
+    time.sleep(1.5)
+    triggered = agent.run_periodic_check()
+    assert len(triggered) == 1
+    assert [reminder["id"] for reminder in agent.state["active_reminders"]] == [triggered[0]["id"]]
+
+
+def test_acknowledge_moves_an_active_reminder_to_completed():
+    agent = ReminderAgent()
+    agent.reminder_callback = lambda reminder: None
+    result = agent.add_reminder({"device_id": "D1", "reminder_type": "Hydration", "time": "23:59",
+                                 "date": "2999-01-01"})
+    reminder = agent.reminders.get(result["reminder_id"])
+    agent.trigger_reminder(reminder)
+
+    assert agent.acknowledge_reminder(reminder["id"])["status"] == "success"
+    assert agent.acknowledge_reminder(reminder["id"])["status"] == "error"
+    assert list(agent.state["completed_reminders"]) == [reminder]
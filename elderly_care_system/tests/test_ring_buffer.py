@@ -0,0 +1,48 @@
+"""
+Tests for the fixed-capacity ring buffers.
+"""
+import pytest
+
+from elderly_care_system.utils.ring_buffer import RingBuffer, NumericRingBuffer
+
+
+def test_oldest_items_are_overwritten():
+    buffer = RingBuffer(3)
+    assert not buffer and len(buffer) == 0
+    for item in range(5):
+        buffer.append(item)
+
+    assert buffer.to_list() == [2, 3, 4]
+    assert buffer[0] == 2 and buffer[-1] == 4
+    assert len(buffer) == 3 and buffer.capacity == 3
+    with pytest.raises(IndexError):
+        buffer[3]
+
+    buffer.extend(range(10, 20))
+    assert buffer.to_list() == [17, 18, 19]
+    buffer.clear()
+    assert buffer.to_list() == []
+
+
+def test_views_read_through_to_the_buffer():
+    buffer = RingBuffer(5, range(8))
+    window = buffer.window(3)
+    assert window.to_list() == [5, 6, 7]
+    assert buffer[1:3].to_list() == [4, 5]
+    assert window[1:].to_list() == [6, 7]
+    assert buffer.window(10).to_list() == [3, 4, 5, 6, 7]
+
+    buffer.append(8)
+    assert window.to_list() == [6, 7, 8]
+
+
+def test_numeric_segments_hold_the_values_in_order():
+    buffer = NumericRingBuffer(4)
+    buffer.extend([1.0, 2.0, 3.0])
+    assert [list(segment) for segment in buffer.segments()] == [[1.0, 2.0, 3.0]]
+
+    buffer.extend([4.0, 5.0, 6.0])
+    segments = buffer.segments()
+    assert len(segments) == 2
+    assert [value for segment in segments for value in segment] == [3.0, 4.0, 5.0, 6.0]
+    assert buffer.to_list() == [3.0, 4.0, 5.0, 6.0]
@@ -0,0 +1,148 @@
+"""
+Tests for the compiled alert rules: they raise the same alerts as the checks
+they replaced, for single readings and for batches.
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from elderly_care_system.agents.health_monitoring_agent import HealthMonitoringAgent
+from elderly_care_system.agents.safety_monitoring_agent import SafetyMonitoringAgent
+from elderly_care_system.utils.rules import compile_rules
+
+
+def baseline_health_alerts(data, state):
+    """The threshold checks of the health agent before the rules, as (metric, value, threshold, message, severity)."""
+    alerts = []
+    if "heartrate" in data:
+        hr = data["heartrate"]
+        if hr > state["heartrate_threshold"]:
+            alerts.append(("heartrate", hr, state["heartrate_threshold"], f"High heart rate detected: {hr} BPM", "medium"))
+        if hr < 50:
+            alerts.append(("heartrate", hr, 50, f"Low heart rate detected: {hr} BPM", "medium"))
+    if "systolic_bp" in data and "diastolic_bp" in data:
+        sys_bp, dia_bp = data["systolic_bp"], data["diastolic_bp"]
+        if sys_bp > state["blood_pressure_threshold"]:
+            alerts.append(("blood_pressure", f"{sys_bp}/{dia_bp}", state["blood_pressure_threshold"],
+                           f"High blood pressure detected: {sys_bp}/{dia_bp} mmHg", "high"))
+        if dia_bp > 90:
+            alerts.append(("diastolic_bp", dia_bp, 90, f"High diastolic blood pressure: {dia_bp} mmHg", "medium"))
+        if sys_bp < state["blood_pressure_lower_threshold"]:
+            alerts.append(("blood_pressure", f"{sys_bp}/{dia_bp}", state["blood_pressure_lower_threshold"],
+                           f"Low blood pressure detected: {sys_bp}/{dia_bp} mmHg", "medium"))
+    if "temperature" in data:
+        temp = data["temperature"]
+        if temp > state["temperature_threshold"]:
+            alerts.append(("temperature", temp, state["temperature_threshold"],
+                           f"Elevated temperature detected: {temp}°C", "medium"))
+        if temp < 36.0:
+            alerts.append(("temperature", temp, 36.0, f"Low body temperature detected: {temp}°C", "medium"))
+    if "blood_glucose" in data:
+        glucose = data["blood_glucose"]
+        if glucose > state["blood_glucose_threshold"]:
+            alerts.append(("blood_glucose", glucose, state["blood_glucose_threshold"],
+                           f"High blood glucose detected: {glucose} mg/dL", "medium"))
+        if glucose < state["blood_glucose_lower_threshold"]:
+            alerts.append(("blood_glucose", glucose, state["blood_glucose_lower_threshold"],
+                           f"Low blood glucose detected: {glucose} mg/dL", "high"))
+    if "oxygen_level" in data:
+        oxygen = data["oxygen_level"]
+        if oxygen < state["oxygen_level_threshold"]:
+            alerts.append(("oxygen_level", oxygen, state["oxygen_level_threshold"],
+                           f"Low oxygen level detected: {oxygen}%", "high"))
+    return alerts
+
+
+def baseline_safety_alerts(data):
+    """The safety checks before the rules."""
+    alerts = []
+    if data.get("fall_detected", False):
+        impact_level = data.get("impact_force_level", "Unknown")
+        inactivity_duration = data.get("post_fall_inactivity_duration", 0)
+        if impact_level == "High" or inactivity_duration > 300:
+            alerts.append(f"CRITICAL FALL DETECTED: High impact force or prolonged inactivity ({inactivity_duration} seconds)!")
+        elif impact_level == "Medium" or inactivity_duration > 120:
+            alerts.append(f"FALL DETECTED: Medium impact force with {inactivity_duration} seconds of inactivity!")
+        else:
+            alerts.append(f"Minor fall detected: Low impact with {inactivity_duration} seconds of inactivity.")
+    if data.get("movement_activity", "") == "No Movement" and not data.get("fall_detected", False):
+        alerts.append(f"Extended period of no movement detected in the {data.get('location', 'Unknown')}.")
+    return alerts
+
+
+def health_readings():
+    """Readings around every threshold, with some metrics missing."""
+    rng = np.random.default_rng(7)
+    readings = []
+    for _ in range(500):
+        reading = {
+            "heartrate": int(rng.integers(40, 130)),
+            "systolic_bp": int(rng.integers(80, 170)),
+            "diastolic_bp": int(rng.integers(50, 110)),
+            "temperature": float(round(rng.uniform(35.0, 39.0), 1)),
+            "blood_glucose": int(rng.integers(50, 200)),
+            "oxygen_level": int(rng.integers(85, 100))
+        }
+        for metric in list(reading):
+            if rng.random() < 0.15:
+                del reading[metric]
+        readings.append(reading)
+    return readings
+
+
+def test_health_rules_match_the_baseline_checks():
+    agent = HealthMonitoringAgent()
+    agent.update_threshold("heartrate", 95)
+    for data in health_readings():
+        alerts = [(alert["metric"], alert["value"], alert["threshold"], alert["message"], alert["severity"])
+                  for alert in agent.check_health_alerts(data)]
+        assert alerts == baseline_health_alerts(data, agent.state), data
+
+
+def test_health_batch_matches_single_readings():
+    agent = HealthMonitoringAgent()
+    readings = health_readings()
+    n = len(readings)
+    columns = {}
+    for metric in ("heartrate", "systolic_bp", "diastolic_bp", "temperature", "blood_glucose", "oxygen_level"):
+        present = np.array([metric in data for data in readings])
+        values = np.array([data.get(metric, 0) for data in readings])
+        columns[metric] = (values, present)
+
+    batch = [[] for _ in range(n)]
+    for rule, rows, values, messages in agent.rule_plan.evaluate_batch(columns, n, {"thresholds": np.ones(n, dtype=bool)}):
+        for row, value, message in zip(rows, values, messages):
+            batch[row].append((rule.metric, value, message))
+
+    for data, matches in zip(readings, batch):
+        single = [(rule.metric, value, message) for rule, value, message in agent.rule_plan.evaluate(data, ("thresholds",))]
+        assert matches == single, data
+
+
+def test_safety_rules_match_the_baseline_checks():
+    agent = SafetyMonitoringAgent()
+    readings = []
+    for fall, impact, inactivity, movement in itertools.product(
+            (True, False, None), ("High", "Medium", "Low", None), (0, 120, 121, 300, 301, None),
+            ("No Movement", "Walking", None)):
+        data = {"location": "Kitchen"}
+        for key, value in (("fall_detected", fall), ("impact_force_level", impact),
+                           ("post_fall_inactivity_duration", inactivity), ("movement_activity", movement)):
+            if value is not None:
+                data[key] = value
+        readings.append(data)
+
+    for data in readings:
+        assert agent.check_safety_conditions(data) == baseline_safety_alerts(data), data
+
+
+def test_threshold_settings_are_resolved_when_compiling():
+    plan = compile_rules([{"column": "heartrate", "op": ">", "threshold_key": "limit",
+                           "message": "{value} over {threshold}"}], {"limit": "100"})
+    assert plan.evaluate({"heartrate": 101})[0][2] == "101 over 100"
+    assert plan.evaluate({"heartrate": 100}) == []
+    assert plan.evaluate({}) == []
+
+    with pytest.raises(ValueError):
+        compile_rules([{"column": "heartrate", "op": ">", "threshold": "high", "message": ""}])
@@ -0,0 +1,67 @@
+"""
+Tests for the sliding-window statistics.
+"""
+import numpy as np
+
+from elderly_care_system.utils.streaming_stats import WindowedStats
+
+
+def expected(values):
+    values = np.asarray(values, dtype=float)
+    return {
+        "count": len(values),
+        "mean": float(values.mean()) if len(values) else None,
+        "stdev": float(values.std(ddof=1)) if len(values) > 1 else None,
+        "min": float(values.min()) if len(values) else None,
+        "max": float(values.max()) if len(values) else None
+    }
+
+
+def assert_close(summary, reference):
+    assert summary["count"] == reference["count"]
+    for key in ("mean", "stdev", "min", "max"):
+        if reference[key] is None:
+            assert summary[key] is None
+        else:
+            assert abs(summary[key] - reference[key]) < 1e-9, key
+
+
+def test_count_window_matches_a_rescan():
+    rng = np.random.default_rng(3)
+    values = rng.normal(80, 15, 300)
+    stats = WindowedStats(max_count=25)
+    for index, value in enumerate(values):
+        stats.add(value, index)
+        assert_close(stats.summary(), expected(values[max(0, index - 24):index + 1]))
+
+
+def test_age_window_is_measured_from_the_newest_reading():
+    stats = WindowedStats(max_age=60)
+    for timestamp, value in ((0, 1.0), (30, 5.0), (60, 3.0), (61, 2.0)):
+        stats.add(value, timestamp)
+    assert_close(stats.summary(), expected([5.0, 3.0, 2.0]))
+
+    # Too old for the window, and NaN, are ignored
+    stats.add(100.0, 0)
+    stats.add(float("nan"), 62)
+    assert_close(stats.summary(), expected([5.0, 3.0, 2.0]))
+
+    stats.add(4.0, 200)
+    assert_close(stats.summary(), expected([4.0]))
+
+
+def test_extend_matches_adding_one_by_one():
+    rng = np.random.default_rng(5)
+    for max_count, max_age in ((None, 120.0), (20, None), (20, 120.0), (5, 1000.0)):
+        single, batch = WindowedStats(max_count, max_age), WindowedStats(max_count, max_age)
+        start = 0.0
+        for _ in range(4):
+            values = rng.normal(100, 20, 60)
+            values[rng.random(60) < 0.1] = np.nan
+            timestamps = np.cumsum(rng.integers(0, 10, 60)).astype(float) + start
+            start = timestamps[-1]
+            timestamps[rng.random(60) < 0.1] -= 200
+            for value, timestamp in zip(values, timestamps):
+                single.add(value, timestamp)
+            batch.extend(values, timestamps)
+            assert_close(batch.summary(), single.summary())
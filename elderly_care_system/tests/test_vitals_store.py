@@ -0,0 +1,143 @@
+"""
+Tests for the on-disk vitals store.
+"""
+import numpy as np
+import pandas as pd
+
+from elderly_care_system.agents.health_monitoring_agent import HealthMonitoringAgent
+from elderly_care_system.utils.vitals_store import VitalsStore, TIME_COLUMN
+
+
+def write_health_csv(path, rows=30):
+    pd.DataFrame({
+        "Device-ID/User-ID": [f"D{100 + index % 3}" for index in range(rows)],
+        "Timestamp": pd.date_range("2025-01-01", periods=rows, freq="min").strftime("%Y-%m-%d %H:%M:%S"),
+        "Heart Rate": [60 + index for index in range(rows)],
+        "Heart Rate Below/Above Threshold (Yes/No)": "No",
+        "Blood Pressure": "120/80 mmHg",
+        "Blood Pressure Below/Above Threshold (Yes/No)": "No",
+        "Glucose Levels": 100,
+        "Glucose Levels Below/Above Threshold (Yes/No)": "No",
+        "Oxygen Saturation (SpO₂%)": 97,
+        "SpO₂ Below Threshold (Yes/No)": "No",
+        "Alert Triggered (Yes/No)": "No",
+        "Caregiver Notified (Yes/No)": "No"
+    }).to_csv(path, index=False)
+
+
+def load(directory, csv_file, batch):
+    agent = HealthMonitoringAgent()
+    store = VitalsStore(str(directory))
+    agent.attach_history_store(store)
+    agent.process_csv_data(str(csv_file), batch=batch)
+    store.close()
+    return store
+
+
+def test_restart_does_not_store_the_dataset_twice(tmp_path):
+    csv_file = tmp_path / "health.csv"
+    write_health_csv(csv_file)
+
+    for batch in (True, False):
+        directory = tmp_path / f"history-{batch}"
+        first = load(directory, csv_file, batch)
+        counts = {resident: first.count(resident) for resident in first.residents()}
+        assert sum(counts.values()) == 30
+
+        # Start again on the same history and replay the same file
+        second = load(directory, csv_file, batch)
+        assert {resident: second.count(resident) for resident in second.residents()} == counts
+        for resident in second.residents():
+            times = second.query(resident)[TIME_COLUMN]
+            assert np.all(np.diff(times) > 0)
+
+
+def test_exact_duplicates_are_skipped(tmp_path):
+    store = VitalsStore(str(tmp_path), metrics=("heartrate", "oxygen_level"), buffer_size=4)
+    assert store.append("D1", 10, {"heartrate": 70})
+    assert not store.append("D1", 10, {"heartrate": 70})
+    assert store.append_batch("D1", np.array([10.0, 20.0, 30.0]),
+                              {"heartrate": np.array([70.0, 80.0, 90.0])}) == 2
+    assert not store.append("D1", 20, {"heartrate": 80})
+    store.close()
+
+    reopened = VitalsStore(str(tmp_path), metrics=("heartrate", "oxygen_level"))
+    assert not reopened.append("D1", 30, {"heartrate": 90})
+    assert reopened.append_batch("D1", np.array([10.0, 20.0, 30.0, 40.0]),
+                                 {"heartrate": np.array([70.0, 80.0, 90.0, 95.0])}) == 1
+    assert reopened.query("D1")["heartrate"].tolist() == [70, 80, 90, 95]
+
+
+def test_late_and_same_second_readings_are_kept(tmp_path):
+    store = VitalsStore(str(tmp_path), metrics=("heartrate",), buffer_size=4)
+    assert store.append("D1", 100, {"heartrate": 70})
+    assert store.append("D1", 100, {"heartrate": 71})
+    assert store.append("D1", 90, {"heartrate": 72})
+    assert store.append("D1", 110, {"heartrate": 73})
+    assert store.append_batch("D1", np.array([95.0, 120.0]), {"heartrate": np.array([74.0, 75.0])}) == 2
+    assert not store.append("D1", 90, {"heartrate": 72})
+    store.close()
+
+    reopened = VitalsStore(str(tmp_path), metrics=("heartrate",))
+    assert reopened.count("D1") == 6
+    assert not reopened.append("D1", 95, {"heartrate": 74})
+    assert reopened.append("D1", 95, {"heartrate": 76})
+    series = reopened.query("D1", 90, 100)
+    assert series[TIME_COLUMN].tolist() == [90, 95, 95, 100, 100]
+    assert series["heartrate"].tolist() == [72, 74, 76, 70, 71]
+
+    reopened.compact("D1")
+    assert reopened.query("D1")[TIME_COLUMN].tolist() == [90, 95, 95, 100, 100, 110, 120]
+
+
+def test_history_survives_reopening(tmp_path):
+    store = VitalsStore(str(tmp_path), buffer_size=8)
+    for index in range(20):
+        store.append("D1", 1000 + index * 60, {"heartrate": 60 + index, "oxygen_level": 97})
+    store.append("D 2/x", 1000, {"temperature": 37.0})
+    store.close()
+
+    reopened = VitalsStore(str(tmp_path), buffer_size=8)
+    assert reopened.residents() == ["D 2/x", "D1"]
+    assert reopened.count("D1") == 20
+    assert reopened.time_range("D1") == (1000.0, 1000.0 + 19 * 60)
+    series = reopened.query("D1", 1000 + 5 * 60, 1000 + 7 * 60, ["heartrate", "temperature"])
+    assert series["heartrate"].tolist() == [65, 66, 67]
+    assert np.isnan(series["temperature"]).all()
+
+    reopened.append_batch("D1", np.array([3000.0, 3060.0]), {"heartrate": np.array([90.0, 91.0])})
+    assert reopened.query("D1", 3000)["heartrate"].tolist() == [90, 91]
+    assert reopened.count("D1") == 22
+
+
+def test_reopening_cuts_columns_left_uneven_by_a_crash(tmp_path):
+    store = VitalsStore(str(tmp_path), metrics=("heartrate", "oxygen_level"))
+    store.append_batch("D1", np.arange(10.0), {"heartrate": np.arange(10.0), "oxygen_level": np.arange(10.0)})
+    store.close()
+
+    # A write interrupted after some metric columns but before the time column
+    with open(tmp_path / "D1" / "heartrate.f8", "ab") as f:
+        f.write(np.array([99.0, 98.0]).astype("<f8").tobytes())
+
+    reopened = VitalsStore(str(tmp_path), metrics=("heartrate", "oxygen_level"))
+    assert reopened.count("D1") == 10
+    assert (tmp_path / "D1" / "heartrate.f8").stat().st_size == 10 * 8
+    assert reopened.append("D1", 10, {"heartrate": 10, "oxygen_level": 10})
+    assert reopened.query("D1", 9)["heartrate"].tolist() == [9, 10]
+
+
+def test_out_of_order_history_is_compacted(tmp_path):
+    store = VitalsStore(str(tmp_path), metrics=("heartrate",))
+    times = np.array([5.0, 1.0, 4.0, 2.0, 3.0])
+    for timestamp in times:
+        store.append("D1", timestamp, {"heartrate": timestamp * 10})
+
+    assert store.query("D1", 2, 4)[TIME_COLUMN].tolist() == [2, 3, 4]
+    store.compact("D1")
+    store.close()
+
+    reopened = VitalsStore(str(tmp_path), metrics=("heartrate",))
+    series = reopened.query("D1")
+    assert series[TIME_COLUMN].tolist() == [1, 2, 3, 4, 5]
+    assert series["heartrate"].tolist() == [10, 20, 30, 40, 50]
+    assert not reopened.append("D1", 5, {"heartrate": 50})
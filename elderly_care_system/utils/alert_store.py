@@ -0,0 +1,252 @@
+"""
+Indexed alert storage for the Elderly Care System.
+Keeps every alert raised by the agents with secondary indexes on resident,
+severity, metric and message type, plus hourly time buckets, so filtered
+counts and pages only touch the alerts that can match.
+"""
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import threading
+
+from elderly_care_system.utils.residents import resident_key, UNKNOWN_RESIDENT
+from elderly_care_system.utils.timestamps import timestamp_or_now
+
+
+# Fields alerts are indexed by, in the order kept per alert
+INDEXED_FIELDS = ("resident", "severity", "metric", "type")
+
+
+def alert_fields(alert: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """
+    Get the indexed fields of an alert.
+
+    Args:
+        alert: A health, safety or medication alert.
+
+    Returns:
+        Tuple of (resident, severity, metric, type); missing values default
+        like the agents' reports do, to the unknown resident, "medium" and
+        "unknown".
+    """
+    device_id = alert.get("device_id")
+    if device_id is None and isinstance(alert.get("data"), dict):
+        device_id = alert["data"].get("device_id")
+    return (
+        resident_key(device_id) if device_id is not None else UNKNOWN_RESIDENT,
+        str(alert.get("severity") or "medium"),
+        str(alert.get("metric") or "unknown"),
+        str(alert.get("type") or "unknown")
+    )
+
+
+class AlertStore:
+    """
+    Append-only store of alerts with secondary indexes.
+
+    Each index maps a field value to the positions of its alerts in arrival
+    order. A query starts from the shortest index list among its filters, or
+    from the time buckets covering its range, and only checks those alerts.
+    """
+
+    def __init__(self, bucket_seconds: int = 3600):
+        """
+        Initialize an empty store.
+
+        Args:
+            bucket_seconds: Width of the time buckets in seconds.
+        """
+        self.bucket_seconds = bucket_seconds
+
+        self._lock = threading.Lock()
+        self._alerts: List[Dict[str, Any]] = []
+        self._fields: List[Tuple[str, str, str, str]] = []
+        self._times = array("d")
+        self._indexes: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self._buckets: Dict[int, List[int]] = {}
+        self._bucket_ids: List[int] = []
+
+        # Counts per message type and field, for the report summaries
+        self._counts: Dict[str, Dict[str, Counter]] = {}
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def add(self, alert: Dict[str, Any]) -> None:
+        """
+        Store an alert.
+
+        Args:
+            alert: The alert; its "timestamp" gives its time, defaulting to now.
+        """
+        fields = alert_fields(alert)
+        alert_time = timestamp_or_now(alert.get("timestamp"))
+        bucket = int(alert_time // self.bucket_seconds)
+
+        with self._lock:
+            position = len(self._alerts)
+            self._alerts.append(alert)
+            self._fields.append(fields)
+            self._times.append(alert_time)
+
+            for field, value in zip(INDEXED_FIELDS, fields):
+                self._indexes[field].setdefault(value, []).append(position)
+
+            if bucket not in self._buckets:
+                self._buckets[bucket] = []
+                insort(self._bucket_ids, bucket)
+            self._buckets[bucket].append(position)
+
+            counts = self._counts.get(fields[3])
+            if counts is None:
+                counts = self._counts[fields[3]] = {field: Counter() for field in INDEXED_FIELDS[:3]}
+            for field, value in zip(INDEXED_FIELDS[:3], fields):
+                counts[field][value] += 1
+
+    def extend(self, alerts: Iterable[Dict[str, Any]]) -> None:
+        """
+        Store several alerts in order.
+
+        Args:
+            alerts: The alerts to store.
+        """
+        for alert in alerts:
+            self.add(alert)
+
+    def _candidates(self, filters: Dict[str, str], since: Optional[float], until: Optional[float]) -> Any:
+        """Get the positions that may match, in arrival order, from the most selective index."""
+        best = None
+        for field, value in filters.items():
+            positions = self._indexes[field].get(value, [])
+            if best is None or len(positions) < len(best):
+                best = positions
+
+        if since is not None or until is not None:
+            first = 0 if since is None else bisect_left(self._bucket_ids, int(since // self.bucket_seconds))
+            last = len(self._bucket_ids) if until is None else \
+                bisect_right(self._bucket_ids, int(until // self.bucket_seconds))
+            buckets = [self._buckets[bucket] for bucket in self._bucket_ids[first:last]]
+            size = sum(len(positions) for positions in buckets)
+            if size >= len(self._alerts) and best is None:
+                best = range(len(self._alerts))
+            elif best is None or size < len(best):
+                best = sorted(position for positions in buckets for position in positions)
+
+        return range(len(self._alerts)) if best is None else best
+
+    def _matches(self, filters: List[Tuple[int, str]], since: Optional[float], until: Optional[float]) -> Any:
+        """Get a predicate checking a position against the filters."""
+        fields, times = self._fields, self._times
+
+        def matches(position: int) -> bool:
+            values = fields[position]
+            for index, value in filters:
+                if values[index] != value:
+                    return False
+            alert_time = times[position]
+            return (since is None or alert_time >= since) and (until is None or alert_time <= until)
+
+        return matches
+
+    def _prepare(self, resident: Optional[Any], severity: Optional[str], metric: Optional[str],
+                 alert_type: Optional[str]) -> Dict[str, str]:
+        """Collect the field filters that are set."""
+        filters = {}
+        if resident is not None:
+            filters["resident"] = resident_key(resident)
+        for field, value in (("severity", severity), ("metric", metric), ("type", alert_type)):
+            if value is not None:
+                filters[field] = value
+        return filters
+
+    def count(self, resident: Optional[Any] = None, severity: Optional[str] = None, metric: Optional[str] = None,
+              alert_type: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """
+        Count the alerts matching all given filters.
+
+        Args:
+            resident: The resident's Device-ID/User-ID.
+            severity: Severity, e.g. "high".
+            metric: Metric of the alert, e.g. "oxygen_level".
+            alert_type: Message type, e.g. "health_alert".
+            since: Earliest epoch time to include.
+            until: Latest epoch time to include.
+
+        Returns:
+            Number of matching alerts.
+        """
+        filters = self._prepare(resident, severity, metric, alert_type)
+        with self._lock:
+            if since is None and until is None and len(filters) <= 1:
+                if not filters:
+                    return len(self._alerts)
+                field, value = next(iter(filters.items()))
+                return len(self._indexes[field].get(value, []))
+
+            checks = [(INDEXED_FIELDS.index(field), value) for field, value in filters.items()]
+            matches = self._matches(checks, since, until)
+            return sum(1 for position in self._candidates(filters, since, until) if matches(position))
+
+    def query(self, resident: Optional[Any] = None, severity: Optional[str] = None, metric: Optional[str] = None,
+              alert_type: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """
+        Get a page of the alerts matching all given filters, newest first.
+
+        Args:
+            resident: The resident's Device-ID/User-ID.
+            severity: Severity, e.g. "high".
+            metric: Metric of the alert, e.g. "oxygen_level".
+            alert_type: Message type, e.g. "health_alert".
+            since: Earliest epoch time to include.
+            until: Latest epoch time to include.
+            limit: Maximum number of alerts to return.
+            offset: Number of matching alerts to skip.
+
+        Returns:
+            Dictionary with the total number of matches and the page of alerts.
+        """
+        filters = self._prepare(resident, severity, metric, alert_type)
+        checks = [(INDEXED_FIELDS.index(field), value) for field, value in filters.items()]
+        with self._lock:
+            matches = self._matches(checks, since, until)
+            matched = [position for position in reversed(self._candidates(filters, since, until))
+                       if matches(position)]
+            page = [self._alerts[position] for position in matched[offset:offset + limit]]
+        return {"total": len(matched), "offset": offset, "alerts": page}
+
+    def counts_by(self, field: str, alert_type: Optional[str] = None) -> Dict[str, int]:
+        """
+        Count alerts per value of a field.
+
+        Args:
+            field: "resident", "severity" or "metric".
+            alert_type: Only count alerts of this message type.
+
+        Returns:
+            Dictionary mapping each value of the field to its number of alerts.
+        """
+        with self._lock:
+            counts = Counter()
+            for message_type, type_counts in self._counts.items():
+                if alert_type is None or message_type == alert_type:
+                    counts.update(type_counts[field])
+            return dict(counts)
+
+    def recent(self, count: int, alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the most recently stored alerts.
+
+        Args:
+            count: Maximum number of alerts.
+            alert_type: Only return alerts of this message type.
+
+        Returns:
+            The alerts, oldest first.
+        """
+        with self._lock:
+            if alert_type is None:
+                return self._alerts[-count:] if count else []
+            positions = self._indexes["type"].get(alert_type, [])
+            return [self._alerts[position] for position in positions[-count:]] if count else []
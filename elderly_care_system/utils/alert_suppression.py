@@ -0,0 +1,205 @@
+"""
+Alert deduplication for the Elderly Care System.
+Groups alerts into ongoing conditions keyed by resident, metric and
+condition, so a sustained abnormal reading is published once when it starts
+and again at a re-notify interval, instead of on every reading. Discrete
+incidents such as falls, and urgent alerts, are always published.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import threading
+
+from elderly_care_system.utils.residents import resident_key, UNKNOWN_RESIDENT
+from elderly_care_system.utils.timestamps import timestamp_or_now
+
+
+# Severities from least to most urgent; a more urgent alert is always published
+SEVERITY_RANKS = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+# Alerts of this severity or above are never suppressed
+URGENT_RANK = SEVERITY_RANKS["critical"]
+
+
+def condition_key(alert: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """
+    Get the condition an alert belongs to.
+
+    Args:
+        alert: A health or safety alert.
+
+    Returns:
+        Tuple of (resident, metric, condition, incident); alerts without a
+        "condition" field use their severity as the condition. Alerts of a
+        discrete event carry an "incident" field, such as the time of a fall,
+        so each event is its own condition.
+    """
+    device_id = alert.get("device_id")
+    if device_id is None and isinstance(alert.get("data"), dict):
+        device_id = alert["data"].get("device_id")
+    return (
+        resident_key(device_id) if device_id is not None else UNKNOWN_RESIDENT,
+        str(alert.get("metric") or "unknown"),
+        str(alert.get("condition") or alert.get("severity") or "medium"),
+        "" if alert.get("incident") is None else str(alert["incident"])
+    )
+
+
+class _Condition:
+    """State of one ongoing condition."""
+
+    __slots__ = ("first_time", "last_time", "notified_time", "notified_rank", "occurrences", "suppressed",
+                 "last_alert")
+
+    def __init__(self, alert_time: float):
+        self.first_time = alert_time
+        self.last_time = alert_time
+        self.notified_time = alert_time
+        self.notified_rank = -1
+        self.occurrences = 0
+        self.suppressed = 0
+        self.last_alert = None
+
+
+class AlertSuppressor:
+    """
+    Decides which alerts are published.
+
+    A condition starts with its first alert and stays ongoing while its alerts
+    are less than `suppress_seconds` apart. Only the first alert of a condition
+    is published, then one every `renotify_seconds` while it lasts, and any
+    alert more severe than the last published one. Critical and urgent alerts
+    are always published. Times are the alerts' own timestamps, so replayed
+    readings are grouped like live ones.
+    """
+
+    def __init__(self, suppress_seconds: Optional[float] = 900, renotify_seconds: Optional[float] = 3600):
+        """
+        Initialize the suppressor.
+
+        Args:
+            suppress_seconds: Longest gap between alerts of an ongoing condition.
+                None publishes every alert.
+            renotify_seconds: Interval at which an ongoing condition is published
+                again. None never publishes it again.
+        """
+        self.suppress_seconds = suppress_seconds
+        self.renotify_seconds = renotify_seconds
+
+        self._lock = threading.Lock()
+        self._conditions: Dict[Tuple[str, str, str, str], _Condition] = {}
+        self._latest_time = float("-inf")
+        self._checked = 0
+        self._published = 0
+
+    def check(self, alert: Dict[str, Any], alert_time: Optional[float] = None, urgent: bool = False) -> bool:
+        """
+        Record an alert and decide whether to publish it. Adds the alert's
+        "condition" and its "occurrences" within the condition to the alert.
+
+        Args:
+            alert: The alert.
+            alert_time: Epoch time of the alert. Defaults to its "timestamp",
+                or to now.
+            urgent: Always publish the alert, as for emergencies. Critical
+                alerts are always urgent.
+
+        Returns:
+            True if the alert should be broadcast and notified, False if it
+            repeats an ongoing condition.
+        """
+        key = condition_key(alert)
+        if alert_time is None:
+            alert_time = timestamp_or_now(alert.get("timestamp"))
+        rank = SEVERITY_RANKS.get(str(alert.get("severity")), 1)
+        urgent = urgent or rank >= URGENT_RANK
+
+        with self._lock:
+            self._checked += 1
+            self._latest_time = max(self._latest_time, alert_time)
+
+            condition = self._conditions.get(key)
+            if condition is None or self.suppress_seconds is None or \
+                    alert_time - condition.last_time > self.suppress_seconds:
+                condition = self._conditions[key] = _Condition(alert_time)
+                publish = True
+            else:
+                publish = urgent or rank > condition.notified_rank or (
+                    self.renotify_seconds is not None and
+                    alert_time - condition.notified_time >= self.renotify_seconds
+                )
+
+            condition.occurrences += 1
+            condition.last_time = max(condition.last_time, alert_time)
+            condition.last_alert = alert
+            if publish:
+                condition.notified_time = alert_time
+                condition.notified_rank = rank
+                self._published += 1
+            else:
+                condition.suppressed += 1
+
+            # Forget conditions that ended now and then
+            if self.suppress_seconds is not None and len(self._conditions) > 1024 and self._checked % 1024 == 0:
+                self._expire()
+
+        alert["condition"] = key[2]
+        alert["occurrences"] = condition.occurrences
+        return publish
+
+    def _expire(self) -> None:
+        """Drop the conditions that are no longer ongoing."""
+        horizon = self._latest_time - self.suppress_seconds
+        self._conditions = {
+            key: condition for key, condition in self._conditions.items() if condition.last_time >= horizon
+        }
+
+    def ongoing(self, resident: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Get the conditions that are still ongoing, as of the latest alert.
+
+        Args:
+            resident: Only return the conditions of this Device-ID/User-ID.
+
+        Returns:
+            List of conditions, most recently alerted first, each with its key
+            fields, first and last alert time, number of alerts and of
+            suppressed alerts, and the last alert.
+        """
+        wanted = None if resident is None else resident_key(resident)
+        with self._lock:
+            horizon = float("-inf") if self.suppress_seconds is None else self._latest_time - self.suppress_seconds
+            conditions = [
+                {
+                    "resident": key[0],
+                    "metric": key[1],
+                    "condition": key[2],
+                    "incident": key[3] or None,
+                    "first_time": condition.first_time,
+                    "last_time": condition.last_time,
+                    "occurrences": condition.occurrences,
+                    "suppressed": condition.suppressed,
+                    "last_alert": condition.last_alert
+                }
+                for key, condition in self._conditions.items()
+                if condition.last_time >= horizon and (wanted is None or key[0] == wanted)
+            ]
+        conditions.sort(key=lambda condition: condition["last_time"], reverse=True)
+        return conditions
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the number of checked, published and suppressed alerts.
+
+        Returns:
+            Dictionary with the alert counts, the number of ongoing conditions
+            and the configured windows.
+        """
+        ongoing = len(self.ongoing())
+        with self._lock:
+            return {
+                "alerts": self._checked,
+                "published": self._published,
+                "suppressed": self._checked - self._published,
+                "ongoing_conditions": ongoing,
+                "suppress_seconds": self.suppress_seconds,
+                "renotify_seconds": self.renotify_seconds
+            }
@@ -0,0 +1,111 @@
+"""
+Daily dose counts for the Elderly Care System.
+Aggregates taken and missed medication doses into one bucket per day, so
+compliance over a rolling window and its daily trend are read from the
+window's buckets instead of rescanning the dose history.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import datetime
+
+
+# Rolling windows, in days, reported for compliance
+COMPLIANCE_WINDOWS = (7, 30, 90)
+
+
+def compliance_rate(taken: int, missed: int) -> Optional[float]:
+    """
+    Get the percentage of doses that were taken.
+
+    Args:
+        taken: Number of taken doses.
+        missed: Number of missed doses.
+
+    Returns:
+        Compliance rate in percent, or None if there were no doses.
+    """
+    total = taken + missed
+    return taken / total * 100 if total > 0 else None
+
+
+class DailyDoseCounts:
+    """
+    Taken and missed doses per day, keyed by the day's ordinal.
+    """
+
+    def __init__(self):
+        """Initialize empty counts."""
+        self._days: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def add(self, day: datetime.date, status: str) -> None:
+        """
+        Count a dose.
+
+        Args:
+            day: Day of the dose.
+            status: "taken" or "missed".
+        """
+        counts = self._days.get(day.toordinal())
+        if counts is None:
+            counts = self._days[day.toordinal()] = [0, 0]
+        counts[0 if status == "taken" else 1] += 1
+
+    def totals(self, end: datetime.date, days: int) -> Tuple[int, int]:
+        """
+        Get the doses in the days up to a date.
+
+        Args:
+            end: Last day of the window.
+            days: Number of days in the window.
+
+        Returns:
+            Tuple of (taken, missed) doses.
+        """
+        taken = missed = 0
+        last = end.toordinal()
+        for day in range(last - days + 1, last + 1):
+            counts = self._days.get(day)
+            if counts is not None:
+                taken += counts[0]
+                missed += counts[1]
+        return taken, missed
+
+    def window(self, end: datetime.date, days: int) -> Dict[str, Any]:
+        """
+        Get the doses and compliance rate in the days up to a date.
+
+        Args:
+            end: Last day of the window.
+            days: Number of days in the window.
+
+        Returns:
+            Dictionary with the taken and missed doses and the compliance rate.
+        """
+        taken, missed = self.totals(end, days)
+        return {"taken": taken, "missed": missed, "compliance_rate": compliance_rate(taken, missed)}
+
+    def trend(self, end: datetime.date, days: int) -> List[Dict[str, Any]]:
+        """
+        Get the daily doses and compliance rate in the days up to a date.
+
+        Args:
+            end: Last day of the series.
+            days: Number of days in the series.
+
+        Returns:
+            List of days, oldest first, each with its date, taken and missed
+            doses and compliance rate.
+        """
+        series = []
+        last = end.toordinal()
+        for day in range(last - days + 1, last + 1):
+            taken, missed = self._days.get(day, (0, 0))
+            series.append({
+                "date": datetime.date.fromordinal(day).isoformat(),
+                "taken": taken,
+                "missed": missed,
+                "compliance_rate": compliance_rate(taken, missed)
+            })
+        return series
@@ -0,0 +1,112 @@
+"""
+Downsampling of time series for the Elderly Care System.
+Reduces long histories to a fixed number of points for charts, keeping
+their visual shape, so the web UI never has to fetch every raw reading.
+"""
+from typing import Tuple
+import numpy as np
+
+
+# Downsampling methods by name
+METHODS = ("lttb", "minmax")
+
+
+def lttb(times: np.ndarray, values: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets.
+    Keeps the first and last point and, from every bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket.
+
+    Args:
+        times: Times of the points, in increasing order.
+        values: Values of the points.
+        max_points: Maximum number of points to return.
+
+    Returns:
+        Tuple of (times, values) of the kept points.
+    """
+    n = len(times)
+    if max_points >= n or n <= 2:
+        return times, values
+    if max_points < 3:
+        return times[[0, n - 1]], values[[0, n - 1]]
+
+    # Bucket boundaries over the points between the first and the last one
+    edges = (np.arange(max_points - 1) * ((n - 2) / (max_points - 2))).astype(int) + 1
+    edges[-1] = n - 1
+
+    kept = np.empty(max_points, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        # Average of the next bucket, or the last point for the final bucket
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        average_time = times[end:next_end].mean()
+        average_value = values[end:next_end].mean()
+
+        # Twice the triangle areas; the factor does not change the maximum
+        areas = np.abs(
+            (times[previous] - average_time) * (values[start:end] - values[previous]) -
+            (times[previous] - times[start:end]) * (average_value - values[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+
+    return times[kept], values[kept]
+
+
+def min_max(times: np.ndarray, values: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample a series by keeping the minimum and maximum of each bucket.
+    Unlike LTTB this never hides a spike, which suits alert-like series.
+
+    Args:
+        times: Times of the points, in increasing order.
+        values: Values of the points.
+        max_points: Maximum number of points to return.
+
+    Returns:
+        Tuple of (times, values) of the kept points.
+    """
+    n = len(times)
+    if max_points >= n:
+        return times, values
+
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+
+    kept = []
+    for start, end in zip(edges[:-1].tolist(), edges[1:].tolist()):
+        if start == end:
+            continue
+        bucket = values[start:end]
+        low, high = start + int(np.argmin(bucket)), start + int(np.argmax(bucket))
+        kept.extend(sorted({low, high}))
+
+    kept = np.asarray(kept[:max_points], dtype=int)
+    return times[kept], values[kept]
+
+
+def downsample(times: np.ndarray, values: np.ndarray, max_points: int,
+               method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample a series with the given method.
+
+    Args:
+        times: Times of the points, in increasing order.
+        values: Values of the points.
+        max_points: Maximum number of points to return.
+        method: "lttb" or "minmax".
+
+    Returns:
+        Tuple of (times, values) of the kept points.
+    """
+    if method == "lttb":
+        return lttb(times, values, max_points)
+    if method == "minmax":
+        return min_max(times, values, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
@@ -0,0 +1,332 @@
+"""
+Persistent event log for the Elderly Care System.
+Events are appended as JSON lines to numbered segment files that are rotated
+at a fixed size. A sparse index of event times per segment lets time-range
+queries seek close to the first matching event and read only the segments
+that overlap the range, so long histories never have to be held in memory.
+"""
+from bisect import bisect_right
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+import json
+import os
+import threading
+import time
+
+
+# Size at which a segment is closed and a new one started
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+
+# Number of events between two entries of a segment's sparse time index
+INDEX_INTERVAL = 64
+
+
+class _Segment:
+    """One segment file with its sparse time index."""
+
+    __slots__ = ("path", "count", "size", "first_time", "last_time", "times", "offsets")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.size = 0
+        self.first_time = None
+        self.last_time = None
+        self.times: List[float] = []
+        self.offsets: List[int] = []
+
+    @property
+    def index_path(self) -> str:
+        """File holding the sparse index of a closed segment."""
+        return self.path[:-len(".log")] + ".idx"
+
+    def add(self, event_time: float, length: int, index_interval: int) -> None:
+        """Account for an event appended at the end of the segment."""
+        if self.count % index_interval == 0:
+            self.times.append(event_time)
+            self.offsets.append(self.size)
+        if self.first_time is None:
+            self.first_time = event_time
+        self.last_time = event_time
+        self.count += 1
+        self.size += length
+
+    def save_index(self) -> None:
+        """Write the sparse index next to the segment."""
+        with open(self.index_path, "w") as f:
+            json.dump({"count": self.count, "size": self.size, "first_time": self.first_time,
+                       "last_time": self.last_time, "times": self.times, "offsets": self.offsets}, f)
+
+    def load_index(self) -> bool:
+        """Read the sparse index, if it is present and matches the segment."""
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if index.get("size") != os.path.getsize(self.path):
+            return False
+        for name in self.__slots__[1:]:
+            setattr(self, name, index[name])
+        return True
+
+
+class EventLog:
+    """
+    Segmented, append-only log of timestamped events.
+
+    Appends are written to the operating system at once and made durable by a
+    background thread that syncs all pending appends with one fsync every
+    `sync_interval` seconds (group commit). An append can wait for its group
+    to be synced by passing durable=True. Event times never go backwards, so
+    every segment is sorted by time. An event cut off by a crash is dropped
+    when the log is opened again.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 index_interval: int = INDEX_INTERVAL, sync_interval: float = 0.05):
+        """
+        Initialize the log, opening any segments already in the directory.
+
+        Args:
+            directory: Directory holding the segments.
+            segment_bytes: Size at which a segment is closed and a new one started.
+            index_interval: Number of events between two sparse index entries.
+            sync_interval: Longest time in seconds between an append and its fsync.
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.index_interval = index_interval
+        self.sync_interval = sync_interval
+
+        self._condition = threading.Condition()
+        self._segments: List[_Segment] = []
+        self._file = None
+        self._appended = 0
+        self._synced = 0
+        self._sync_requested = False
+        self._last_time = float("-inf")
+        self.closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_segments()
+
+        self._sync_thread = threading.Thread(target=self._sync_loop, name="event-log-sync", daemon=True)
+        self._sync_thread.start()
+
+    def _segment_path(self, number: int) -> str:
+        """Get the file of a segment."""
+        return os.path.join(self.directory, f"segment-{number:06d}.log")
+
+    def _open_segments(self) -> None:
+        """Load the indexes of the existing segments and open the last one for appending."""
+        names = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith("segment-") and name.endswith(".log"))
+        for position, name in enumerate(names):
+            segment = _Segment(os.path.join(self.directory, name))
+            # The last segment may have been cut off, so it is always scanned
+            if position == len(names) - 1 or not segment.load_index():
+                self._scan(segment)
+            self._segments.append(segment)
+
+        if not self._segments:
+            self._segments.append(_Segment(self._segment_path(0)))
+        for segment in self._segments:
+            if segment.last_time is not None:
+                self._last_time = max(self._last_time, segment.last_time)
+        self._file = open(self._segments[-1].path, "ab")
+
+    def _scan(self, segment: _Segment) -> None:
+        """Rebuild the index of a segment, dropping an incomplete last event."""
+        if not os.path.exists(segment.path):
+            return
+        with open(segment.path, "rb") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    event = None
+                if event is None or not line.endswith(b"\n"):
+                    break
+                segment.add(event["time"], len(line), self.index_interval)
+
+        if os.path.getsize(segment.path) > segment.size:
+            with open(segment.path, "r+b") as f:
+                f.truncate(segment.size)
+
+    def append(self, event_type: str, data: Dict[str, Any], event_time: Optional[float] = None,
+               durable: bool = False) -> float:
+        """
+        Append an event.
+
+        Args:
+            event_type: Type of the event, used to filter queries.
+            data: JSON-serializable event data; other values are stored as strings.
+            event_time: Epoch seconds of the event. Defaults to now; an earlier
+                time than the last event's is raised to it.
+            durable: If True, wait until the event has been synced to disk.
+
+        Returns:
+            The time recorded for the event.
+        """
+        with self._condition:
+            if self.closed:
+                raise ValueError("Event log is closed")
+
+            event_time = max(time.time() if event_time is None else float(event_time), self._last_time)
+            line = (json.dumps({"time": event_time, "type": event_type, "data": data},
+                               default=str, separators=(",", ":")) + "\n").encode("utf-8")
+
+            segment = self._segments[-1]
+            if segment.count and segment.size + len(line) > self.segment_bytes:
+                segment = self._rotate()
+
+            self._file.write(line)
+            segment.add(event_time, len(line), self.index_interval)
+            self._last_time = event_time
+            self._appended += 1
+
+            if durable:
+                target = self._appended
+                self._sync_requested = True
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: self._synced >= target or self.closed)
+            return event_time
+
+    def _rotate(self) -> _Segment:
+        """Close the current segment and start the next one."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._synced = self._appended
+        self._condition.notify_all()
+        self._segments[-1].save_index()
+
+        number = int(os.path.basename(self._segments[-1].path)[len("segment-"):-len(".log")]) + 1
+        segment = _Segment(self._segment_path(number))
+        self._segments.append(segment)
+        self._file = open(segment.path, "ab")
+        return segment
+
+    def _sync_loop(self) -> None:
+        """Sync the appends of each group with a single fsync."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._sync_requested or self.closed, self.sync_interval)
+                self._sync_requested = False
+                if self.closed:
+                    return
+                if self._synced >= self._appended:
+                    continue
+                self._file.flush()
+                target = self._appended
+                # A duplicate descriptor stays valid if the segment rotates meanwhile
+                descriptor = os.dup(self._file.fileno())
+
+            # Appends go on while the disk syncs
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+            with self._condition:
+                self._synced = max(self._synced, target)
+                self._condition.notify_all()
+
+    def sync(self) -> None:
+        """Wait until every appended event has been synced to disk."""
+        with self._condition:
+            target = self._appended
+            self._sync_requested = True
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._synced >= target or self.closed)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              types: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Read the events in a time range, oldest first.
+
+        Args:
+            start: Earliest epoch time to include.
+            end: Latest epoch time to include.
+            types: Event types to include; defaults to all types.
+            limit: Maximum number of events to return.
+
+        Returns:
+            Iterator over events, each a dictionary with "time", "type" and "data".
+        """
+        low = float("-inf") if start is None else start
+        high = float("inf") if end is None else end
+        types = None if types is None else set(types)
+
+        # Snapshot the segments overlapping the range, with the size written so far
+        with self._condition:
+            if not self.closed:
+                self._file.flush()
+            ranges = []
+            for segment in self._segments:
+                if segment.count and segment.last_time >= low and segment.first_time <= high:
+                    position = bisect_right(segment.times, low) - 1
+                    # Equal times may continue before the entry, so step back past them
+                    while position > 0 and segment.times[position] >= low:
+                        position -= 1
+                    ranges.append((segment.path, segment.offsets[max(position, 0)], segment.size))
+
+        return self._read(ranges, low, high, types, limit)
+
+    def _read(self, ranges: List[tuple], low: float, high: float, types: Optional[set],
+              limit: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """Read matching events from byte ranges of segments."""
+        found = 0
+        for path, offset, size in ranges:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                position = offset
+                for line in f:
+                    position += len(line)
+                    if position > size:
+                        break
+                    event = json.loads(line)
+                    if event["time"] < low:
+                        continue
+                    if event["time"] > high:
+                        return
+                    if types is not None and event["type"] not in types:
+                        continue
+                    yield event
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the size of the log.
+
+        Returns:
+            Dictionary with the number of segments, events and bytes, and the
+            time of the first and last event.
+        """
+        with self._condition:
+            segments = [segment for segment in self._segments if segment.count]
+            return {
+                "segments": len(self._segments),
+                "events": sum(segment.count for segment in self._segments),
+                "bytes": sum(segment.size for segment in self._segments),
+                "first_time": segments[0].first_time if segments else None,
+                "last_time": segments[-1].last_time if segments else None
+            }
+
+    def close(self) -> None:
+        """Sync all events, save the index of the last segment and close the log."""
+        with self._condition:
+            if self.closed:
+                return
+            self.closed = True
+            self._condition.notify_all()
+        self._sync_thread.join()
+
+        with self._condition:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._synced = self._appended
+            self._segments[-1].save_index()
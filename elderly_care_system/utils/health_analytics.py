@@ -0,0 +1,104 @@
+"""
+Running health analytics for the Elderly Care System.
+Keeps alert and threshold counters up to date as readings are processed,
+so summary statistics can be read without rescanning the reading history.
+"""
+from typing import Dict, Any, List
+import datetime
+
+
+class HealthAnalytics:
+    """
+    Incrementally maintained counters over processed health readings.
+    """
+
+    # Metrics reported in the per-metric statistics, with the flag that
+    # process_health_data sets when the reading is outside its threshold
+    THRESHOLD_FLAGS = {
+        "heartrate": "heartrate_threshold_exceeded",
+        "blood_pressure": "blood_pressure_threshold_exceeded",
+        "blood_glucose": "glucose_threshold_exceeded",
+        "oxygen_level": "oxygen_threshold_exceeded"
+    }
+    METRICS = list(THRESHOLD_FLAGS)
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.total_readings = 0
+        self.readings_with_alerts = 0
+        self.notified_count = 0
+        self.alert_counts: Dict[str, int] = {"total": 0}
+        self.metric_stats: Dict[str, Dict[str, int]] = {
+            metric: {"total_readings": 0, "threshold_exceeded": 0}
+            for metric in self.METRICS
+        }
+
+    def record(self, data: Dict[str, Any], alerts: List[Dict[str, Any]]) -> None:
+        """
+        Update the counters with one processed reading.
+
+        Args:
+            data: The processed health data.
+            alerts: Alerts generated for the reading.
+        """
+        self.total_readings += 1
+
+        if alerts:
+            self.readings_with_alerts += 1
+            self.alert_counts["total"] += len(alerts)
+            for alert in alerts:
+                metric = alert.get("metric", "unknown")
+                self.alert_counts[metric] = self.alert_counts.get(metric, 0) + 1
+
+        if data.get("caregiver_notified"):
+            self.notified_count += 1
+
+        for metric, stats in self.metric_stats.items():
+            if metric in data or (metric == "blood_pressure" and "systolic_bp" in data):
+                stats["total_readings"] += 1
+            if data.get(self.THRESHOLD_FLAGS[metric]):
+                stats["threshold_exceeded"] += 1
+
+    def merge(self, other: 'HealthAnalytics') -> None:
+        """
+        Add the counters of another instance, e.g. one kept by an ingestion worker.
+
+        Args:
+            other: The analytics to add.
+        """
+        self.total_readings += other.total_readings
+        self.readings_with_alerts += other.readings_with_alerts
+        self.notified_count += other.notified_count
+        for metric, count in other.alert_counts.items():
+            self.alert_counts[metric] = self.alert_counts.get(metric, 0) + count
+        for metric, stats in other.metric_stats.items():
+            for key, count in stats.items():
+                self.metric_stats[metric][key] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current summary statistics.
+
+        Returns:
+            Dictionary with analysis results.
+        """
+        metric_stats = {}
+        for metric, stats in self.metric_stats.items():
+            metric_stats[metric] = dict(stats)
+            if stats["total_readings"] > 0:
+                metric_stats[metric]["percentage"] = (
+                    stats["threshold_exceeded"] / stats["total_readings"] * 100
+                )
+            else:
+                metric_stats[metric]["percentage"] = 0
+
+        return {
+            "total_readings": self.total_readings,
+            "alert_counts": dict(self.alert_counts),
+            "alert_percentage": (
+                self.readings_with_alerts / self.total_readings * 100 if self.total_readings > 0 else 0
+            ),
+            "notified_count": self.notified_count,
+            "metric_stats": metric_stats,
+            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
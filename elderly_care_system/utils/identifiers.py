@@ -0,0 +1,32 @@
+"""
+Identifier helpers for the Elderly Care System.
+Generates the random IDs of records loaded in bulk from the datasets.
+"""
+from typing import List
+import os
+
+import numpy as np
+
+
+def uuid4_batch(count: int) -> List[str]:
+    """
+    Generate random (version 4) UUID strings, like str(uuid.uuid4()), from a
+    single read of random bytes.
+
+    Args:
+        count: Number of UUIDs.
+
+    Returns:
+        List of UUID strings.
+    """
+    raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+
+    # Set the version and variant bits as uuid.uuid4 does
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+    digits = raw.tobytes().hex()
+    return [
+        f"{digits[i:i + 8]}-{digits[i + 8:i + 12]}-{digits[i + 12:i + 16]}-{digits[i + 16:i + 20]}-{digits[i + 20:i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
@@ -0,0 +1,221 @@
+"""
+Reminder registry for the Elderly Care System.
+Indexes reminders by ID and tracks the status each one has reached, so
+looking up, triggering and acknowledging a reminder takes constant time
+however many reminders there are.
+"""
+from itertools import count
+from typing import Dict, Any, Iterator, List, Optional
+import threading
+
+
+# Statuses of a reminder, in the order it moves through them
+REMINDER_STATUSES = ("scheduled", "upcoming", "active", "completed")
+
+
+class ReminderStatusView:
+    """
+    Read-only view of the reminders with one status.
+
+    Reads like the list of reminders it replaces: it can be iterated, indexed
+    and sliced, in the order the reminders reached the status.
+    """
+
+    __slots__ = ("_registry", "_status")
+
+    def __init__(self, registry: "ReminderRegistry", status: str):
+        self._registry = registry
+        self._status = status
+
+    def __len__(self) -> int:
+        return self._registry.count(self._status)
+
+    def __bool__(self) -> bool:
+        return self._registry.count(self._status) > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.to_list()[index]
+
+    def __contains__(self, reminder: Any) -> bool:
+        return isinstance(reminder, dict) and self._registry.status(reminder.get("id")) == self._status
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Get the reminders with the status.
+
+        Returns:
+            List of reminders, in the order they reached the status.
+        """
+        return self._registry.reminders(self._status)
+
+
+class ReminderRegistry:
+    """
+    Reminders indexed by ID, with the set of reminders in each status.
+
+    Each status keeps its members in an insertion-ordered dictionary, so
+    moving a reminder between statuses and checking its status are constant
+    time, and listing a status keeps the order reminders reached it.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.RLock()
+        self._reminders: Dict[str, Dict[str, Any]] = {}
+        self._status: Dict[str, str] = {}
+        self._members: Dict[str, Dict[str, int]] = {status: {} for status in REMINDER_STATUSES}
+        self._counter = count()
+        self._ordered: Dict[str, List[Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._reminders)
+
+    def __contains__(self, reminder_id: Any) -> bool:
+        return reminder_id in self._reminders
+
+    def view(self, status: str) -> ReminderStatusView:
+        """
+        Get a list-like view of the reminders with a status.
+
+        Args:
+            status: One of REMINDER_STATUSES.
+
+        Returns:
+            The view.
+        """
+        if status not in self._members:
+            raise ValueError(f"Unknown reminder status: {status}")
+        return ReminderStatusView(self, status)
+
+    def get(self, reminder_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a reminder by ID.
+
+        Args:
+            reminder_id: ID of the reminder.
+
+        Returns:
+            The reminder, or None if it is not registered.
+        """
+        return self._reminders.get(reminder_id)
+
+    def status(self, reminder_id: Any) -> Optional[str]:
+        """
+        Get the status of a reminder.
+
+        Args:
+            reminder_id: ID of the reminder.
+
+        Returns:
+            The status, or None if the reminder is not registered.
+        """
+        return self._status.get(reminder_id)
+
+    def position(self, reminder_id: str) -> int:
+        """
+        Get the order in which a reminder reached its status.
+
+        Args:
+            reminder_id: ID of the reminder.
+
+        Returns:
+            A number that increases with each status change, or -1 if the
+            reminder is not registered.
+        """
+        status = self._status.get(reminder_id)
+        return -1 if status is None else self._members[status][reminder_id]
+
+    def count(self, status: str) -> int:
+        """
+        Get the number of reminders with a status.
+
+        Args:
+            status: The status.
+
+        Returns:
+            Number of reminders.
+        """
+        return len(self._members[status])
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Get the number of reminders in each status.
+
+        Returns:
+            Dictionary mapping each status to its number of reminders.
+        """
+        return {status: len(members) for status, members in self._members.items()}
+
+    def set_status(self, reminder: Dict[str, Any], status: str) -> bool:
+        """
+        Move a reminder to a status, registering it if needed. A reminder
+        that already has the status keeps its place in it.
+
+        Args:
+            reminder: The reminder; its "id" identifies it.
+            status: One of REMINDER_STATUSES.
+
+        Returns:
+            True if the status of the reminder changed.
+        """
+        if status not in self._members:
+            raise ValueError(f"Unknown reminder status: {status}")
+
+        reminder_id = reminder["id"]
+        with self._lock:
+            self._reminders[reminder_id] = reminder
+            previous = self._status.get(reminder_id)
+            if previous == status:
+                return False
+            if previous is not None:
+                del self._members[previous][reminder_id]
+                self._ordered.pop(previous, None)
+            self._status[reminder_id] = status
+            self._members[status][reminder_id] = next(self._counter)
+            self._ordered.pop(status, None)
+            return True
+
+    def add(self, reminder: Dict[str, Any]) -> None:
+        """
+        Register a reminder as scheduled, unless it is already registered.
+
+        Args:
+            reminder: The reminder.
+        """
+        with self._lock:
+            if reminder["id"] in self._status:
+                self._reminders[reminder["id"]] = reminder
+            else:
+                self.set_status(reminder, "scheduled")
+
+    def ids(self, status: str) -> List[str]:
+        """
+        Get the IDs of the reminders with a status.
+
+        Args:
+            status: The status.
+
+        Returns:
+            List of IDs, in the order the reminders reached the status.
+        """
+        with self._lock:
+            return list(self._members[status])
+
+    def reminders(self, status: str) -> List[Dict[str, Any]]:
+        """
+        Get the reminders with a status.
+
+        Args:
+            status: The status.
+
+        Returns:
+            List of reminders, in the order they reached the status.
+        """
+        with self._lock:
+            ordered = self._ordered.get(status)
+            if ordered is None:
+                ordered = self._ordered[status] = [self._reminders[reminder_id] for reminder_id in self._members[status]]
+            return list(ordered)
@@ -0,0 +1,214 @@
+"""
+Reminder scheduling for the Elderly Care System.
+Keeps upcoming reminders in a min-heap keyed by due time, so the next due
+reminder is found in constant time and reminders are added and triggered in
+logarithmic time, and lets a scheduler thread sleep until it is due.
+"""
+from heapq import heapify, heappop, heappush
+from itertools import count
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+import threading
+import time
+
+
+class ReminderSchedule:
+    """
+    Upcoming reminders ordered by due time (epoch seconds).
+
+    Reads like the sorted list of upcoming reminders it replaces: it can be
+    iterated, indexed and sliced in due order. Removed reminders stay in the
+    heap, marked as removed, until they reach its top.
+    """
+
+    def __init__(self, max_wait: float = 60.0):
+        """
+        Initialize an empty schedule.
+
+        Args:
+            max_wait: Longest time wait_due sleeps, so clock changes are
+                noticed.
+        """
+        self.max_wait = max_wait
+
+        self._condition = threading.Condition()
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._counter = count()
+        self._woken = False
+        self._ordered: Optional[List[Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.to_list()[index]
+
+    def __contains__(self, reminder: Any) -> bool:
+        return isinstance(reminder, dict) and reminder.get("id") in self._entries
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Get the upcoming reminders.
+
+        Returns:
+            List of reminders, earliest due first.
+        """
+        with self._condition:
+            if self._ordered is None:
+                self._ordered = [entry[2] for entry in sorted(self._entries.values())]
+            return list(self._ordered)
+
+    def push(self, reminder: Dict[str, Any], due_time: float) -> None:
+        """
+        Schedule a reminder, replacing any earlier schedule of the same reminder.
+
+        Args:
+            reminder: The reminder; its "id" identifies it.
+            due_time: Epoch time at which it is due.
+        """
+        with self._condition:
+            self._discard(reminder["id"])
+            entry = [due_time, next(self._counter), reminder]
+            self._entries[reminder["id"]] = entry
+            heappush(self._heap, entry)
+            self._ordered = None
+            # Wake the scheduler if this reminder is now the next one due
+            if self._top() is entry:
+                self._condition.notify_all()
+
+    def rebuild(self, scheduled: Iterable[Tuple[Dict[str, Any], float]]) -> None:
+        """
+        Replace all upcoming reminders.
+
+        Args:
+            scheduled: Pairs of (reminder, due time).
+        """
+        with self._condition:
+            self._entries = {}
+            for reminder, due_time in scheduled:
+                self._entries[reminder["id"]] = [due_time, next(self._counter), reminder]
+            self._heap = list(self._entries.values())
+            heapify(self._heap)
+            self._ordered = None
+            self._condition.notify_all()
+
+    def _discard(self, reminder_id: str) -> Optional[Dict[str, Any]]:
+        """Mark the entry of a reminder as removed, returning the reminder."""
+        entry = self._entries.pop(reminder_id, None)
+        if entry is None:
+            return None
+        reminder, entry[2] = entry[2], None
+        self._ordered = None
+        # Keep removed reminders from piling up in the heap
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap if item[2] is not None]
+            heapify(self._heap)
+        return reminder
+
+    def _top(self) -> Optional[list]:
+        """Get the live entry due first, dropping removed ones."""
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heappop(heap)
+        return heap[0] if heap else None
+
+    def remove(self, reminder_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Unschedule a reminder.
+
+        Args:
+            reminder_id: ID of the reminder.
+
+        Returns:
+            The reminder, or None if it was not scheduled.
+        """
+        with self._condition:
+            return self._discard(reminder_id)
+
+    def due_time(self, reminder_id: str) -> Optional[float]:
+        """
+        Get the time a scheduled reminder is due.
+
+        Args:
+            reminder_id: ID of the reminder.
+
+        Returns:
+            Epoch time, or None if the reminder is not scheduled.
+        """
+        entry = self._entries.get(reminder_id)
+        return entry[0] if entry else None
+
+    def next_due(self) -> Optional[float]:
+        """
+        Get the time the next reminder is due.
+
+        Returns:
+            Epoch time, or None if nothing is scheduled.
+        """
+        with self._condition:
+            entry = self._top()
+            return entry[0] if entry else None
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        """
+        Unschedule the reminder due first, due or not.
+
+        Returns:
+            The reminder, or None if nothing is scheduled.
+        """
+        with self._condition:
+            entry = self._top()
+            if entry is None:
+                return None
+            heappop(self._heap)
+            del self._entries[entry[2]["id"]]
+            self._ordered = None
+            return entry[2]
+
+    def pop_due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Unschedule all reminders that are due.
+
+        Args:
+            now: Epoch time to compare with. Defaults to now.
+
+        Returns:
+            The due reminders, earliest first.
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._condition:
+            entry = self._top()
+            while entry is not None and entry[0] <= now:
+                heappop(self._heap)
+                del self._entries[entry[2]["id"]]
+                due.append(entry[2])
+                entry = self._top()
+            if due:
+                self._ordered = None
+        return due
+
+    def wait_due(self) -> None:
+        """
+        Sleep until the next reminder is due, an earlier one is scheduled or
+        wake is called, for at most max_wait seconds.
+        """
+        with self._condition:
+            if not self._woken:
+                entry = self._top()
+                timeout = self.max_wait if entry is None else min(self.max_wait, entry[0] - time.time())
+                if timeout > 0:
+                    self._condition.wait(timeout)
+            self._woken = False
+
+    def wake(self) -> None:
+        """Make a waiting or the next call to wait_due return at once."""
+        with self._condition:
+            self._woken = True
+            self._condition.notify_all()
@@ -0,0 +1,99 @@
+"""
+Per-resident state partitions for the Elderly Care System.
+Agents keep the state of each resident (keyed by Device-ID/User-ID) in its
+own partition, so readings from unrelated residents are never mixed.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Partition used for data that does not carry a device ID
+UNKNOWN_RESIDENT = "unknown"
+
+
+def resident_key(device_id: Any) -> str:
+    """
+    Normalize a device or user ID to a partition key.
+
+    Args:
+        device_id: The Device-ID/User-ID value, possibly missing.
+
+    Returns:
+        The partition key for the resident.
+    """
+    if device_id is None or device_id != device_id:  # None or NaN
+        return UNKNOWN_RESIDENT
+
+    key = str(device_id).strip()
+    return key or UNKNOWN_RESIDENT
+
+
+class ResidentPartitions:
+    """
+    Dictionary of per-resident state with O(1) lookup by resident ID.
+    Partitions are created on first use by a factory function.
+    """
+
+    def __init__(self, factory: Callable[[], Dict[str, Any]]):
+        """
+        Initialize the partitions.
+
+        Args:
+            factory: Function returning the initial state of a new partition.
+        """
+        self._factory = factory
+        self._partitions: Dict[str, Dict[str, Any]] = {}
+
+    def partition(self, device_id: Any) -> Dict[str, Any]:
+        """
+        Get the partition of a resident, creating it if needed.
+
+        Args:
+            device_id: The resident's Device-ID/User-ID.
+
+        Returns:
+            The resident's state.
+        """
+        key = resident_key(device_id)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = self._factory()
+        return partition
+
+    def get(self, device_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get the partition of a resident without creating it.
+
+        Args:
+            device_id: The resident's Device-ID/User-ID.
+
+        Returns:
+            The resident's state, or None if nothing is known about the resident.
+        """
+        return self._partitions.get(resident_key(device_id))
+
+    def update(self, partitions: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace the partitions of some residents, e.g. with state built elsewhere.
+
+        Args:
+            partitions: Mapping of resident ID to the resident's state.
+        """
+        for device_id, partition in partitions.items():
+            self._partitions[resident_key(device_id)] = partition
+
+    def ids(self) -> List[str]:
+        """Get the IDs of all known residents."""
+        return list(self._partitions)
+
+    def items(self) -> Iterator:
+        """Iterate over (resident ID, partition) pairs."""
+        return iter(self._partitions.items())
+
+    def __contains__(self, device_id: Any) -> bool:
+        return resident_key(device_id) in self._partitions
+
+    def __len__(self) -> int:
+        return len(self._partitions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._partitions)
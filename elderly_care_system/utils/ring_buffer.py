@@ -0,0 +1,192 @@
+"""
+Fixed-capacity ring buffers for the Elderly Care System.
+Used for the rolling histories kept by the agents: appending is O(1) and
+the oldest entries are overwritten once the buffer is full.
+"""
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+from array import array
+
+
+class RingBufferView:
+    """
+    Read-only, zero-copy window over a ring buffer.
+    The view reads through to the buffer, so it reflects later appends.
+    """
+
+    __slots__ = ("_buffer", "_indices")
+
+    def __init__(self, buffer: 'RingBuffer', indices: range):
+        """
+        Initialize the view.
+
+        Args:
+            buffer: The ring buffer to read from.
+            indices: Logical indices (0 = oldest item) covered by the view.
+        """
+        self._buffer = buffer
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return RingBufferView(self._buffer, self._indices[index])
+        return self._buffer[self._indices[index]]
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in self._indices:
+            yield self._buffer[index]
+
+    def __repr__(self) -> str:
+        return f"RingBufferView({list(self)!r})"
+
+    def to_list(self) -> List[Any]:
+        """Copy the items in the view to a list."""
+        return list(self)
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO buffer backed by a preallocated list.
+    Indexing is logical: index 0 is the oldest item and -1 the newest.
+    """
+
+    def __init__(self, capacity: int, items: Optional[Iterable[Any]] = None):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity: Maximum number of items kept.
+            items: Optional initial items; only the last `capacity` are kept.
+        """
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+
+        self._capacity = capacity
+        self._storage = self._allocate(capacity)
+        self._start = 0
+        self._size = 0
+
+        if items is not None:
+            self.extend(items)
+
+    def _allocate(self, capacity: int) -> Any:
+        """Allocate the backing storage."""
+        return [None] * capacity
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of items kept."""
+        return self._capacity
+
+    def append(self, item: Any) -> None:
+        """
+        Append an item, overwriting the oldest one if the buffer is full.
+
+        Args:
+            item: The item to append.
+        """
+        if self._size < self._capacity:
+            self._storage[(self._start + self._size) % self._capacity] = item
+            self._size += 1
+        else:
+            self._storage[self._start] = item
+            self._start = (self._start + 1) % self._capacity
+
+    def extend(self, items: Iterable[Any]) -> None:
+        """
+        Append several items in order.
+
+        Args:
+            items: The items to append.
+        """
+        # Only the newest items of a long sequence would survive
+        if isinstance(items, (list, tuple)) and len(items) > self._capacity:
+            items = items[-self._capacity:]
+        for item in items:
+            self.append(item)
+
+    def clear(self) -> None:
+        """Remove all items."""
+        self._storage = self._allocate(self._capacity)
+        self._start = 0
+        self._size = 0
+
+    def window(self, count: int) -> RingBufferView:
+        """
+        Get a zero-copy view of the newest items.
+
+        Args:
+            count: Maximum number of items in the window.
+
+        Returns:
+            View over the last `count` items, oldest first.
+        """
+        count = max(0, min(count, self._size))
+        return RingBufferView(self, range(self._size - count, self._size))
+
+    def to_list(self) -> List[Any]:
+        """Copy the items to a list, oldest first."""
+        return list(self)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return RingBufferView(self, range(self._size)[index])
+
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring buffer index out of range")
+        return self._storage[(self._start + index) % self._capacity]
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(self._size):
+            yield self._storage[(self._start + index) % self._capacity]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(capacity={self._capacity}, items={self.to_list()!r})"
+
+
+class NumericRingBuffer(RingBuffer):
+    """
+    Ring buffer of numbers backed by a typed array instead of a list of
+    Python objects.
+    """
+
+    def __init__(self, capacity: int, items: Optional[Iterable[float]] = None, typecode: str = "d"):
+        """
+        Initialize the numeric ring buffer.
+
+        Args:
+            capacity: Maximum number of values kept.
+            items: Optional initial values; only the last `capacity` are kept.
+            typecode: Array type code of the values (default: double).
+        """
+        self._typecode = typecode
+        super().__init__(capacity, items)
+
+    def _allocate(self, capacity: int) -> array:
+        """Allocate a zero-filled typed array."""
+        return array(self._typecode, bytes(array(self._typecode).itemsize * capacity))
+
+    def segments(self) -> Tuple[memoryview, ...]:
+        """
+        Get the contents as zero-copy memoryviews over the backing array.
+
+        Returns:
+            One or two contiguous segments which, concatenated, hold the
+            values oldest first.
+        """
+        storage = memoryview(self._storage)
+        end = self._start + self._size
+
+        if end <= self._capacity:
+            return (storage[self._start:end],)
+        return (storage[self._start:], storage[:end - self._capacity])
@@ -0,0 +1,340 @@
+"""
+Declarative alert rules for the Elderly Care System.
+Rules are plain dictionaries naming a column, a comparison and a threshold,
+with the message to report. They are compiled once into a plan that checks
+a single reading or a whole batch of NumPy columns.
+
+Rule keys:
+    column: Field of the reading that is compared.
+    op: One of ">", ">=", "<", "<=", "==", "!=" or "truthy".
+    threshold: Constant to compare with, or
+    threshold_key: Name of the setting holding the threshold.
+    requires: Fields that must be present for the rule to apply; defaults to
+        the column alone.
+    when: Flag fields that must all be set for the rule to apply.
+    unless: Flag fields that stop the rule from applying when set.
+    defaults: Values used for fields missing from the reading.
+    message: Message template, formatted with the reading's fields and
+        "value" and "threshold".
+    value_field: Field reported as the alert's value; defaults to the column.
+    value_template: Template of the reported value, used instead of a field.
+    metric: Reported metric; defaults to the column.
+    severity: Reported severity; defaults to "medium".
+    condition: Name of the reported condition, e.g. "high" or "low".
+    source: Name of the rule set, so callers can evaluate part of the rules.
+    group: Rules sharing a group are exclusive: only the first match applies.
+"""
+from itertools import repeat
+from string import Formatter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import operator
+import numpy as np
+
+
+# Comparisons by operator name, for single values and for arrays
+COMPARATORS = {
+    ">": (operator.gt, np.greater),
+    ">=": (operator.ge, np.greater_equal),
+    "<": (operator.lt, np.less),
+    "<=": (operator.le, np.less_equal),
+    "==": (operator.eq, np.equal),
+    "!=": (operator.ne, np.not_equal),
+    "truthy": (None, None)
+}
+
+
+def positional_template(template: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Turn a template with named fields into one with positional fields.
+
+    Args:
+        template: Template such as "{systolic_bp}/{diastolic_bp}".
+
+    Returns:
+        Tuple of the positional template, e.g. "{0}/{1}", and the field names
+        in argument order.
+    """
+    parts, names = [], []
+    for literal, name, spec, conversion in Formatter().parse(template):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if name not in names:
+            names.append(name)
+        parts.append("{" + str(names.index(name)) + (f"!{conversion}" if conversion else "") +
+                     (f":{spec}" if spec else "") + "}")
+    return "".join(parts), tuple(names)
+
+
+class CompiledRule:
+    """A rule with its comparison and threshold resolved."""
+
+    __slots__ = ("column", "requires", "needed", "when", "unless", "defaults", "compare", "compare_array", "threshold",
+                 "reported_threshold", "value_field", "value_format", "value_args", "message_format",
+                 "message_args", "fields", "metric", "severity", "condition",
+                 "source", "group")
+
+    def __init__(self, rule: Dict[str, Any], thresholds: Dict[str, Any]):
+        """
+        Compile a rule.
+
+        Args:
+            rule: The rule declaration.
+            thresholds: Settings referred to by "threshold_key".
+
+        Raises:
+            ValueError: If the operator is unknown or a threshold is not a number.
+            KeyError: If a referenced threshold setting does not exist.
+        """
+        op = rule.get("op", "truthy")
+        if op not in COMPARATORS:
+            raise ValueError(f"Unknown rule operator: {op}")
+
+        self.column = rule["column"]
+        self.requires = tuple(rule.get("requires", (self.column,)))
+        self.when = tuple(rule.get("when", ()))
+        self.unless = tuple(rule.get("unless", ()))
+        self.defaults = dict(rule.get("defaults", {}))
+        self.needed = frozenset(name for name in self.requires if name not in self.defaults)
+        self.compare, self.compare_array = COMPARATORS[op]
+
+        if "threshold_key" in rule:
+            self.reported_threshold = thresholds[rule["threshold_key"]]
+        else:
+            self.reported_threshold = rule.get("threshold")
+        self.threshold = self.reported_threshold
+        if op in (">", ">=", "<", "<="):
+            try:
+                self.threshold = float(self.threshold)
+            except (TypeError, ValueError):
+                raise ValueError(f"Threshold of {self.column} is not a number: {self.threshold!r}")
+
+        self.value_field = rule.get("value_field", self.column)
+        if "value_template" in rule:
+            self.value_format, self.value_args = positional_template(rule["value_template"])
+        else:
+            self.value_format, self.value_args = None, (self.value_field,)
+        self.message_format, self.message_args = positional_template(rule["message"])
+        self.metric = rule.get("metric", self.column)
+        self.severity = rule.get("severity", "medium")
+        self.condition = rule.get("condition")
+        self.source = rule.get("source")
+        self.group = rule.get("group")
+
+        # Reading fields used by the templates
+        names = (self.column,) + self.value_args + self.message_args
+        self.fields = tuple(dict.fromkeys(name for name in names if name not in ("value", "threshold")))
+
+    def render(self, fields: Dict[str, Any]) -> Tuple[Any, str]:
+        """
+        Format the reported value and message of a match.
+
+        Args:
+            fields: Values of the reading's fields used by the rule.
+
+        Returns:
+            Tuple of (value, message).
+        """
+        if self.value_format is None:
+            value = fields[self.value_field]
+        else:
+            value = self.value_format.format(*[fields[name] for name in self.value_args])
+        known = {"value": value, "threshold": self.reported_threshold}
+        return value, self.message_format.format(*[
+            known[name] if name in known else fields[name] for name in self.message_args
+        ])
+
+    def render_rows(self, columns: Dict[str, list]) -> Tuple[list, list]:
+        """
+        Format the reported values and messages of several matches.
+
+        Args:
+            columns: Values of the fields used by the rule, one list per field
+                with an entry per match.
+
+        Returns:
+            Tuple of (values, messages) lists.
+        """
+        if self.value_format is None:
+            values = columns[self.value_field]
+        else:
+            values = list(map(self.value_format.format, *[columns[name] for name in self.value_args]))
+        count = len(values)
+        arguments = [
+            values if name == "value" else repeat(self.reported_threshold, count) if name == "threshold"
+            else columns[name]
+            for name in self.message_args
+        ]
+        if not arguments:
+            return values, [self.message_format] * count
+        return values, list(map(self.message_format.format, *arguments))
+
+
+class RulePlan:
+    """
+    Rules compiled for evaluation, in declaration order. A plan is never
+    modified; changing a threshold compiles a new plan that replaces it.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], thresholds: Optional[Dict[str, Any]] = None):
+        """
+        Compile a list of rules.
+
+        Args:
+            rules: The rule declarations.
+            thresholds: Settings referred to by the rules' "threshold_key".
+        """
+        self.rules = tuple(CompiledRule(rule, thresholds or {}) for rule in rules)
+        self._selections: Dict[tuple, Tuple[CompiledRule, ...]] = {}
+
+    def selected(self, sources: Optional[Iterable[str]] = None) -> Tuple[CompiledRule, ...]:
+        """
+        Get the rules of some rule sets.
+
+        Args:
+            sources: Rule sets to include; defaults to all rules.
+
+        Returns:
+            The rules, in declaration order.
+        """
+        if sources is None:
+            return self.rules
+        key = tuple(sources)
+        rules = self._selections.get(key)
+        if rules is None:
+            rules = self._selections[key] = tuple(rule for rule in self.rules if rule.source in key)
+        return rules
+
+    def evaluate(self, data: Dict[str, Any], sources: Optional[Iterable[str]] = None) -> List[Tuple[CompiledRule, Any, str]]:
+        """
+        Check one reading.
+
+        Args:
+            data: The reading.
+            sources: Rule sets to check; defaults to all rules.
+
+        Returns:
+            List of (rule, value, message) for every matching rule, in order.
+        """
+        matches = []
+        matched_groups = set()
+        keys = data.keys()
+        for rule in self.selected(sources):
+            if rule.group is not None and rule.group in matched_groups:
+                continue
+            if not keys >= rule.needed:
+                continue
+            if rule.when and not all(data.get(name) for name in rule.when):
+                continue
+            if rule.unless and any(data.get(name) for name in rule.unless):
+                continue
+
+            current = data[rule.column] if rule.column in data else rule.defaults.get(rule.column)
+            if rule.compare is None:
+                if not current:
+                    continue
+            elif current is None or not rule.compare(current, rule.threshold):
+                continue
+
+            if rule.group is not None:
+                matched_groups.add(rule.group)
+            fields = {name: data[name] if name in data else rule.defaults.get(name) for name in rule.fields}
+            value, message = rule.render(fields)
+            matches.append((rule, value, message))
+        return matches
+
+    def evaluate_batch(self, columns: Dict[str, tuple], n: int,
+                       masks: Optional[Dict[str, np.ndarray]] = None) -> List[Tuple[CompiledRule, list, list, list]]:
+        """
+        Check a batch of readings, one vectorized comparison per rule.
+
+        Args:
+            columns: Mapping of field names to (values, present) arrays.
+            n: Number of readings.
+            masks: Rows each rule set applies to, by source; rule sets without
+                a mask are not checked. Defaults to all rules on all rows.
+
+        Returns:
+            List of (rule, rows, values, messages) in rule order, where rows
+            are the positions of the matching readings and values and messages
+            hold the reported value and message of each of them.
+        """
+        rules = self.rules if masks is None else self.selected(masks)
+        nowhere = np.zeros(n, dtype=bool)
+        objects: Dict[str, np.ndarray] = {}
+        claimed: Dict[Any, np.ndarray] = {}
+        results = []
+
+        def flag(name: str) -> np.ndarray:
+            values, present = columns.get(name, (nowhere, nowhere))
+            return np.asarray(values, dtype=object).astype(bool) & np.asarray(present, dtype=bool)
+
+        def column_objects(name: str, default: Any) -> np.ndarray:
+            if name not in objects:
+                if name in columns:
+                    values, present = columns[name]
+                    values = np.array(values, dtype=object)
+                    values[~np.asarray(present, dtype=bool)] = default
+                    objects[name] = values
+                else:
+                    objects[name] = np.full(n, default, dtype=object)
+            return objects[name]
+
+        for rule in rules:
+            mask = np.ones(n, dtype=bool) if masks is None else np.asarray(masks[rule.source], dtype=bool).copy()
+            for name in rule.requires:
+                if name in columns:
+                    mask &= np.asarray(columns[name][1], dtype=bool)
+                elif name not in rule.defaults:
+                    mask[:] = False
+            for name in rule.when:
+                mask &= flag(name)
+            for name in rule.unless:
+                mask &= ~flag(name)
+
+            if rule.column in columns:
+                values, present = columns[rule.column]
+                values, present = np.asarray(values), np.asarray(present, dtype=bool)
+                if rule.column not in rule.defaults:
+                    mask &= present
+                elif not present.all():
+                    values = np.where(present, values.astype(object), rule.defaults[rule.column])
+            else:
+                values = np.full(n, rule.defaults.get(rule.column), dtype=object)
+
+            # Compare only the rows still in question
+            candidates = np.flatnonzero(mask)
+            chosen = values[candidates]
+            with np.errstate(invalid="ignore"):
+                if rule.compare_array is None:
+                    mask[candidates] = chosen.astype(object).astype(bool)
+                else:
+                    mask[candidates] = np.asarray(rule.compare_array(chosen, rule.threshold), dtype=bool)
+
+            if rule.group is not None:
+                taken = claimed.setdefault(rule.group, np.zeros(n, dtype=bool))
+                mask &= ~taken
+                taken |= mask
+
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                continue
+
+            fields = {name: column_objects(name, rule.defaults.get(name))[rows].tolist() for name in rule.fields}
+            values, messages = rule.render_rows(fields)
+            results.append((rule, rows.tolist(), values, messages))
+        return results
+
+
+def compile_rules(rules: Iterable[Dict[str, Any]], thresholds: Optional[Dict[str, Any]] = None) -> RulePlan:
+    """
+    Compile rule declarations into an evaluation plan.
+
+    Args:
+        rules: The rule declarations.
+        thresholds: Settings referred to by the rules' "threshold_key".
+
+    Returns:
+        The compiled plan.
+    """
+    return RulePlan(rules, thresholds)
@@ -0,0 +1,206 @@
+"""
+Streaming statistics for the Elderly Care System.
+Maintains mean, variance, minimum and maximum over a sliding window in
+constant time per update, so summary queries never rescan the history.
+"""
+from typing import Any, Dict, Iterable, Optional
+from collections import deque
+import math
+import numpy as np
+
+
+class WindowedStats:
+    """
+    Sliding-window statistics using Welford's algorithm for the mean and
+    variance and monotonic deques for the minimum and maximum.
+
+    The window is bounded by a number of values, an age in seconds, or both.
+    Ages are measured against the newest timestamp seen, not the wall clock,
+    so replaying historical data gives the same result as live data.
+    """
+
+    def __init__(self, max_count: Optional[int] = None, max_age: Optional[float] = None):
+        """
+        Initialize the window.
+
+        Args:
+            max_count: Maximum number of values in the window.
+            max_age: Maximum age of values in the window, in seconds.
+        """
+        self.max_count = max_count
+        self.max_age = max_age
+
+        self._values = deque()      # (sequence, timestamp, value), oldest first
+        self._min = deque()         # (sequence, value), increasing values
+        self._max = deque()         # (sequence, value), decreasing values
+        self._sequence = 0
+        self._latest: Optional[float] = None
+
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float, timestamp: float = 0.0) -> None:
+        """
+        Add a value to the window, evicting values that fall out of it.
+        NaN values and values already older than the window are ignored.
+
+        Args:
+            value: The value to add.
+            timestamp: Epoch seconds of the value.
+        """
+        if value != value:  # NaN check
+            return
+
+        if self._latest is None or timestamp > self._latest:
+            self._latest = timestamp
+        elif self.max_age is not None and timestamp < self._latest - self.max_age:
+            return
+
+        self._insert(value, timestamp)
+
+    def extend(self, values: Iterable[float], timestamps: Iterable[float]) -> None:
+        """
+        Add several values at once, with the same result as calling add for
+        each of them. Values that would be evicted before the end of the batch
+        are skipped instead of being added and removed.
+
+        Args:
+            values: The values to add, oldest first.
+            timestamps: Epoch seconds of each value.
+        """
+        values = np.asarray(values, dtype=float)
+        timestamps = np.asarray(timestamps, dtype=float)
+
+        present = ~np.isnan(values)
+        values, timestamps = values[present], timestamps[present]
+        if not len(values):
+            return
+
+        # Newest timestamp seen before each value, as tracked by add
+        previous = np.maximum.accumulate(
+            np.concatenate(([-np.inf if self._latest is None else self._latest], timestamps)))
+        latest = previous[-1]
+        previous = previous[:-1]
+
+        # Values already older than the window when they arrive are ignored
+        if self.max_age is not None:
+            accepted = timestamps >= previous - self.max_age
+            values, timestamps = values[accepted], timestamps[accepted]
+
+        # Eviction only ever removes the oldest value, so the values left at
+        # the end are a suffix of the current window followed by the batch:
+        # past the count limit and starting at the first value that is still
+        # young enough
+        current = np.array([timestamp for _, timestamp, _ in self._values], dtype=float)
+        combined = np.concatenate((current, timestamps))
+        start = 0
+        if self.max_count is not None:
+            start = max(0, len(combined) - self.max_count)
+        if self.max_age is not None:
+            fresh = np.flatnonzero(latest - combined[start:] <= self.max_age)
+            start = start + int(fresh[0]) if len(fresh) else len(combined)
+
+        # If the whole current window goes, skip the batch values evicted with it
+        start -= len(current)
+        if start > 0:
+            self._reset()
+            values, timestamps = values[start:], timestamps[start:]
+
+        self._latest = float(latest)
+        for value, timestamp in zip(values.tolist(), timestamps.tolist()):
+            self._insert(value, timestamp)
+
+    def _reset(self) -> None:
+        """Remove all values from the window."""
+        self._values.clear()
+        self._min.clear()
+        self._max.clear()
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def _insert(self, value: float, timestamp: float) -> None:
+        """Append a value and evict values that fall out of the window."""
+        sequence = self._sequence
+        self._sequence += 1
+        self._values.append((sequence, timestamp, value))
+
+        # Welford update
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+        # Monotonic deques: drop entries that can never be the min/max again
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((sequence, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((sequence, value))
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove values that no longer belong to the window."""
+        while self._values and (
+            (self.max_count is not None and len(self._values) > self.max_count) or
+            (self.max_age is not None and self._latest - self._values[0][1] > self.max_age)
+        ):
+            sequence, _, value = self._values.popleft()
+
+            # Reverse Welford update
+            self._count -= 1
+            if self._count == 0:
+                self._mean = 0.0
+                self._m2 = 0.0
+            else:
+                delta = value - self._mean
+                self._mean -= delta / self._count
+                self._m2 = max(0.0, self._m2 - delta * (value - self._mean))
+
+            if self._min and self._min[0][0] == sequence:
+                self._min.popleft()
+            if self._max and self._max[0][0] == sequence:
+                self._max.popleft()
+
+    @property
+    def count(self) -> int:
+        """Number of values in the window."""
+        return self._count
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean of the values in the window."""
+        return self._mean if self._count else None
+
+    @property
+    def stdev(self) -> Optional[float]:
+        """Sample standard deviation of the values in the window."""
+        return math.sqrt(self._m2 / (self._count - 1)) if self._count > 1 else None
+
+    @property
+    def min(self) -> Optional[float]:
+        """Smallest value in the window."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        """Largest value in the window."""
+        return self._max[0][1] if self._max else None
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get all statistics of the window.
+
+        Returns:
+            Dictionary with count, mean, stdev, min and max.
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "stdev": self.stdev,
+            "min": self.min,
+            "max": self.max
+        }
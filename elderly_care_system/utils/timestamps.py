@@ -0,0 +1,136 @@
+"""
+Timestamp helpers for the Elderly Care System.
+Converts the timestamp values found in the datasets and messages to epoch seconds.
+"""
+from functools import lru_cache
+from typing import Any, Optional
+import datetime
+import time
+
+
+# Formats tried, in order, for timestamps that are not ISO 8601
+TIMESTAMP_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%d-%m-%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M",
+    "%Y/%m/%d %H:%M:%S",
+]
+
+# Index of the format that matched last, tried first on the next call
+_last_format = 0
+
+# Formats of times of day, by the number of colons in them
+TIME_OF_DAY_FORMATS = {1: "%H:%M", 2: "%H:%M:%S"}
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """
+    Convert a timestamp value to epoch seconds.
+
+    Args:
+        value: A datetime, pandas Timestamp, number of epoch seconds or a
+            timestamp string.
+
+    Returns:
+        Epoch seconds, or None if the value cannot be parsed.
+    """
+    global _last_format
+
+    if isinstance(value, bool) or value is None:
+        return None
+
+    if isinstance(value, (int, float)):
+        return None if value != value else float(value)  # NaN check
+
+    if hasattr(value, "timestamp"):
+        try:
+            return value.timestamp()
+        except (ValueError, OverflowError, OSError):
+            return None
+
+    if not isinstance(value, str):
+        return None
+
+    value = value.strip()
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        pass
+
+    for offset in range(len(TIMESTAMP_FORMATS)):
+        index = (_last_format + offset) % len(TIMESTAMP_FORMATS)
+        try:
+            parsed = datetime.datetime.strptime(value, TIMESTAMP_FORMATS[index])
+        except ValueError:
+            continue
+        _last_format = index
+        return parsed.timestamp()
+
+    return None
+
+
+def timestamp_or_now(value: Any) -> float:
+    """
+    Convert a timestamp value to epoch seconds, falling back to the current time.
+
+    Args:
+        value: The timestamp value to convert.
+
+    Returns:
+        Epoch seconds.
+    """
+    parsed = parse_timestamp(value)
+    return parsed if parsed is not None else time.time()
+
+
+@lru_cache(maxsize=4096)
+def parse_scheduled_time(date: str, scheduled_time: str) -> Optional[float]:
+    """
+    Convert the date and time of day something is scheduled at to epoch seconds.
+    Schedules repeat the same few dates and times, so results are cached and
+    the format of each distinct time string is only worked out once.
+
+    Args:
+        date: The date, as "YYYY-MM-DD".
+        scheduled_time: A time of day such as "08:00", "08:00:00" or
+            "8:00 AM", or a full timestamp, which takes precedence over the date.
+
+    Returns:
+        Epoch seconds, or None if the time cannot be parsed.
+    """
+    text = scheduled_time.strip()
+    if text[-2:].upper() in ("AM", "PM"):
+        time_format = "%I:%M %p"
+    elif len(text) <= 8:
+        time_format = TIME_OF_DAY_FORMATS.get(text.count(":"))
+    else:
+        # A full timestamp
+        return parse_timestamp(text)
+
+    if time_format is None:
+        return None
+
+    try:
+        return datetime.datetime.strptime(f"{date.strip()} {text}", f"%Y-%m-%d {time_format}").timestamp()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def time_of_day_key(text: str) -> Optional[str]:
+    """
+    Convert a 12-hour time of day to a 24-hour "HH:MM" key. Schedules use a
+    few distinct times, so results are cached.
+
+    Args:
+        text: A time such as "8:00 PM".
+
+    Returns:
+        The key, such as "20:00", or None if the time cannot be parsed.
+    """
+    try:
+        return datetime.datetime.strptime(text, "%I:%M %p").strftime("%H:%M")
+    except ValueError:
+        return None
@@ -0,0 +1,395 @@
+"""
+On-disk columnar store for the vitals history of the Elderly Care System.
+Every resident has a directory with one file of float64 values per metric
+and one of reading times. Reads go through memory maps, so a time-range
+query only touches the pages it needs and the history survives restarts.
+"""
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote
+import json
+import os
+import threading
+import numpy as np
+
+from elderly_care_system.utils.residents import resident_key
+
+
+# Metrics stored by default, matching the health agent's historical metrics
+DEFAULT_METRICS = ("heartrate", "systolic_bp", "diastolic_bp", "temperature", "blood_glucose", "oxygen_level")
+
+# Column holding the reading times, in epoch seconds
+TIME_COLUMN = "timestamp"
+
+
+def same_value(a: float, b: float) -> bool:
+    """Check whether two stored values are equal, counting two missing values as equal."""
+    return a == b or (a != a and b != b)
+
+
+class VitalsStore:
+    """
+    Append-only, memory-mapped columnar store of vitals per resident.
+
+    Appends are buffered in memory and written when the buffer fills up, on
+    flush, or before a read. Missing values are stored as NaN. A reading with
+    the same time and values as a stored one is skipped by default, so
+    replaying a dataset on restart does not store it twice. Each resident's
+    reading times are kept in a sorted index when readings arrive in order;
+    late and out-of-order readings are still accepted, and queries on that
+    resident fall back to a full scan until compact is called.
+    """
+
+    def __init__(self, directory: str, metrics: Iterable[str] = DEFAULT_METRICS, buffer_size: int = 1024):
+        """
+        Initialize the store, opening any history already in the directory.
+
+        Args:
+            directory: Directory holding the store.
+            metrics: Metrics to store.
+            buffer_size: Number of readings buffered per resident before writing.
+        """
+        self.directory = directory
+        self.metrics = tuple(metrics)
+        self.buffer_size = buffer_size
+
+        self._lock = threading.RLock()
+        self._buffers: Dict[str, Dict[str, list]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._sorted: Dict[str, bool] = {}
+        self._last_time: Dict[str, float] = {}
+        self._buffer_times: Dict[str, Dict[float, List[int]]] = {}
+        self._maps: Dict[str, Dict[str, np.memmap]] = {}
+        self._orders: Dict[str, np.ndarray] = {}
+
+        os.makedirs(directory, exist_ok=True)
+        for name in sorted(os.listdir(directory)):
+            if os.path.isdir(os.path.join(directory, name)):
+                self._open_resident(unquote(name))
+
+    def _resident_dir(self, key: str) -> str:
+        """Get the directory of a resident."""
+        return os.path.join(self.directory, quote(key, safe=""))
+
+    def _column_path(self, key: str, column: str) -> str:
+        """Get the file of one of a resident's columns."""
+        return os.path.join(self._resident_dir(key), f"{column}.f8")
+
+    def _open_resident(self, key: str) -> None:
+        """
+        Load the index of a resident's existing history. Columns left with
+        different lengths by an interrupted write are cut to the shortest.
+        """
+        columns = (TIME_COLUMN,) + self.metrics
+        sizes = []
+        for column in columns:
+            path = self._column_path(key, column)
+            sizes.append(os.path.getsize(path) // 8 if os.path.exists(path) else 0)
+        length = min(sizes)
+
+        for column, size in zip(columns, sizes):
+            if size > length:
+                with open(self._column_path(key, column), "r+b") as f:
+                    f.truncate(length * 8)
+
+        meta_path = os.path.join(self._resident_dir(key), "meta.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+
+        self._lengths[key] = length
+        self._sorted[key] = meta.get("sorted", True)
+        if not length:
+            self._last_time[key] = -np.inf
+        elif self._sorted[key]:
+            self._last_time[key] = float(np.fromfile(self._column_path(key, TIME_COLUMN), dtype="<f8",
+                                                     offset=(length - 1) * 8)[0])
+        else:
+            self._last_time[key] = float(np.fromfile(self._column_path(key, TIME_COLUMN), dtype="<f8",
+                                                     count=length).max())
+
+    def append(self, resident_id: Any, timestamp: float, values: Dict[str, Any],
+               skip_duplicates: bool = True) -> bool:
+        """
+        Append one reading.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            timestamp: Epoch seconds of the reading.
+            values: Metric values of the reading; missing metrics are stored as NaN.
+            skip_duplicates: Skip the reading if one with the same time and
+                values is already stored.
+
+        Returns:
+            True if the reading was stored.
+        """
+        key = resident_key(resident_id)
+        row = [float(timestamp)] + [np.nan if values.get(metric) is None else float(values[metric])
+                                    for metric in self.metrics]
+        with self._lock:
+            if skip_duplicates and self._contains(key, row):
+                return False
+
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = {column: [] for column in (TIME_COLUMN,) + self.metrics}
+                self._buffer_times[key] = {}
+
+            self._buffer_times[key].setdefault(row[0], []).append(len(buffer[TIME_COLUMN]))
+            for column, value in zip((TIME_COLUMN,) + self.metrics, row):
+                buffer[column].append(value)
+
+            if len(buffer[TIME_COLUMN]) >= self.buffer_size:
+                self._flush_resident(key)
+            return True
+
+    def append_batch(self, resident_id: Any, timestamps: np.ndarray, columns: Dict[str, np.ndarray],
+                     skip_duplicates: bool = True) -> int:
+        """
+        Append several readings of one resident, oldest first.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            timestamps: Epoch seconds of the readings.
+            columns: Array of values per metric, with NaN for missing values;
+                metrics that are not given are stored as NaN.
+            skip_duplicates: Skip the readings whose time and values are
+                already stored.
+
+        Returns:
+            Number of readings stored.
+        """
+        key = resident_key(resident_id)
+        timestamps = np.asarray(timestamps, dtype=float)
+        data = {TIME_COLUMN: timestamps}
+        for metric in self.metrics:
+            data[metric] = np.asarray(columns[metric], dtype=float) if metric in columns \
+                else np.full(len(timestamps), np.nan)
+
+        with self._lock:
+            self._flush_resident(key)
+            if skip_duplicates:
+                stored = self._stored_rows(key, data)
+                if stored.any():
+                    data = {column: values[~stored] for column, values in data.items()}
+            self._write(key, data)
+            return len(data[TIME_COLUMN])
+
+    def _contains(self, key: str, row: List[float]) -> bool:
+        """Check whether a reading, given as its time and metric values, is stored or buffered."""
+        buffer = self._buffers.get(key)
+        if buffer is not None:
+            for position in self._buffer_times[key].get(row[0], ()):
+                if all(same_value(buffer[column][position], value)
+                       for column, value in zip(self.metrics, row[1:])):
+                    return True
+
+        # Readings after the newest stored one cannot be stored yet
+        if not self._lengths.get(key) or row[0] > self._last_time[key]:
+            return False
+        data = {column: np.array([value]) for column, value in zip((TIME_COLUMN,) + self.metrics, row)}
+        return bool(self._stored_rows(key, data)[0])
+
+    def _stored_rows(self, key: str, data: Dict[str, np.ndarray]) -> np.ndarray:
+        """Find the readings of a batch whose time and values are already written for a resident."""
+        times = data[TIME_COLUMN]
+        stored = np.zeros(len(times), dtype=bool)
+        candidates = np.flatnonzero(times <= self._last_time.get(key, -np.inf))
+        if not len(candidates):
+            return stored
+
+        columns = self._columns(key)
+        written = columns[TIME_COLUMN]
+        order = None
+        if not self._sorted[key]:
+            # Time order of an unsorted history, kept until the next write
+            order = self._orders.get(key)
+            if order is None:
+                order = self._orders[key] = np.argsort(written, kind="stable")
+            written = written[order]
+
+        # Only readings written at exactly the same time can be duplicates
+        first = np.searchsorted(written, times[candidates], side="left")
+        last = np.searchsorted(written, times[candidates], side="right")
+        for index, low, high in zip(candidates.tolist(), first.tolist(), last.tolist()):
+            if low == high:
+                continue
+            rows = np.arange(low, high) if order is None else order[low:high]
+            matches = np.ones(len(rows), dtype=bool)
+            for metric in self.metrics:
+                values, value = columns[metric][rows], data[metric][index]
+                matches &= (values == value) | (np.isnan(values) & np.isnan(value))
+            stored[index] = bool(matches.any())
+        return stored
+
+    def _write(self, key: str, data: Dict[str, np.ndarray]) -> None:
+        """Append columns to a resident's files and update the index."""
+        times = data[TIME_COLUMN]
+        if not len(times):
+            return
+
+        if key not in self._lengths:
+            os.makedirs(self._resident_dir(key), exist_ok=True)
+            self._lengths[key] = 0
+            self._sorted[key] = True
+            self._last_time[key] = -np.inf
+
+        # Write the time column last, so an interrupted write is cut off on open
+        for column in self.metrics + (TIME_COLUMN,):
+            with open(self._column_path(key, column), "ab") as f:
+                f.write(data[column].astype("<f8").tobytes())
+
+        in_order = times[0] >= self._last_time[key] and bool(np.all(times[1:] >= times[:-1]))
+        if self._sorted[key] and not in_order:
+            self._set_sorted(key, False)
+
+        self._lengths[key] += len(times)
+        self._last_time[key] = max(self._last_time[key], float(times.max()))
+        self._maps.pop(key, None)
+        self._orders.pop(key, None)
+
+    def _set_sorted(self, key: str, is_sorted: bool) -> None:
+        """Record whether a resident's readings are in time order."""
+        self._sorted[key] = is_sorted
+        with open(os.path.join(self._resident_dir(key), "meta.json"), "w") as f:
+            json.dump({"sorted": is_sorted}, f)
+
+    def _flush_resident(self, key: str) -> None:
+        """Write the buffered readings of a resident."""
+        buffer = self._buffers.pop(key, None)
+        self._buffer_times.pop(key, None)
+        if buffer:
+            self._write(key, {column: np.asarray(column_values, dtype=float)
+                              for column, column_values in buffer.items()})
+
+    def flush(self) -> None:
+        """Write all buffered readings to disk."""
+        with self._lock:
+            for key in list(self._buffers):
+                self._flush_resident(key)
+
+    def _columns(self, key: str) -> Dict[str, np.memmap]:
+        """Get read-only memory maps of a resident's columns."""
+        maps = self._maps.get(key)
+        if maps is None:
+            length = self._lengths[key]
+            maps = self._maps[key] = {
+                column: np.memmap(self._column_path(key, column), dtype="<f8", mode="r", shape=(length,))
+                for column in (TIME_COLUMN,) + self.metrics
+            }
+        return maps
+
+    def residents(self) -> List[str]:
+        """Get the IDs of all residents with stored history."""
+        with self._lock:
+            return sorted(set(self._lengths) | set(self._buffers))
+
+    def count(self, resident_id: Any) -> int:
+        """
+        Get the number of readings stored for a resident.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+
+        Returns:
+            Number of readings, including buffered ones.
+        """
+        key = resident_key(resident_id)
+        with self._lock:
+            buffered = len(self._buffers[key][TIME_COLUMN]) if key in self._buffers else 0
+            return self._lengths.get(key, 0) + buffered
+
+    def time_range(self, resident_id: Any) -> Optional[Tuple[float, float]]:
+        """
+        Get the time of a resident's first and last reading.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+
+        Returns:
+            Tuple of (first, last) epoch seconds, or None if nothing is stored.
+        """
+        key = resident_key(resident_id)
+        with self._lock:
+            self._flush_resident(key)
+            if not self._lengths.get(key):
+                return None
+            times = self._columns(key)[TIME_COLUMN]
+            if self._sorted[key]:
+                return float(times[0]), float(times[-1])
+            return float(times.min()), float(times.max())
+
+    def query(self, resident_id: Any, start: Optional[float] = None, end: Optional[float] = None,
+              metrics: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Get a resident's readings in a time range.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+            start: Earliest epoch time to include; defaults to the first reading.
+            end: Latest epoch time to include; defaults to the last reading.
+            metrics: Metrics to return; defaults to all metrics.
+
+        Returns:
+            Dictionary with the reading times and an array per metric, in time
+            order. The arrays are copies and stay valid after later appends.
+        """
+        key = resident_key(resident_id)
+        metrics = self.metrics if metrics is None else tuple(metrics)
+        unknown = [metric for metric in metrics if metric not in self.metrics]
+        if unknown:
+            raise KeyError(f"Unknown metric: {unknown[0]}")
+
+        with self._lock:
+            self._flush_resident(key)
+            if not self._lengths.get(key):
+                return {column: np.empty(0) for column in (TIME_COLUMN,) + metrics}
+
+            columns = self._columns(key)
+            times = columns[TIME_COLUMN]
+            low = -np.inf if start is None else start
+            high = np.inf if end is None else end
+
+            if self._sorted[key]:
+                # Binary search on the time index only touches a few pages
+                first = int(np.searchsorted(times, low, side="left"))
+                last = int(np.searchsorted(times, high, side="right"))
+                rows = slice(first, last)
+            else:
+                selected = np.flatnonzero((times >= low) & (times <= high))
+                rows = selected[np.argsort(times[selected], kind="stable")]
+
+            return {column: np.array(columns[column][rows]) for column in (TIME_COLUMN,) + metrics}
+
+    def compact(self, resident_id: Any) -> None:
+        """
+        Rewrite a resident's history in time order, so queries can use the
+        sorted index again after out-of-order appends.
+
+        Args:
+            resident_id: The resident's Device-ID/User-ID.
+        """
+        key = resident_key(resident_id)
+        with self._lock:
+            self._flush_resident(key)
+            if not self._lengths.get(key) or self._sorted[key]:
+                return
+
+            columns = self._columns(key)
+            order = np.argsort(columns[TIME_COLUMN], kind="stable")
+            data = {column: np.array(values[order]) for column, values in columns.items()}
+            self._maps.pop(key, None)
+            self._orders.pop(key, None)
+            del columns
+
+            for column, values in data.items():
+                path = self._column_path(key, column)
+                values.astype("<f8").tofile(path + ".tmp")
+                os.replace(path + ".tmp", path)
+            self._set_sorted(key, True)
+
+    def close(self) -> None:
+        """Write buffered readings and release the memory maps."""
+        with self._lock:
+            self.flush()
+            self._maps.clear()
@@ -188,6 +188,9 @@ function fetchHealthData() {
       // Update vital signs with latest readings
       updateHealthData(data);
 
+      // Load the trends of the resident of the latest reading
+      fetchHealthHistory((data.latest_readings || {}).device_id);
+
       // Update analysis section with analysis data
       if (data.analysis) {
         updateAnalysisData(data.analysis);
@@ -372,6 +375,47 @@ function addHealthAlert(alert) {
   }
 }
 
+// Load vital sign trends from the history API
+function fetchHealthHistory(residentId) {
+  if (!residentId) {
+    return;
+  }
+
+  // Same order as the chart datasets
+  const metrics = ["heartrate", "systolic_bp", "diastolic_bp"];
+  const requests = metrics.map((metric) =>
+    fetch(
+      `/api/health/history?resident=${encodeURIComponent(residentId)}&metric=${metric}&max_points=200`
+    ).then((response) => response.json())
+  );
+
+  Promise.all(requests)
+    .then((series) => {
+      if (series.some((s) => s.error) || series.every((s) => s.timestamps.length === 0)) {
+        return;
+      }
+
+      // Each series is downsampled separately, so align them on all their times
+      const times = [...new Set(series.flatMap((s) => s.timestamps))].sort(
+        (a, b) => a - b
+      );
+      healthChart.data.labels = times.map((t) =>
+        new Date(t * 1000).toLocaleString()
+      );
+      series.forEach((s, index) => {
+        const values = new Map(s.timestamps.map((t, i) => [t, s.values[i]]));
+        healthChart.data.datasets[index].data = times.map((t) =>
+          values.has(t) ? values.get(t) : null
+        );
+      });
+      healthChart.options.spanGaps = true;
+      healthChart.update();
+    })
+    .catch((error) => {
+      console.error("Error fetching health history:", error);
+    });
+}
+
 // Update health chart
 function updateHealthChart(latestReadings) {
   const now = new Date().toLocaleTimeString();
@@ -208,6 +208,9 @@ function fetchSafetyData() {
             // Process and update with the data
             updateSafetyData(data);
             
+            // Add the resident's recorded falls to the timeline
+            fetchFallHistory((data.latest_readings || {}).device_id);
+            
             // Generate sample data for visualization if no location data is provided
             if (!data.location_data) {
                 generateSampleActivityData();
@@ -354,6 +357,38 @@ function generateSampleTimelineEvents() {
     updateTimelineVisualization();
 }
 
+// Add falls of the last 30 days from the history API to the timeline
+function fetchFallHistory(residentId) {
+    if (!residentId) return;
+    
+    const start = Date.now() / 1000 - 30 * 24 * 3600;
+    fetch(`/api/safety/history?resident=${encodeURIComponent(residentId)}&metric=fall_detected&start=${start}&max_points=200`)
+        .then(response => response.json())
+        .then(series => {
+            if (series.error) return;
+            
+            // Replace the falls added by the previous fetch instead of adding them again
+            timelineEvents = timelineEvents.filter(event => !event.fromHistory);
+            
+            // Min/max downsampling keeps every bucket that contains a fall
+            series.timestamps.forEach((t, i) => {
+                if (series.values[i] > 0) {
+                    timelineEvents.push({
+                        time: new Date(t * 1000),
+                        title: 'Fall Detected',
+                        description: `Fall recorded for resident ${series.resident_id}`,
+                        type: 'fall',
+                        fromHistory: true
+                    });
+                }
+            });
+            updateTimelineVisualization();
+        })
+        .catch(error => {
+            console.error('Error fetching safety history:', error);
+        });
+}
+
 // Update safety data display
 function updateSafetyData(data) {
     const latestReadings = data.latest_readings || {};
@@ -536,6 +571,7 @@ function updateTimelineVisualization() {
                     marker.style.backgroundColor = '#198754'; // Green
                     break;
                 case 'door':
+                case 'fall':
                     marker.style.backgroundColor = '#dc3545'; // Red
                     break;
                 default:
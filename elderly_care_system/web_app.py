@@ -196,6 +196,14 @@ def api_health_data():
     if system is None or system.health_agent is None:
         return jsonify({"error": "System not running"})
 
+    # Data of a single resident
+    resident_id = request.args.get('resident')
+    if resident_id:
+        summary = system.health_agent.get_resident_summary(resident_id)
+        if summary is None:
+            return jsonify({"error": f"Unknown resident: {resident_id}"})
+        return jsonify(summary)
+
     return jsonify({
         "latest_readings": system.health_agent.state.get("latest_readings", {}),
         # Last 5 alerts
@@ -212,12 +220,16 @@ def api_health_analysis():
         return jsonify({"error": "System not running"})
 
     try:
-        # Get the path to the CSV file
-        dataset_dir = "Dataset/[Usecase 4] AI for Elderly Care and Support"
-        health_csv = os.path.join(dataset_dir, "health_monitoring.csv")
+        # Read the running analysis maintained by the health monitoring agent
+        analysis = system.health_agent.get_health_analysis()
+
+        if analysis["total_readings"] == 0:
+            # Get the path to the CSV file
+            dataset_dir = "Dataset/[Usecase 4] AI for Elderly Care and Support"
+            health_csv = os.path.join(dataset_dir, "health_monitoring.csv")
 
-        # Generate analysis using the health monitoring agent
-        analysis = system.health_agent.analyze_csv_data(health_csv)
+            # Nothing processed yet, analyze the CSV file (cached per file version)
+            analysis = system.health_agent.analyze_csv_data(health_csv)
 
         return jsonify(analysis)
     except Exception as e:
@@ -232,6 +244,14 @@ def api_safety_data():
     if system is None or system.safety_agent is None:
         return jsonify({"error": "System not running"})
 
+    # Data of a single resident
+    resident_id = request.args.get('resident')
+    if resident_id:
+        summary = system.safety_agent.get_resident_summary(resident_id)
+        if summary is None:
+            return jsonify({"error": f"Unknown resident: {resident_id}"})
+        return jsonify(summary)
+
     return jsonify({
         "latest_readings": system.safety_agent.state.get("latest_readings", {}),
         # Last 5 alerts
@@ -247,13 +267,116 @@ def api_reminders():
     if system is None or system.reminder_agent is None:
         return jsonify({"error": "System not running"})
 
+    # Reminders of a single resident
+    resident_id = request.args.get('resident')
+    if resident_id:
+        reminders = system.reminder_agent.get_resident_reminders(resident_id)
+        if reminders is None:
+            return jsonify({"error": f"Unknown resident: {resident_id}"})
+        return jsonify(reminders)
+
     return jsonify({
-        "active_reminders": system.reminder_agent.state.get("active_reminders", []),
+        "active_reminders": list(system.reminder_agent.state.get("active_reminders", [])),
         # Last 10 completed
         "completed_reminders": system.reminder_agent.state.get("completed_reminders", [])[-10:]
     })
 
 
+@app.route('/api/health/history', methods=['GET'])
+def api_health_history():
+    """API endpoint to get a downsampled vital sign history of a resident."""
+    global system
+
+    if system is None or system.health_agent is None:
+        return jsonify({"error": "System not running"})
+
+    return jsonify(system.get_health_history(
+        request.args.get('resident'),
+        request.args.get('metric', 'heartrate'),
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+        max_points=request.args.get('max_points', 500, type=int),
+        method=request.args.get('method', 'lttb')
+    ))
+
+
+@app.route('/api/safety/history', methods=['GET'])
+def api_safety_history():
+    """API endpoint to get a downsampled safety metric history of a resident."""
+    global system
+
+    if system is None or system.safety_agent is None:
+        return jsonify({"error": "System not running"})
+
+    return jsonify(system.get_safety_history(
+        request.args.get('resident'),
+        request.args.get('metric', 'fall_detected'),
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+        max_points=request.args.get('max_points', 500, type=int),
+        method=request.args.get('method', 'minmax')
+    ))
+
+
+@app.route('/api/alerts', methods=['GET'])
+def api_alerts():
+    """API endpoint to query alerts by resident, severity, metric, type and time."""
+    global system
+
+    if system is None:
+        return jsonify({"error": "System not running"})
+
+    return jsonify(system.get_alerts(
+        resident_id=request.args.get('resident'),
+        severity=request.args.get('severity'),
+        metric=request.args.get('metric'),
+        alert_type=request.args.get('type'),
+        since=request.args.get('since'),
+        until=request.args.get('until'),
+        limit=request.args.get('limit', 50, type=int),
+        offset=request.args.get('offset', 0, type=int)
+    ))
+
+
+@app.route('/api/alerts/ongoing', methods=['GET'])
+def api_alert_conditions():
+    """API endpoint to list the ongoing alert conditions."""
+    global system
+
+    if system is None:
+        return jsonify({"error": "System not running"})
+
+    return jsonify(system.get_alert_conditions(request.args.get('resident')))
+
+
+@app.route('/api/events', methods=['GET'])
+def api_events():
+    """API endpoint to query the messages logged by the coordinator."""
+    global system
+
+    if system is None:
+        return jsonify({"error": "System not running"})
+
+    types = [t for t in request.args.get('type', '').split(',') if t]
+    return jsonify(system.get_events(
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+        types=types,
+        limit=request.args.get('limit', 1000, type=int)
+    ))
+
+
+@app.route('/api/residents', methods=['GET'])
+def api_residents():
+    """API endpoint to list the residents known to the system."""
+    global system
+
+    if system is None:
+        return jsonify({"error": "System not running"})
+
+    return jsonify({"residents": system.list_residents()})
+
+
 @app.route('/api/acknowledge-reminder', methods=['POST'])
 def api_acknowledge_reminder():
     """API endpoint to acknowledge a reminder."""